@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional, Tuple
+from config import settings
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, retry_after: float, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class ConcurrencyLimiter:
+    def __init__(self, max_concurrent: Optional[int] = None, max_queue: Optional[int] = None,
+                 queue_timeout: Optional[float] = None):
+        self.max_concurrent = max_concurrent or settings.MAX_CONCURRENT_STREAMS
+        self.max_queue = max_queue if max_queue is not None else settings.ADMISSION_QUEUE_SIZE
+        self.queue_timeout = queue_timeout if queue_timeout is not None else settings.ADMISSION_QUEUE_TIMEOUT
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+
+    @property
+    def active(self) -> int:
+        return self._active
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+    def _retry_after(self) -> float:
+        observed = get_metrics().percentile("admission.slot_hold_s", 50)
+        return observed if observed is not None else self.queue_timeout
+
+    async def acquire(self) -> "AdmissionSlot":
+        metrics = get_metrics()
+
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            self._publish()
+            return AdmissionSlot(self)
+
+        if len(self._waiters) >= self.max_queue:
+            metrics.increment("admission.rejected_queue_full")
+            raise AdmissionRejected(503, self._retry_after(), "Hệ thống đang quá tải, vui lòng thử lại sau")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._publish()
+        queued_at = time.monotonic()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._abandon(waiter)
+            metrics.increment("admission.rejected_queue_timeout")
+            raise AdmissionRejected(503, self._retry_after(), "Hệ thống đang quá tải, vui lòng thử lại sau")
+        except asyncio.CancelledError:
+            self._abandon(waiter)
+            raise
+
+        metrics.observe("admission.queue_wait_s", time.monotonic() - queued_at)
+        return AdmissionSlot(self)
+
+    def _abandon(self, waiter: asyncio.Future) -> None:
+        if waiter.done():
+            self._release_slot()
+            return
+
+        waiter.cancel()
+        self._waiters.remove(waiter)
+        self._publish()
+
+    def _release_slot(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(True)
+                self._publish()
+                return
+
+        self._active -= 1
+        self._publish()
+
+    def _publish(self) -> None:
+        metrics = get_metrics()
+        metrics.set_gauge("admission.active_streams", self._active)
+        metrics.set_gauge("admission.queued_streams", len(self._waiters))
+
+    def get_stats(self) -> Dict:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "queue_timeout": self.queue_timeout,
+            "active": self._active,
+            "waiting": len(self._waiters)
+        }
+
+
+class AdmissionSlot:
+    def __init__(self, limiter: ConcurrencyLimiter):
+        self.limiter = limiter
+        self.acquired_at = time.monotonic()
+        self.released = False
+
+    def release(self) -> None:
+        if self.released:
+            return
+        self.released = True
+        get_metrics().observe("admission.slot_hold_s", time.monotonic() - self.acquired_at)
+        self.limiter._release_slot()
+
+
+class InMemoryBucketStore:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def take(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> Tuple[bool, float]:
+        now = time.time()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - updated) * rate)
+
+            if tokens >= cost:
+                self._buckets[key] = (tokens - cost, now)
+                return True, 0.0
+
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > settings.RATE_LIMIT_MAX_KEYS:
+                self._evict_full(now, rate, capacity)
+            return False, (cost - tokens) / rate
+
+    def _evict_full(self, now: float, rate: float, capacity: float) -> None:
+        for key, (tokens, updated) in list(self._buckets.items()):
+            if tokens + (now - updated) * rate >= capacity:
+                del self._buckets[key]
+
+
+class SQLiteBucketStore:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._local = threading.local()
+        self._calls = 0
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS rate_buckets ("
+            "key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)"
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def take(self, key: str, rate: float, capacity: float, cost: float = 1.0) -> Tuple[bool, float]:
+        conn = self._connect()
+        now = time.time()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM rate_buckets WHERE key = ?", (key,)).fetchone()
+            tokens, updated = row if row else (capacity, now)
+            tokens = min(capacity, tokens + (now - updated) * rate)
+
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+
+            conn.execute(
+                "INSERT INTO rate_buckets (key, tokens, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET tokens = excluded.tokens, updated = excluded.updated",
+                (key, tokens, now)
+            )
+
+            self._calls += 1
+            if self._calls % 1000 == 0:
+                conn.execute("DELETE FROM rate_buckets WHERE updated < ?", (now - capacity / rate,))
+
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+        return allowed, 0.0 if allowed else (cost - tokens) / rate
+
+
+class RateLimiter:
+    def __init__(self, store=None, per_minute: Optional[int] = None, burst: Optional[int] = None):
+        self.store = store or _build_bucket_store()
+        self.rate = (per_minute or settings.RATE_LIMIT_PER_MINUTE) / 60.0
+        self.capacity = float(burst or settings.RATE_LIMIT_BURST)
+
+    def check(self, client_id: str) -> None:
+        try:
+            allowed, retry_after = self.store.take(f"rl:{client_id}", self.rate, self.capacity)
+        except sqlite3.Error as e:
+            logger.warning(f"Rate limit store unavailable, allowing request: {e}")
+            return
+
+        if not allowed:
+            get_metrics().increment("admission.rate_limited")
+            raise AdmissionRejected(429, retry_after, "Bạn đã gửi quá nhiều yêu cầu, vui lòng thử lại sau")
+
+
+def _build_bucket_store():
+    if settings.RATE_LIMIT_STORE == "sqlite":
+        logger.info(f"Rate limit store: sqlite ({settings.RATE_LIMIT_SQLITE_PATH})")
+        return SQLiteBucketStore(settings.RATE_LIMIT_SQLITE_PATH)
+    return InMemoryBucketStore()
+
+
+_limiter_instance: Optional[ConcurrencyLimiter] = None
+_rate_limiter_instance: Optional[RateLimiter] = None
+
+
+def get_stream_limiter() -> ConcurrencyLimiter:
+    global _limiter_instance
+
+    if _limiter_instance is None:
+        _limiter_instance = ConcurrencyLimiter()
+
+    return _limiter_instance
+
+
+def get_rate_limiter() -> RateLimiter:
+    global _rate_limiter_instance
+
+    if _rate_limiter_instance is None:
+        _rate_limiter_instance = RateLimiter()
+
+    return _rate_limiter_instance
+
+
+def get_client_id(request) -> str:
+    if settings.TRUST_PROXY_HEADERS:
+        forwarded = request.headers.get("x-forwarded-for")
+        if forwarded:
+            return forwarded.split(",")[0].strip()
+
+    return request.client.host if request.client else "unknown"
+
+
+def get_admission_stats() -> Dict:
+    return {
+        "rate_limit_enabled": settings.ENABLE_RATE_LIMIT,
+        "rate_limit_per_minute": settings.RATE_LIMIT_PER_MINUTE,
+        "rate_limit_burst": settings.RATE_LIMIT_BURST,
+        "rate_limit_store": settings.RATE_LIMIT_STORE,
+        "streams": get_stream_limiter().get_stats()
+    }
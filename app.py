@@ -1,22 +1,42 @@
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Depends, Query
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse, PlainTextResponse
 from pydantic import BaseModel, Field, validator
 import uvicorn
 from typing import Optional, List
+import asyncio
 import logging
 import os
+import secrets
 import time
-import json
 
-from rag import get_answer_stream, build_index
+from rag import get_answer_stream, build_index, search_rag_batch, prepare_retrieval
 from embedding import get_device_info
 from reranker import get_reranker_info
 from hybrid_search import get_hybrid_search_info
+from faq_matcher import get_faq_fast_path_info
+from query_rewriter import get_query_rewrite_info
+from suggestions import suggest, get_suggestion_index
+from tracing import get_tracing_info
+from llm_client import get_llm_info
 from config import settings
 from logger_utils import setup_logging, LoggingMiddleware, get_trace_id
 from cache import get_cache
+from conversation_store import get_conversation_store
+from sse import SSEEncoder, iterate_in_thread, dumps
+from transport import CompressedStaticFiles, ClosingStreamingResponse, encode_stream, wants_gzip
+from metrics import get_metrics
+from degradation import get_degradation_controller, get_degradation_info
+from query_classifier import get_query_classifier_info
+from intent_gate import get_intent_gate_info, load_centroids
+from speculation import get_speculation_info
+from admission import (
+    AdmissionRejected, get_stream_limiter, get_rate_limiter, get_client_id, get_admission_stats
+)
+from profiler import (
+    get_profiler, ProfilerBusyError, start_memory_tracing, stop_memory_tracing,
+    memory_top_stats, memory_folded, get_memory_status
+)
 
 setup_logging()
 logger = logging.getLogger(__name__)
@@ -29,6 +49,8 @@
     raise
 
 cache = get_cache()
+profiler = get_profiler()
+stream_limiter = get_stream_limiter()
 
 app = FastAPI(
     title=settings.API_TITLE,
@@ -47,7 +69,7 @@
 )
 
 try:
-    app.mount("/frontend", StaticFiles(directory="frontend"), name="frontend")
+    app.mount("/frontend", CompressedStaticFiles(directory="frontend"), name="frontend")
 except RuntimeError as e:
     logger.warning(f"Could not mount frontend directory: {e}")
 
@@ -67,7 +89,8 @@ class ChatRequest(BaseModel):
     query: str = Field(..., min_length=1, max_length=settings.MAX_QUERY_LENGTH,
                        description="Câu hỏi của người dùng")
     chat_history: Optional[List[ChatMessage]] = Field(default=[], description="Lịch sử chat")
-    conversation_id: Optional[str] = Field(default=None, description="ID của cuộc hội thoại (conversation)")
+    conversation_id: Optional[str] = Field(default=None, max_length=128,
+                                           description="ID của cuộc hội thoại (conversation)")
 
     @validator('query')
     def validate_query(cls, v):
@@ -81,17 +104,81 @@ class SystemStatusResponse(BaseModel):
     device_info: dict
     reranker_info: Optional[dict] = None
     hybrid_search_info: Optional[dict] = None
+    faq_fast_path_info: Optional[dict] = None
+    query_rewrite_info: Optional[dict] = None
+    tracing_info: Optional[dict] = None
+    llm_info: Optional[dict] = None
+    admission_info: Optional[dict] = None
+    degradation_info: Optional[dict] = None
+    query_classifier_info: Optional[dict] = None
+    intent_gate_info: Optional[dict] = None
+    speculation_info: Optional[dict] = None
     indexing_available: bool
     cache_stats: Optional[dict] = None
+    conversation_store_info: Optional[dict] = None
     message: str
     environment: str
 
 
+class PrepareRequest(BaseModel):
+    query: str = Field(..., min_length=1, max_length=settings.MAX_QUERY_LENGTH,
+                       description="Nội dung người dùng đang nhập")
+    conversation_id: str = Field(..., min_length=1, max_length=128,
+                                 description="ID của cuộc hội thoại (conversation)")
+
+
 class BuildIndexRequest(BaseModel):
     batch_size: Optional[int] = Field(default=None, gt=0, le=128,
                                       description="Batch size cho embedding")
 
 
+class BatchSearchRequest(BaseModel):
+    queries: List[str] = Field(..., min_length=1, max_length=settings.BATCH_SEARCH_MAX_QUERIES,
+                               description="Danh sách câu hỏi cần truy xuất")
+    k: Optional[int] = Field(default=None, gt=0, le=100, description="Số context trả về cho mỗi câu hỏi")
+
+    @validator('queries')
+    def validate_queries(cls, v):
+        for query in v:
+            if not query.strip() or len(query) > settings.MAX_QUERY_LENGTH:
+                raise ValueError(f'Mỗi câu hỏi phải có từ 1 đến {settings.MAX_QUERY_LENGTH} ký tự')
+        return v
+
+
+class CPUProfileRequest(BaseModel):
+    seconds: Optional[float] = Field(default=None, gt=0, le=settings.PROFILING_MAX_SECONDS,
+                                     description="Thời gian lấy mẫu (giây)")
+    requests: Optional[int] = Field(default=None, gt=0, le=settings.PROFILING_MAX_REQUESTS,
+                                    description="Số request /api/chat/stream tiếp theo cần profile")
+    interval_ms: Optional[float] = Field(default=None, ge=1, le=1000,
+                                         description="Chu kỳ lấy mẫu (ms)")
+
+
+class MemoryProfileRequest(BaseModel):
+    frames: Optional[int] = Field(default=None, gt=0, le=100,
+                                  description="Số frame traceback tracemalloc lưu lại")
+
+
+def _check_admin_token(request: Request) -> None:
+    token = request.headers.get("X-Admin-Token", "")
+    if not settings.ADMIN_API_TOKEN or not secrets.compare_digest(token, settings.ADMIN_API_TOKEN):
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+
+def require_admin(request: Request) -> None:
+    if not settings.ENABLE_PROFILING:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    _check_admin_token(request)
+
+
+def require_batch_search(request: Request) -> None:
+    if not settings.ENABLE_BATCH_SEARCH:
+        raise HTTPException(status_code=404, detail="Not found")
+
+    _check_admin_token(request)
+
+
 def check_indexes_exist() -> bool:
     faiss_exists = os.path.exists(settings.INDEX_PATH) and os.path.exists(settings.METADATA_PATH)
 
@@ -111,6 +198,7 @@ async def startup_event():
     logger.info("=" * 60)
     logger.info(f"Starting ChatBot Dịch vụ công - Environment: {settings.APP_ENV}")
     logger.info(f"LLM Model: {settings.LLM_MODEL}")
+    logger.info(f"LLM Backends: {settings.get_llm_backends()} (routing: {settings.LLM_ROUTING_STRATEGY})")
     logger.info(f"Embedding Model: {settings.EMBEDDING_MODEL}")
     logger.info(f"Cache enabled: {settings.ENABLE_CACHE}")
     logger.info(f"CORS origins: {settings.get_allowed_origins()}")
@@ -118,9 +206,19 @@ async def startup_event():
 
     if check_indexes_exist():
         logger.info("Indexes found, ready to serve")
+        try:
+            get_suggestion_index()
+        except Exception as e:
+            logger.warning(f"Suggestion index unavailable: {e}")
     else:
         logger.warning("Indexes not found, will build automatically on first request")
 
+    if settings.ENABLE_INTENT_GATE and settings.INTENT_GATE_CENTROIDS:
+        try:
+            load_centroids()
+        except Exception as e:
+            logger.warning(f"Intent gate centroids unavailable: {e}")
+
 
 @app.on_event("shutdown")
 async def shutdown_event():
@@ -134,7 +232,7 @@ async def shutdown_event():
 @app.get("/")
 async def root():
     try:
-        return FileResponse("frontend/index.html")
+        return FileResponse("frontend/index.html", headers={"Cache-Control": "no-cache"})
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Frontend files not found")
 
@@ -170,8 +268,20 @@ async def get_system_status(request: Request):
             device_info=device_info,
             reranker_info=reranker_info,
             hybrid_search_info=hybrid_search_info,
+            faq_fast_path_info=get_faq_fast_path_info(),
+            query_rewrite_info=get_query_rewrite_info(),
+            tracing_info=get_tracing_info(),
+            llm_info=get_llm_info(),
+            admission_info=get_admission_stats(),
+            degradation_info=get_degradation_info(),
+            query_classifier_info=get_query_classifier_info(),
+            intent_gate_info=get_intent_gate_info(),
+            speculation_info=get_speculation_info(),
             indexing_available=index_files_exist,
             cache_stats=cache_stats,
+            conversation_store_info=(
+                get_conversation_store().get_stats() if settings.ENABLE_CONVERSATION_STORE else {"enabled": False}
+            ),
             message="Hệ thống chatbot hoạt động bình thường",
             environment=settings.APP_ENV
         )
@@ -191,12 +301,29 @@ async def chat_stream(request: ChatRequest, req: Request):
 
     trace_id = get_trace_id(req)
 
+    if settings.ENABLE_RATE_LIMIT:
+        # The sqlite bucket store takes a write lock with a busy timeout; keep it off the event loop
+        await asyncio.to_thread(get_rate_limiter().check, get_client_id(req))
+
+    slot = await stream_limiter.acquire() if settings.ENABLE_ADMISSION_CONTROL else None
+
     try:
         query = request.query.strip()
         conversation_id = request.conversation_id or "unknown"
+        chat_history = [msg.dict() for msg in request.chat_history]
+
+        store = None
+        # Stored history is namespaced by client so a guessed conversation_id cannot read or overwrite it
+        store_key = f"{get_client_id(req)}:{request.conversation_id}"
+        if settings.ENABLE_CONVERSATION_STORE and request.conversation_id:
+            store = get_conversation_store()
+            if not chat_history:
+                chat_history = await asyncio.to_thread(store.get_history, store_key) or []
+
         logger.info(
             f"Streaming chat request: '{query[:100]}...' "
-            f"(conversation: {conversation_id}, history: {len(request.chat_history)} msgs)",
+            f"(conversation: {conversation_id}, history: {len(chat_history)} msgs"
+            f"{', from store' if store is not None and not request.chat_history else ''})",
             extra={"trace_id": trace_id, "conversation_id": conversation_id}
         )
 
@@ -205,42 +332,84 @@ async def chat_stream(request: ChatRequest, req: Request):
             build_index()
             logger.info("Index built successfully", extra={"trace_id": trace_id})
 
-        async def event_generator():
+        profiled = profiler.requests_armed and profiler.request_started()
+        policy = get_degradation_controller().current_policy()
+        speculation_key = (get_client_id(req), request.conversation_id) if request.conversation_id else None
+
+        async def answer_chunks():
+            answer_parts = []
             try:
-                for chunk in get_answer_stream(
+                async for chunk in iterate_in_thread(get_answer_stream(
                     query=query,
-                    chat_history=[msg.dict() for msg in request.chat_history],
+                    chat_history=chat_history,
                     k=settings.TOP_K_DEFAULT,
                     temperature=settings.LLM_TEMPERATURE,
-                    max_tokens=settings.LLM_MAX_TOKENS
-                ):
-                    chunk["trace_id"] = trace_id
-                    chunk["success"] = True
-
-                    yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+                    max_tokens=settings.LLM_MAX_TOKENS,
+                    policy=policy,
+                    speculation_key=speculation_key
+                )):
+                    if store is not None:
+                        if chunk["type"] == "metadata":
+                            chunk = {**chunk, "conversation_store": True, "stored_messages": len(chat_history)}
+                        elif chunk["type"] == "content":
+                            answer_parts.append(chunk["content"])
+                        elif chunk["type"] == "done" and answer_parts:
+                            await asyncio.to_thread(
+                                store.record_turn, store_key, query, "".join(answer_parts),
+                                history=chat_history if request.chat_history else None
+                            )
+
+                    yield chunk
 
             except Exception as e:
                 logger.error(f"Error in streaming generation: {str(e)}",
                              exc_info=True, extra={"trace_id": trace_id})
-                error_chunk = {
+                yield {
                     "type": "error",
                     "error": str(e) if settings.DEBUG else "Lỗi xử lý yêu cầu",
-                    "trace_id": trace_id,
                     "success": False
                 }
-                yield f"data: {json.dumps(error_chunk, ensure_ascii=False)}\n\n"
 
-        return StreamingResponse(
-            event_generator(),
+        async def event_generator():
+            stream_start = time.monotonic()
+            try:
+                async for frame in SSEEncoder(trace_id).stream(answer_chunks()):
+                    yield frame
+
+            except (asyncio.CancelledError, GeneratorExit):
+                metrics = get_metrics()
+                metrics.increment("chat.abandoned")
+                metrics.observe("chat.abandoned_after_s", time.monotonic() - stream_start)
+                logger.info("Client disconnected, answer generation cancelled", extra={"trace_id": trace_id})
+                raise
+
+        headers = {
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+            "X-Accel-Buffering": "no",
+            "Vary": "Accept-Encoding",
+            "X-Degradation-Tier": str(policy.tier)
+        }
+        compress = wants_gzip(req)
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+
+        def release():
+            if slot is not None:
+                slot.release()
+            if profiled:
+                profiler.request_finished()
+
+        return ClosingStreamingResponse(
+            encode_stream(event_generator(), compress),
             media_type="text/event-stream",
-            headers={
-                "Cache-Control": "no-cache",
-                "Connection": "keep-alive",
-                "X-Accel-Buffering": "no"
-            }
+            headers=headers,
+            on_close=release
         )
 
     except Exception as e:
+        if slot is not None:
+            slot.release()
         logger.error(f"Error processing streaming chat request: {str(e)}",
                      exc_info=True, extra={"trace_id": trace_id})
         raise HTTPException(
@@ -249,6 +418,51 @@ async def event_generator():
         )
 
 
+@app.post("/api/chat/prepare")
+async def chat_prepare(request: PrepareRequest, req: Request):
+    if not check_indexes_exist():
+        return {"status": "unavailable"}
+
+    client_id = get_client_id(req)
+    if settings.ENABLE_RATE_LIMIT:
+        # Separate bucket at the same rate, so typing does not use up the client's chat requests
+        await asyncio.to_thread(get_rate_limiter().check, f"prepare:{client_id}")
+
+    status = prepare_retrieval(client_id, request.conversation_id, request.query.strip())
+    return {"status": status}
+
+
+@app.post("/api/search/batch", dependencies=[Depends(require_batch_search)])
+async def batch_search(batch_request: BatchSearchRequest, req: Request):
+    trace_id = get_trace_id(req)
+    queries = batch_request.queries
+    k = batch_request.k or settings.TOP_K_DEFAULT
+
+    logger.info(f"Batch search request: {len(queries)} queries, k={k}", extra={"trace_id": trace_id})
+
+    if not check_indexes_exist():
+        raise HTTPException(status_code=503, detail="Index chưa được xây dựng")
+
+    def result_lines():
+        chunk_size = settings.BATCH_SEARCH_CHUNK_SIZE
+        for start in range(0, len(queries), chunk_size):
+            chunk = queries[start:start + chunk_size]
+            try:
+                results = search_rag_batch(chunk, k)
+            except Exception as e:
+                logger.error(f"Batch search failed for queries {start}-{start + len(chunk) - 1}: {e}",
+                             exc_info=True, extra={"trace_id": trace_id})
+                error = str(e) if settings.DEBUG else "Lỗi xử lý yêu cầu"
+                for i, query in enumerate(chunk, start):
+                    yield dumps({"index": i, "query": query, "error": error}) + b"\n"
+                continue
+
+            for i, (query, contexts) in enumerate(zip(chunk, results), start):
+                yield dumps({"index": i, "query": query, "contexts": contexts}) + b"\n"
+
+    return StreamingResponse(result_lines(), media_type="application/x-ndjson")
+
+
 @app.post("/api/build")
 async def build_index_endpoint(request: Request, build_request: BuildIndexRequest = BuildIndexRequest()):
     trace_id = get_trace_id(request)
@@ -290,6 +504,11 @@ async def get_cache_stats(request: Request):
     return cache.get_stats()
 
 
+@app.get("/api/metrics")
+async def get_metrics_snapshot():
+    return get_metrics().snapshot()
+
+
 @app.post("/api/cache/clear")
 async def clear_cache(request: Request):
     trace_id = get_trace_id(request)
@@ -308,7 +527,18 @@ async def clear_cache(request: Request):
 
 
 @app.get("/api/suggestions")
-async def get_suggestions():
+async def get_suggestions(
+    q: str = Query(default="", max_length=200),
+    limit: int = Query(default=settings.SUGGESTIONS_LIMIT, ge=1, le=20)
+):
+    if q.strip():
+        items = [{"text": e["text"], "type": e["type"], "href": e["href"]} for e in suggest(q, limit)]
+        return {
+            "suggestions": [item["text"] for item in items],
+            "items": items,
+            "message": "Gợi ý theo nội dung đang nhập"
+        }
+
     suggestions = [
         "Hướng dẫn đăng ký tài khoản công dân",
         "Cách thanh toán tiền điện trực tuyến",
@@ -328,6 +558,92 @@ async def get_suggestions():
     }
 
 
+@app.post("/api/admin/profile/cpu", dependencies=[Depends(require_admin)])
+async def start_cpu_profile(profile_request: CPUProfileRequest, format: str = "folded"):
+    try:
+        profiler.start(
+            seconds=profile_request.seconds,
+            requests=profile_request.requests,
+            interval_ms=profile_request.interval_ms
+        )
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    if profile_request.requests:
+        return JSONResponse(status_code=202, content=profiler.get_status())
+
+    while profiler.running:
+        await asyncio.sleep(0.1)
+
+    return _cpu_profile_response(format)
+
+
+@app.get("/api/admin/profile/cpu", dependencies=[Depends(require_admin)])
+async def get_cpu_profile(format: str = "json"):
+    return _cpu_profile_response(format)
+
+
+@app.post("/api/admin/profile/cpu/stop", dependencies=[Depends(require_admin)])
+async def stop_cpu_profile(format: str = "folded"):
+    await asyncio.to_thread(profiler.stop)
+    return _cpu_profile_response(format)
+
+
+def _cpu_profile_response(format: str):
+    if format == "folded":
+        return PlainTextResponse(profiler.folded())
+
+    return {
+        "status": profiler.get_status(),
+        "folded": profiler.folded()
+    }
+
+
+@app.post("/api/admin/profile/memory/start", dependencies=[Depends(require_admin)])
+async def start_memory_profile(profile_request: MemoryProfileRequest = MemoryProfileRequest()):
+    try:
+        start_memory_tracing(profile_request.frames)
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    return get_memory_status()
+
+
+@app.get("/api/admin/profile/memory", dependencies=[Depends(require_admin)])
+async def get_memory_profile(limit: int = 25, group_by: str = "lineno", format: str = "json"):
+    if group_by not in ("lineno", "filename", "traceback"):
+        raise HTTPException(status_code=400, detail="group_by phải là lineno, filename hoặc traceback")
+
+    try:
+        if format == "folded":
+            return PlainTextResponse(memory_folded())
+        return memory_top_stats(limit=limit, group_by=group_by)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.post("/api/admin/profile/memory/stop", dependencies=[Depends(require_admin)])
+async def stop_memory_profile():
+    stop_memory_tracing()
+    return get_memory_status()
+
+
+@app.exception_handler(AdmissionRejected)
+async def admission_rejected_handler(request: Request, exc: AdmissionRejected):
+    logger.warning(f"Request rejected by admission control: status={exc.status_code} "
+                   f"retry_after={exc.retry_after:.1f}s path={request.url.path}")
+
+    return JSONResponse(
+        status_code=exc.status_code,
+        headers=exc.headers,
+        content={
+            "error": exc.reason,
+            "retry_after": exc.headers["Retry-After"],
+            "trace_id": get_trace_id(request)
+        }
+    )
+
+
 @app.exception_handler(404)
 async def not_found_handler(request: Request, exc):
     return JSONResponse(
@@ -1,93 +1,356 @@
+import copy
 import hashlib
+import json
 import logging
+import os
+import sqlite3
+import threading
 import time
+import zlib
+from collections import OrderedDict
 from typing import Optional, Dict, Any
-from functools import lru_cache
 from config import settings
+from metrics import get_metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
 
+def _json_default(value):
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def serialize(data: Any) -> bytes:
+    if orjson is not None:
+        raw = orjson.dumps(data, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        raw = json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+    if len(raw) >= settings.CACHE_COMPRESS_THRESHOLD:
+        return b"z" + zlib.compress(raw, 6)
+    return b"j" + raw
+
+
+def deserialize(blob: bytes) -> Any:
+    marker, body = blob[:1], blob[1:]
+    if marker == b"z":
+        body = zlib.decompress(body)
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+class MemoryCacheBackend:
+    name = "memory"
+    shared = False
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._generation = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["expires"] <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            entry["hits"] += 1
+            data = entry["data"]
+        # Callers get their own copy, like the shared backends that deserialize on every get
+        return copy.deepcopy(data)
+
+    def set(self, key: str, data: Any, ttl: float) -> None:
+        now = time.time()
+        data = copy.deepcopy(data)
+        with self._lock:
+            self._entries[key] = {"data": data, "timestamp": now, "expires": now + ttl, "hits": 0}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                evicted, _ = self._entries.popitem(last=False)
+                logger.debug("Cache EVICT: key=%s... (cache full)", evicted[:8])
+
+    def get_generation(self) -> int:
+        return self._generation
+
+    def bump_generation(self) -> int:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+            return self._generation
+
+    def size(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        now = time.time()
+        with self._lock:
+            items = list(self._entries.items())
+        return {
+            "total_hits": sum(entry["hits"] for _, entry in items),
+            "entries": [
+                {"key": key[:8] + "...", "age": now - entry["timestamp"], "hits": entry["hits"]}
+                for key, entry in items[-10:]
+            ]
+        }
+
+
+class SQLiteCacheBackend:
+    name = "sqlite"
+    shared = True
+
+    def __init__(self, path: str, max_size: int):
+        self.path = path
+        self.max_size = max_size
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "key TEXT PRIMARY KEY, value BLOB NOT NULL, created REAL NOT NULL, expires REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_cache_created ON cache_entries(created)")
+        conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        conn.execute("INSERT OR IGNORE INTO cache_meta (name, value) VALUES ('generation', 0)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._connect().execute(
+            "SELECT value FROM cache_entries WHERE key = ? AND expires > ?", (key, time.time())
+        ).fetchone()
+        return deserialize(row[0]) if row else None
+
+    def set(self, key: str, data: Any, ttl: float) -> None:
+        now = time.time()
+        conn = self._connect()
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_entries (key, value, created, expires) VALUES (?, ?, ?, ?)",
+            (key, serialize(data), now, now + ttl)
+        )
+
+        self._writes += 1
+        if self._writes % 100 == 0:
+            conn.execute("DELETE FROM cache_entries WHERE expires <= ?", (now,))
+            conn.execute(
+                "DELETE FROM cache_entries WHERE key IN ("
+                "SELECT key FROM cache_entries ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.max_size,)
+            )
+
+    def get_generation(self) -> int:
+        row = self._connect().execute("SELECT value FROM cache_meta WHERE name = 'generation'").fetchone()
+        return int(row[0]) if row else 0
+
+    def bump_generation(self) -> int:
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("UPDATE cache_meta SET value = value + 1 WHERE name = 'generation'")
+            conn.execute("DELETE FROM cache_entries")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self.get_generation()
+
+    def size(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"path": self.path}
+
+
+class RedisCacheBackend:
+    name = "redis"
+    shared = True
+
+    def __init__(self, url: str, prefix: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("CACHE_BACKEND=redis requires the 'redis' package (pip install 'redis>=5')")
+
+        self.prefix = prefix
+        self.client = redis.Redis.from_url(
+            url,
+            protocol=2,
+            socket_timeout=settings.CACHE_REDIS_TIMEOUT,
+            socket_connect_timeout=settings.CACHE_REDIS_TIMEOUT
+        )
+        self._generation_key = f"{prefix}generation"
+
+    def get(self, key: str) -> Optional[Any]:
+        blob = self.client.get(self.prefix + key)
+        return deserialize(blob) if blob is not None else None
+
+    def set(self, key: str, data: Any, ttl: float) -> None:
+        self.client.set(self.prefix + key, serialize(data), px=max(1, int(ttl * 1000)))
+
+    def get_generation(self) -> int:
+        value = self.client.get(self._generation_key)
+        return int(value) if value is not None else 0
+
+    def bump_generation(self) -> int:
+        return int(self.client.incr(self._generation_key))
+
+    def size(self) -> int:
+        # The database may be shared, so count only our keys from the current generation (not dbsize)
+        keys = self.client.scan_iter(match=f"{self.prefix}{self.get_generation()}:*", count=1000)
+        return sum(1 for _ in keys)
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {"prefix": self.prefix}
+
+
+def _build_backend(max_size: int):
+    if settings.CACHE_BACKEND == "sqlite":
+        return SQLiteCacheBackend(settings.CACHE_SQLITE_PATH, max_size)
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCacheBackend(settings.CACHE_REDIS_URL, settings.CACHE_REDIS_PREFIX)
+    if settings.CACHE_BACKEND != "memory":
+        logger.warning(f"Unknown cache backend: {settings.CACHE_BACKEND}, using memory")
+    return MemoryCacheBackend(max_size)
+
+
 class QueryCache:
-    def __init__(self, max_size: int = None, ttl: int = None):
+    def __init__(self, max_size: int = None, ttl: int = None, backend=None):
         self.max_size = max_size or settings.CACHE_MAX_SIZE
         self.ttl = ttl or settings.CACHE_TTL
-        self.cache: Dict[str, Dict[str, Any]] = {}
         self.enabled = settings.ENABLE_CACHE
+        self.backend = backend or _build_backend(self.max_size)
+
+        self.local = None
+        if self.backend.shared and settings.CACHE_LOCAL_TIER_SIZE > 0:
+            self.local = MemoryCacheBackend(settings.CACHE_LOCAL_TIER_SIZE)
+
+        self._generation = 0
+        self._generation_checked_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.errors = 0
 
         logger.info(
-            f"QueryCache initialized: enabled={self.enabled}, "
-            f"max_size={self.max_size}, ttl={self.ttl}s"
+            f"QueryCache initialized: enabled={self.enabled}, backend={self.backend.name}, "
+            f"max_size={self.max_size}, ttl={self.ttl}s, local_tier={bool(self.local)}"
         )
 
     def _generate_key(self, query: str, k: int = None, **kwargs) -> str:
-        normalized_query = query.strip().lower()
+        normalized_query = cache_key_normalizer(query)
 
         cache_str = f"{normalized_query}|k={k}|{sorted(kwargs.items())}"
 
         return hashlib.md5(cache_str.encode()).hexdigest()
 
+    def _current_generation(self) -> int:
+        now = time.monotonic()
+        if now - self._generation_checked_at >= settings.CACHE_INVALIDATION_CHECK_INTERVAL:
+            generation = self.backend.get_generation()
+            if generation != self._generation:
+                if self.local is not None:
+                    self.local.bump_generation()
+                logger.info(f"Cache generation changed {self._generation} -> {generation}, local tier dropped")
+                self._generation = generation
+            self._generation_checked_at = now
+        return self._generation
+
     def get(self, query: str, k: int = None, **kwargs) -> Optional[Dict[str, Any]]:
         if not self.enabled:
             return None
 
-        cache_key = self._generate_key(query, k, **kwargs)
+        try:
+            cache_key = f"{self._current_generation()}:{self._generate_key(query, k, **kwargs)}"
 
-        if cache_key in self.cache:
-            entry = self.cache[cache_key]
+            data = self.local.get(cache_key) if self.local is not None else None
+            if data is None:
+                data = self.backend.get(cache_key)
+                if data is not None and self.local is not None:
+                    self.local.set(cache_key, data, self.ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache GET failed on {self.backend.name} backend: {e}")
+            return None
 
-            age = time.time() - entry["timestamp"]
-            if age < self.ttl:
-                logger.debug(f"Cache HIT: key={cache_key[:8]}... age={age:.1f}s")
-                entry["hits"] += 1
-                return entry["data"]
-            else:
-                logger.debug(f"Cache EXPIRED: key={cache_key[:8]}... age={age:.1f}s")
-                del self.cache[cache_key]
+        kind = kwargs.get("kind", "default")
+        if data is not None:
+            self.hits += 1
+            get_metrics().increment(f"cache.{kind}.hits")
+            logger.debug("Cache HIT: key=%s...", cache_key[:12])
+            return data
 
-        logger.debug(f"Cache MISS: key={cache_key[:8]}...")
+        self.misses += 1
+        get_metrics().increment(f"cache.{kind}.misses")
+        logger.debug("Cache MISS: key=%s...", cache_key[:12])
         return None
 
     def set(self, query: str, data: Dict[str, Any], k: int = None, **kwargs) -> None:
         if not self.enabled:
             return
 
-        cache_key = self._generate_key(query, k, **kwargs)
-
-        if len(self.cache) >= self.max_size:
-            oldest_key = min(self.cache.keys(), key=lambda k: self.cache[k]["timestamp"])
-            logger.debug(f"Cache EVICT: key={oldest_key[:8]}... (cache full)")
-            del self.cache[oldest_key]
-
-        self.cache[cache_key] = {
-            "data": data,
-            "timestamp": time.time(),
-            "hits": 0
-        }
+        try:
+            cache_key = f"{self._current_generation()}:{self._generate_key(query, k, **kwargs)}"
+            self.backend.set(cache_key, data, self.ttl)
+            if self.local is not None:
+                self.local.set(cache_key, data, self.ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.warning(f"Cache SET failed on {self.backend.name} backend: {e}")
+            return
 
-        logger.debug(f"Cache SET: key={cache_key[:8]}... size={len(self.cache)}")
+        logger.debug("Cache SET: key=%s...", cache_key[:12])
 
     def clear(self) -> None:
-        self.cache.clear()
-        logger.info("Cache cleared")
+        try:
+            self._generation = self.backend.bump_generation()
+        except Exception as e:
+            self.errors += 1
+            logger.error(f"Cache CLEAR failed on {self.backend.name} backend: {e}")
+            raise
+        self._generation_checked_at = time.monotonic()
+        if self.local is not None:
+            self.local.bump_generation()
+        logger.info(f"Cache cleared (generation {self._generation}, backend={self.backend.name})")
 
     def get_stats(self) -> Dict[str, Any]:
-        total_hits = sum(entry["hits"] for entry in self.cache.values())
+        lookups = self.hits + self.misses
+
+        try:
+            size = self.backend.size()
+        except Exception as e:
+            logger.warning(f"Cache size unavailable: {e}")
+            size = None
 
         return {
             "enabled": self.enabled,
-            "size": len(self.cache),
+            "backend": self.backend.name,
+            "shared": self.backend.shared,
+            "size": size,
+            "local_tier_size": self.local.size() if self.local is not None else None,
             "max_size": self.max_size,
             "ttl": self.ttl,
-            "total_hits": total_hits,
-            "entries": [
-                {
-                    "key": key[:8] + "...",
-                    "age": time.time() - entry["timestamp"],
-                    "hits": entry["hits"]
-                }
-                for key, entry in list(self.cache.items())[:10]
-            ]
+            "generation": self._generation,
+            "hits": self.hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            **self.backend.get_stats()
         }
 
 
@@ -0,0 +1,70 @@
+import logging
+import threading
+from contextvars import ContextVar
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class RequestCancelled(Exception):
+    pass
+
+
+class CancelScope:
+    def __init__(self):
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._callbacks: List[Callable[[], None]] = []
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def cancel(self) -> None:
+        with self._lock:
+            if self._event.is_set():
+                return
+            self._event.set()
+            callbacks, self._callbacks = self._callbacks, []
+
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.warning(f"Cancellation callback failed: {e}")
+
+    def add_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(callback)
+                return
+        callback()
+
+    def remove_callback(self, callback: Callable[[], None]) -> None:
+        with self._lock:
+            if callback in self._callbacks:
+                self._callbacks.remove(callback)
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        return self._event.wait(timeout)
+
+    def raise_if_cancelled(self) -> None:
+        if self._event.is_set():
+            raise RequestCancelled("Request cancelled by client")
+
+
+_current_scope: ContextVar[Optional[CancelScope]] = ContextVar("cancel_scope", default=None)
+
+
+def get_cancel_scope() -> Optional[CancelScope]:
+    return _current_scope.get()
+
+
+def bind_cancel_scope(scope: Optional[CancelScope]):
+    return _current_scope.set(scope)
+
+
+def raise_if_cancelled() -> None:
+    scope = _current_scope.get()
+    if scope is not None:
+        scope.raise_if_cancelled()
@@ -1,6 +1,9 @@
 def chunk_faq(faq_list):
     return [
-        {"text": f"Câu hỏi: {item['question']}\nTrả lời: {item['answer']}\nĐường dẫn: {item['href']}", "metadata": {"type": "faq"}}
+        {
+            "text": f"Câu hỏi: {item['question']}\nTrả lời: {item['answer']}\nĐường dẫn: {item['href']}",
+            "metadata": {"type": "faq", "title": item["question"], "href": item["href"]}
+        }
         for item in faq_list
     ]
 
@@ -9,7 +12,7 @@ def chunk_guide(guide_list):
     return [
         {
             "text": f"Tiêu đề: {item['title']}\nNội dung: {item['content']}\nĐường dẫn: {item['href']}",
-            "metadata": {"type": "guide"}
+            "metadata": {"type": "guide", "title": item["title"], "href": item["href"]}
         }
         for item in guide_list
     ]
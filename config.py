@@ -62,6 +62,42 @@ def get_allowed_origins():
     LLM_TIMEOUT: int = int(os.getenv("LLM_TIMEOUT", "60"))
     LLM_REASONING_EFFORT: str = os.getenv("LLM_REASONING_EFFORT", "medium")
     LLM_STREAM: bool = os.getenv("LLM_STREAM", "True").lower() == "true"
+    LLM_CONNECT_TIMEOUT: float = float(os.getenv("LLM_CONNECT_TIMEOUT", "5"))
+    LLM_FIRST_TOKEN_TIMEOUT: float = float(os.getenv("LLM_FIRST_TOKEN_TIMEOUT", "20"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_RETRY_BACKOFF_BASE: float = float(os.getenv("LLM_RETRY_BACKOFF_BASE", "0.5"))
+    LLM_RETRY_BACKOFF_MAX: float = float(os.getenv("LLM_RETRY_BACKOFF_MAX", "8"))
+    LLM_POOL_MAX_CONNECTIONS: int = int(os.getenv("LLM_POOL_MAX_CONNECTIONS", "100"))
+    LLM_POOL_MAX_KEEPALIVE: int = int(os.getenv("LLM_POOL_MAX_KEEPALIVE", "20"))
+    LLM_POOL_KEEPALIVE_EXPIRY: float = float(os.getenv("LLM_POOL_KEEPALIVE_EXPIRY", "30"))
+    LLM_ENABLE_HEDGING: bool = os.getenv("LLM_ENABLE_HEDGING", "False").lower() == "true"
+    LLM_HEDGE_PERCENTILE: float = float(os.getenv("LLM_HEDGE_PERCENTILE", "95"))
+    LLM_HEDGE_MIN_DELAY: float = float(os.getenv("LLM_HEDGE_MIN_DELAY", "1.0"))
+    LLM_HEDGE_INITIAL_DELAY: float = float(os.getenv("LLM_HEDGE_INITIAL_DELAY", "3.0"))
+    LLM_HEDGE_MIN_SAMPLES: int = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+    LLM_CIRCUIT_FAILURE_THRESHOLD: int = int(os.getenv("LLM_CIRCUIT_FAILURE_THRESHOLD", "5"))
+    LLM_CIRCUIT_RESET_TIMEOUT: float = float(os.getenv("LLM_CIRCUIT_RESET_TIMEOUT", "30"))
+
+    LLM_BACKENDS: str = os.getenv("LLM_BACKENDS", "groq")
+    LLM_ROUTING_STRATEGY: str = os.getenv("LLM_ROUTING_STRATEGY", "priority").lower()
+    LLM_ROUTING_COST_WEIGHT: float = float(os.getenv("LLM_ROUTING_COST_WEIGHT", "0.5"))
+    GROQ_COST_PER_1M_TOKENS: float = float(os.getenv("GROQ_COST_PER_1M_TOKENS", "0.75"))
+
+    OPENAI_COMPAT_BASE_URL: str = os.getenv("OPENAI_COMPAT_BASE_URL", "http://localhost:8001/v1")
+    OPENAI_COMPAT_API_KEY: Optional[str] = os.getenv("OPENAI_COMPAT_API_KEY")
+    OPENAI_COMPAT_MODEL: Optional[str] = os.getenv("OPENAI_COMPAT_MODEL")
+    OPENAI_COMPAT_COST_PER_1M_TOKENS: float = float(os.getenv("OPENAI_COMPAT_COST_PER_1M_TOKENS", "0"))
+    OPENAI_COMPAT_SEND_REASONING_EFFORT: bool = os.getenv(
+        "OPENAI_COMPAT_SEND_REASONING_EFFORT", "False"
+    ).lower() == "true"
+
+    LLM_STUB_RESPONSE: str = os.getenv(
+        "LLM_STUB_RESPONSE",
+        "Đây là câu trả lời mẫu từ máy chủ giả lập dùng cho kiểm thử hiệu năng. "
+        "Vui lòng truy cập https://dichvucong.gov.vn/ hoặc gọi tổng đài 18001096 để được hỗ trợ."
+    )
+    LLM_STUB_FIRST_TOKEN_DELAY_MS: float = float(os.getenv("LLM_STUB_FIRST_TOKEN_DELAY_MS", "200"))
+    LLM_STUB_TOKEN_DELAY_MS: float = float(os.getenv("LLM_STUB_TOKEN_DELAY_MS", "20"))
 
     EMBEDDING_MODEL: str = os.getenv(
         "EMBEDDING_MODEL",
@@ -69,6 +105,7 @@ def get_allowed_origins():
     )
     EMBEDDING_BATCH_SIZE: int = int(os.getenv("EMBEDDING_BATCH_SIZE", "32"))
     EMBEDDING_DEVICE: str = os.getenv("EMBEDDING_DEVICE", "auto")
+    QUERY_EMBEDDING_CACHE_MB: float = float(os.getenv("QUERY_EMBEDDING_CACHE_MB", "32"))
 
     ENABLE_RERANKING: bool = os.getenv("ENABLE_RERANKING", "True").lower() == "true"
     RERANKING_MODEL: str = os.getenv(
@@ -77,6 +114,11 @@ def get_allowed_origins():
     )
     RERANKING_TOP_K: int = int(os.getenv("RERANKING_TOP_K", "5"))
     INITIAL_RETRIEVAL_MULTIPLIER: int = int(os.getenv("INITIAL_RETRIEVAL_MULTIPLIER", "3"))
+    RERANK_CANDIDATES: int = int(os.getenv("RERANK_CANDIDATES", "20"))
+    ENABLE_ADAPTIVE_RERANK: bool = os.getenv("ENABLE_ADAPTIVE_RERANK", "False").lower() == "true"
+    ADAPTIVE_RERANK_MIN: int = int(os.getenv("ADAPTIVE_RERANK_MIN", "5"))
+    ADAPTIVE_RERANK_SCORE_RATIO: float = float(os.getenv("ADAPTIVE_RERANK_SCORE_RATIO", "0.5"))
+    RERANK_BATCH_SIZE: int = int(os.getenv("RERANK_BATCH_SIZE", "64"))
 
     ENABLE_HYBRID_SEARCH: bool = os.getenv("ENABLE_HYBRID_SEARCH", "True").lower() == "true"
     HYBRID_FUSION_METHOD: str = os.getenv("HYBRID_FUSION_METHOD", "rrf")
@@ -84,9 +126,24 @@ def get_allowed_origins():
     VECTOR_WEIGHT: float = float(os.getenv("VECTOR_WEIGHT", "0.5"))
     BM25_RETRIEVAL_MULTIPLIER: int = int(os.getenv("BM25_RETRIEVAL_MULTIPLIER", "2"))
     BM25_INDEX_PATH: str = _resolve_path("BM25_INDEX_PATH", "embeddings/bm25_index.pkl")
+    BM25_FOLD_DIACRITICS: bool = os.getenv("BM25_FOLD_DIACRITICS", "True").lower() == "true"
+    BM25_BIGRAMS: bool = os.getenv("BM25_BIGRAMS", "True").lower() == "true"
+    BM25_STOPWORDS: bool = os.getenv("BM25_STOPWORDS", "True").lower() == "true"
+    RETRIEVAL_VECTOR_DEPTH: int = int(os.getenv("RETRIEVAL_VECTOR_DEPTH", "0"))
+    RETRIEVAL_BM25_DEPTH: int = int(os.getenv("RETRIEVAL_BM25_DEPTH", "0"))
+    ENABLE_FAQ_FAST_PATH: bool = os.getenv("ENABLE_FAQ_FAST_PATH", "True").lower() == "true"
+    FAQ_FAST_PATH_MIN_SIMILARITY: float = float(os.getenv("FAQ_FAST_PATH_MIN_SIMILARITY", "0.92"))
+    FAQ_FAST_PATH_MIN_BM25_RATIO: float = float(os.getenv("FAQ_FAST_PATH_MIN_BM25_RATIO", "0.8"))
+    ENABLE_PARALLEL_RETRIEVAL: bool = os.getenv("ENABLE_PARALLEL_RETRIEVAL", "True").lower() == "true"
+    RETRIEVAL_WORKERS: int = int(os.getenv("RETRIEVAL_WORKERS", "4"))
 
     INDEX_PATH: str = _resolve_path("INDEX_PATH", "embeddings/faiss_index.bin")
     METADATA_PATH: str = _resolve_path("METADATA_PATH", "embeddings/metadata.pkl")
+    FAQ_INDEX_PATH: str = _resolve_path("FAQ_INDEX_PATH", "embeddings/faq_index.bin")
+    FAQ_METADATA_PATH: str = _resolve_path("FAQ_METADATA_PATH", "embeddings/faq_metadata.pkl")
+    SUGGESTIONS_INDEX_PATH: str = _resolve_path("SUGGESTIONS_INDEX_PATH", "embeddings/suggestions.json")
+    SUGGESTIONS_QUERY_LOG: str = os.getenv("SUGGESTIONS_QUERY_LOG", "")
+    SUGGESTIONS_LIMIT: int = int(os.getenv("SUGGESTIONS_LIMIT", "8"))
     EMBEDDINGS_DIR: str = str(BASE_DIR / "embeddings")
 
     SIMILARITY_THRESHOLD: float = float(os.getenv("SIMILARITY_THRESHOLD", "1.2"))
@@ -103,6 +160,15 @@ def get_allowed_origins():
     ENABLE_CACHE: bool = os.getenv("ENABLE_CACHE", "True").lower() == "true"
     CACHE_MAX_SIZE: int = int(os.getenv("CACHE_MAX_SIZE", "1000"))
     CACHE_TTL: int = int(os.getenv("CACHE_TTL", "3600"))
+    CACHE_BACKEND: str = os.getenv("CACHE_BACKEND", "memory").lower()
+    CACHE_SQLITE_PATH: str = _resolve_path("CACHE_SQLITE_PATH", "state/cache.sqlite3")
+    CACHE_REDIS_URL: str = os.getenv("CACHE_REDIS_URL", "redis://localhost:6379/0")
+    CACHE_REDIS_PREFIX: str = os.getenv("CACHE_REDIS_PREFIX", "chatbot:cache:")
+    CACHE_REDIS_TIMEOUT: float = float(os.getenv("CACHE_REDIS_TIMEOUT", "0.5"))
+    CACHE_LOCAL_TIER_SIZE: int = int(os.getenv("CACHE_LOCAL_TIER_SIZE", "256"))
+    CACHE_INVALIDATION_CHECK_INTERVAL: float = float(os.getenv("CACHE_INVALIDATION_CHECK_INTERVAL", "1.0"))
+    CACHE_COMPRESS_THRESHOLD: int = int(os.getenv("CACHE_COMPRESS_THRESHOLD", "1024"))
+    CACHE_ANSWERS: bool = os.getenv("CACHE_ANSWERS", "True").lower() == "true"
 
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
     LOG_FORMAT: str = os.getenv(
@@ -110,21 +176,121 @@ def get_allowed_origins():
         "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
     )
     ENABLE_JSON_LOGGING: bool = os.getenv("ENABLE_JSON_LOGGING", "False").lower() == "true"
+    ENABLE_ASYNC_LOGGING: bool = os.getenv("ENABLE_ASYNC_LOGGING", "True").lower() == "true"
+    LOG_QUEUE_SIZE: int = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+    LOG_BATCH_SIZE: int = int(os.getenv("LOG_BATCH_SIZE", "256"))
+    LOG_SAMPLE_RATE: float = float(os.getenv("LOG_SAMPLE_RATE", "1.0"))
+
+    ENABLE_TRACING: bool = os.getenv("ENABLE_TRACING", "True").lower() == "true"
+    TRACING_SAMPLE_RATE: float = float(os.getenv("TRACING_SAMPLE_RATE", "0.1"))
+    TRACING_EXPORTER: str = os.getenv("TRACING_EXPORTER", "none").lower()
+    TRACING_EXPORT_PATH: str = _resolve_path("TRACING_EXPORT_PATH", "logs/traces.jsonl")
+    TRACING_OTLP_ENDPOINT: str = os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    TRACING_SERVICE_NAME: str = os.getenv("TRACING_SERVICE_NAME", "chatbot-dichvucong")
+    TRACING_SLOW_REQUEST_MS: float = float(os.getenv("TRACING_SLOW_REQUEST_MS", "5000"))
+
+    STATE_DIR: str = _resolve_path("STATE_DIR", "state")
 
     ENABLE_RATE_LIMIT: bool = os.getenv("ENABLE_RATE_LIMIT", "False").lower() == "true"
     RATE_LIMIT_PER_MINUTE: int = int(os.getenv("RATE_LIMIT_PER_MINUTE", "60"))
+    RATE_LIMIT_BURST: int = int(os.getenv("RATE_LIMIT_BURST", "10"))
+    RATE_LIMIT_STORE: str = os.getenv("RATE_LIMIT_STORE", "memory").lower()
+    RATE_LIMIT_SQLITE_PATH: str = _resolve_path("RATE_LIMIT_SQLITE_PATH", "state/ratelimit.sqlite3")
+    RATE_LIMIT_MAX_KEYS: int = int(os.getenv("RATE_LIMIT_MAX_KEYS", "10000"))
+    TRUST_PROXY_HEADERS: bool = os.getenv("TRUST_PROXY_HEADERS", "False").lower() == "true"
+
+    ENABLE_ADMISSION_CONTROL: bool = os.getenv("ENABLE_ADMISSION_CONTROL", "True").lower() == "true"
+    MAX_CONCURRENT_STREAMS: int = int(os.getenv("MAX_CONCURRENT_STREAMS", "16"))
+    ADMISSION_QUEUE_SIZE: int = int(os.getenv("ADMISSION_QUEUE_SIZE", "32"))
+    ADMISSION_QUEUE_TIMEOUT: float = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "5"))
+
+    ENABLE_DEGRADATION: bool = os.getenv("ENABLE_DEGRADATION", "True").lower() == "true"
+    DEGRADE_THRESHOLDS: str = os.getenv("DEGRADE_THRESHOLDS", "1.0,1.5,2.0,3.0")
+    DEGRADE_HYSTERESIS: float = float(os.getenv("DEGRADE_HYSTERESIS", "0.2"))
+    DEGRADE_MIN_DWELL_S: float = float(os.getenv("DEGRADE_MIN_DWELL_S", "15"))
+    DEGRADE_EVAL_INTERVAL_S: float = float(os.getenv("DEGRADE_EVAL_INTERVAL_S", "1"))
+    DEGRADE_CPU_HIGH: float = float(os.getenv("DEGRADE_CPU_HIGH", "1.0"))
+    DEGRADE_TTFT_HIGH_S: float = float(os.getenv("DEGRADE_TTFT_HIGH_S", "4"))
+    DEGRADE_REASONING_EFFORT: str = os.getenv("DEGRADE_REASONING_EFFORT", "low")
+    DEGRADE_MAX_TOKENS: int = int(os.getenv("DEGRADE_MAX_TOKENS", "2048"))
+
+    ENABLE_QUERY_CLASSIFIER: bool = os.getenv("ENABLE_QUERY_CLASSIFIER", "True").lower() == "true"
+    QUERY_CLASS_PROFILES: str = os.getenv(
+        "QUERY_CLASS_PROFILES",
+        "small_talk=low:256:0,out_of_scope=low:512:1,faq=low:1024:2"
+    )
+    QUERY_CLASS_SMALL_TALK_MAX_WORDS: int = int(os.getenv("QUERY_CLASS_SMALL_TALK_MAX_WORDS", "6"))
+    QUERY_CLASS_PROCEDURAL_MIN_WORDS: int = int(os.getenv("QUERY_CLASS_PROCEDURAL_MIN_WORDS", "25"))
+    QUERY_CLASS_FAQ_RERANK: float = float(os.getenv("QUERY_CLASS_FAQ_RERANK", "5.0"))
+    QUERY_CLASS_FAQ_SIMILARITY: float = float(os.getenv("QUERY_CLASS_FAQ_SIMILARITY", "0.8"))
+    QUERY_CLASS_OUT_OF_SCOPE_RERANK: float = float(os.getenv("QUERY_CLASS_OUT_OF_SCOPE_RERANK", "-5.0"))
+    QUERY_CLASS_OUT_OF_SCOPE_SIMILARITY: float = float(os.getenv("QUERY_CLASS_OUT_OF_SCOPE_SIMILARITY", "0.35"))
+
+    ENABLE_INTENT_GATE: bool = os.getenv("ENABLE_INTENT_GATE", "True").lower() == "true"
+    INTENT_GATE_INTENTS: str = os.getenv("INTENT_GATE_INTENTS", "greeting,thanks,goodbye,out_of_scope")
+    INTENT_GATE_CENTROIDS: bool = os.getenv("INTENT_GATE_CENTROIDS", "True").lower() == "true"
+    INTENT_GATE_MIN_SIMILARITY: float = float(os.getenv("INTENT_GATE_MIN_SIMILARITY", "0.8"))
+    INTENT_GATE_MARGIN: float = float(os.getenv("INTENT_GATE_MARGIN", "0.1"))
+    INTENT_GATE_KEYWORD_MAX_IN_SCOPE: float = float(os.getenv("INTENT_GATE_KEYWORD_MAX_IN_SCOPE", "0.6"))
+    INTENT_GATE_OUT_OF_SCOPE_KEYWORDS: str = os.getenv(
+        "INTENT_GATE_OUT_OF_SCOPE_KEYWORDS",
+        "thời tiết,bóng đá,xổ số,chứng khoán,bitcoin,tiền ảo,giá vàng,nấu ăn,viết code,làm thơ,kể chuyện cười"
+    )
+
+    ENABLE_SPECULATIVE_RETRIEVAL: bool = os.getenv("ENABLE_SPECULATIVE_RETRIEVAL", "True").lower() == "true"
+    SPECULATIVE_MIN_WORDS: int = int(os.getenv("SPECULATIVE_MIN_WORDS", "3"))
+    SPECULATIVE_MIN_OVERLAP: float = float(os.getenv("SPECULATIVE_MIN_OVERLAP", "0.75"))
+    SPECULATIVE_SESSION_BUDGET: int = int(os.getenv("SPECULATIVE_SESSION_BUDGET", "10"))
+    SPECULATIVE_BUDGET_WINDOW_S: float = float(os.getenv("SPECULATIVE_BUDGET_WINDOW_S", "60"))
+    SPECULATIVE_MAX_INFLIGHT: int = int(os.getenv("SPECULATIVE_MAX_INFLIGHT", "2"))
+    SPECULATIVE_MAX_SESSIONS: int = int(os.getenv("SPECULATIVE_MAX_SESSIONS", "1000"))
+    SPECULATIVE_TTL_S: float = float(os.getenv("SPECULATIVE_TTL_S", "60"))
+    SPECULATIVE_WAIT_S: float = float(os.getenv("SPECULATIVE_WAIT_S", "5"))
+
+    SSE_COALESCE_MS: float = float(os.getenv("SSE_COALESCE_MS", "20"))
+    SSE_COALESCE_BYTES: int = int(os.getenv("SSE_COALESCE_BYTES", "512"))
+    SSE_HEARTBEAT_S: float = float(os.getenv("SSE_HEARTBEAT_S", "15"))
+    SSE_SLIM_METADATA: bool = os.getenv("SSE_SLIM_METADATA", "True").lower() == "true"
+    SSE_COMPRESSION: bool = os.getenv("SSE_COMPRESSION", "True").lower() == "true"
+    SSE_COMPRESSION_LEVEL: int = int(os.getenv("SSE_COMPRESSION_LEVEL", "6"))
+    STATIC_IMMUTABLE_MAX_AGE: int = int(os.getenv("STATIC_IMMUTABLE_MAX_AGE", "31536000"))
 
     MAX_CHAT_HISTORY: int = int(os.getenv("MAX_CHAT_HISTORY", "10"))
     CONTEXT_WINDOW_MESSAGES: int = int(os.getenv("CONTEXT_WINDOW_MESSAGES", "5"))
 
+    QUERY_REWRITE_MODE: str = os.getenv("QUERY_REWRITE_MODE", "heuristic").lower()
+    QUERY_REWRITE_MODEL: Optional[str] = os.getenv("QUERY_REWRITE_MODEL")
+    QUERY_REWRITE_HISTORY_TURNS: int = int(os.getenv("QUERY_REWRITE_HISTORY_TURNS", "2"))
+    QUERY_REWRITE_MAX_TERMS: int = int(os.getenv("QUERY_REWRITE_MAX_TERMS", "8"))
+    QUERY_REWRITE_MAX_TOKENS: int = int(os.getenv("QUERY_REWRITE_MAX_TOKENS", "128"))
+    QUERY_REWRITE_TIMEOUT: int = int(os.getenv("QUERY_REWRITE_TIMEOUT", "5"))
+
+    ENABLE_CONVERSATION_STORE: bool = os.getenv("ENABLE_CONVERSATION_STORE", "False").lower() == "true"
+    CONVERSATION_STORE: str = os.getenv("CONVERSATION_STORE", "sqlite").lower()
+    CONVERSATION_SQLITE_PATH: str = _resolve_path("CONVERSATION_SQLITE_PATH", "state/conversations.sqlite3")
+    CONVERSATION_TTL: int = int(os.getenv("CONVERSATION_TTL", "86400"))
+    CONVERSATION_MAX_MESSAGES: int = int(os.getenv("CONVERSATION_MAX_MESSAGES", "10"))
+    CONVERSATION_MAX_COUNT: int = int(os.getenv("CONVERSATION_MAX_COUNT", "10000"))
+
+    ENABLE_PROFILING: bool = os.getenv("ENABLE_PROFILING", "False").lower() == "true"
+    ADMIN_API_TOKEN: Optional[str] = os.getenv("ADMIN_API_TOKEN")
+    PROFILING_SAMPLE_INTERVAL_MS: float = float(os.getenv("PROFILING_SAMPLE_INTERVAL_MS", "5"))
+    PROFILING_MAX_SECONDS: int = int(os.getenv("PROFILING_MAX_SECONDS", "120"))
+    PROFILING_MAX_REQUESTS: int = int(os.getenv("PROFILING_MAX_REQUESTS", "100"))
+    PROFILING_TRACEMALLOC_FRAMES: int = int(os.getenv("PROFILING_TRACEMALLOC_FRAMES", "15"))
+
     EXPOSE_DOCS: bool = os.getenv("EXPOSE_DOCS", "True").lower() == "true"
     MAX_QUERY_LENGTH: int = int(os.getenv("MAX_QUERY_LENGTH", "1000"))
 
+    ENABLE_BATCH_SEARCH: bool = os.getenv("ENABLE_BATCH_SEARCH", "False").lower() == "true"
+    BATCH_SEARCH_MAX_QUERIES: int = int(os.getenv("BATCH_SEARCH_MAX_QUERIES", "5000"))
+    BATCH_SEARCH_CHUNK_SIZE: int = int(os.getenv("BATCH_SEARCH_CHUNK_SIZE", "128"))
+
     @classmethod
     def validate(cls):
         errors = []
 
-        if not cls.GROQ_API_KEY:
+        if "groq" in cls.get_llm_backends() and not cls.GROQ_API_KEY:
             errors.append("GROQ_API_KEY is required. Please set it in .env file")
 
         if not os.path.exists(cls.DATA_DIR):
@@ -133,12 +299,67 @@ def validate(cls):
         if cls.APP_ENV == "production" and cls.DEBUG:
             errors.append("DEBUG should be False in production environment")
 
+        if cls.ENABLE_PROFILING and not cls.ADMIN_API_TOKEN:
+            errors.append("ADMIN_API_TOKEN is required when ENABLE_PROFILING is True")
+
+        if cls.ENABLE_BATCH_SEARCH and not cls.ADMIN_API_TOKEN:
+            errors.append("ADMIN_API_TOKEN is required when ENABLE_BATCH_SEARCH is True")
+
+        if not 0.0 < cls.SPECULATIVE_MIN_OVERLAP <= 1.0:
+            errors.append("SPECULATIVE_MIN_OVERLAP must be greater than 0 and at most 1")
+
+        if not 0.0 <= cls.LOG_SAMPLE_RATE <= 1.0:
+            errors.append("LOG_SAMPLE_RATE must be between 0 and 1")
+
+        try:
+            thresholds = cls.get_degrade_thresholds()
+            if len(thresholds) != 4 or thresholds != sorted(thresholds):
+                errors.append("DEGRADE_THRESHOLDS must be 4 increasing numbers (no_rerank, no_hybrid, reduced_llm, cache_only)")
+        except ValueError:
+            errors.append("DEGRADE_THRESHOLDS must be a comma-separated list of numbers")
+
+        try:
+            cls.get_query_class_profiles()
+        except ValueError:
+            errors.append("QUERY_CLASS_PROFILES must look like label=effort:max_tokens:contexts,...")
+
         if errors:
             error_msg = "\n".join(f"  - {error}" for error in errors)
             raise ValueError(f"Configuration validation failed:\n{error_msg}")
 
         return True
 
+    @classmethod
+    def get_llm_backends(cls):
+        return [name.strip().lower() for name in cls.LLM_BACKENDS.split(",") if name.strip()]
+
+    @classmethod
+    def get_degrade_thresholds(cls):
+        return [float(value) for value in cls.DEGRADE_THRESHOLDS.split(",") if value.strip()]
+
+    @classmethod
+    def get_query_class_profiles(cls):
+        profiles = {}
+        for entry in cls.QUERY_CLASS_PROFILES.split(","):
+            if not entry.strip():
+                continue
+            label, spec = entry.split("=", 1)
+            effort, max_tokens, contexts = (spec.split(":") + ["", ""])[:3]
+            profiles[label.strip()] = (
+                effort.strip().lower() or None,
+                int(max_tokens) if max_tokens.strip() else None,
+                int(contexts) if contexts.strip() else None
+            )
+        return profiles
+
+    @classmethod
+    def get_intent_gate_intents(cls):
+        return [name.strip().lower() for name in cls.INTENT_GATE_INTENTS.split(",") if name.strip()]
+
+    @classmethod
+    def get_intent_gate_out_of_scope_keywords(cls):
+        return [keyword.strip().lower() for keyword in cls.INTENT_GATE_OUT_OF_SCOPE_KEYWORDS.split(",") if keyword.strip()]
+
     @classmethod
     def get_cors_config(cls):
         return {
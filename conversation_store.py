@@ -0,0 +1,208 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Dict, List, Optional, Tuple
+from config import settings
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class InMemoryConversationStore:
+    name = "memory"
+
+    def __init__(self, max_messages: int, ttl: float, max_conversations: int):
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.max_conversations = max_conversations
+        self._lock = threading.Lock()
+        self._conversations: "OrderedDict[str, Tuple[Deque[Dict], float]]" = OrderedDict()
+
+    def get(self, conversation_id: str) -> List[Dict]:
+        with self._lock:
+            entry = self._conversations.get(conversation_id)
+            if entry is None:
+                return []
+            messages, updated = entry
+            if time.time() - updated > self.ttl:
+                del self._conversations[conversation_id]
+                return []
+            return list(messages)
+
+    def append(self, conversation_id: str, messages: List[Dict], replace: bool = False) -> None:
+        now = time.time()
+        with self._lock:
+            entry = self._conversations.pop(conversation_id, None)
+            history = deque(maxlen=self.max_messages)
+            if entry is not None and not replace and now - entry[1] <= self.ttl:
+                history.extend(entry[0])
+            history.extend(messages)
+            self._conversations[conversation_id] = (history, now)
+
+            while len(self._conversations) > self.max_conversations:
+                self._conversations.popitem(last=False)
+
+    def delete(self, conversation_id: str) -> None:
+        with self._lock:
+            self._conversations.pop(conversation_id, None)
+
+    def count(self) -> int:
+        return len(self._conversations)
+
+
+class SQLiteConversationStore:
+    name = "sqlite"
+
+    def __init__(self, path: str, max_messages: int, ttl: float, max_conversations: int):
+        self.path = path
+        self.max_messages = max_messages
+        self.ttl = ttl
+        self.max_conversations = max_conversations
+        self._local = threading.local()
+        self._writes = 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+        conn = self._connect()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS conversations ("
+            "conversation_id TEXT PRIMARY KEY, messages TEXT NOT NULL, updated REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_conversations_updated ON conversations(updated)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, conversation_id: str) -> List[Dict]:
+        row = self._connect().execute(
+            "SELECT messages FROM conversations WHERE conversation_id = ? AND updated > ?",
+            (conversation_id, time.time() - self.ttl)
+        ).fetchone()
+        return json.loads(row[0]) if row else []
+
+    def append(self, conversation_id: str, messages: List[Dict], replace: bool = False) -> None:
+        conn = self._connect()
+        now = time.time()
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            history = [] if replace else self.get(conversation_id)
+            history = (history + messages)[-self.max_messages:]
+            conn.execute(
+                "INSERT INTO conversations (conversation_id, messages, updated) VALUES (?, ?, ?) "
+                "ON CONFLICT(conversation_id) DO UPDATE SET messages = excluded.messages, updated = excluded.updated",
+                (conversation_id, json.dumps(history, ensure_ascii=False), now)
+            )
+
+            self._writes += 1
+            if self._writes % 100 == 0:
+                conn.execute("DELETE FROM conversations WHERE updated <= ?", (now - self.ttl,))
+                conn.execute(
+                    "DELETE FROM conversations WHERE conversation_id IN ("
+                    "SELECT conversation_id FROM conversations ORDER BY updated DESC LIMIT -1 OFFSET ?)",
+                    (self.max_conversations,)
+                )
+
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def delete(self, conversation_id: str) -> None:
+        self._connect().execute("DELETE FROM conversations WHERE conversation_id = ?", (conversation_id,))
+
+    def count(self) -> int:
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM conversations WHERE updated > ?", (time.time() - self.ttl,)
+        ).fetchone()[0]
+
+
+class ConversationStore:
+    def __init__(self, backend=None):
+        self.backend = backend or _build_backend()
+
+    def get_history(self, conversation_id: str) -> Optional[List[Dict]]:
+        try:
+            history = self.backend.get(conversation_id)
+        except sqlite3.Error as e:
+            logger.warning(f"Conversation store unavailable, continuing without history: {e}")
+            get_metrics().increment("conversation_store.errors")
+            return None
+
+        get_metrics().increment("conversation_store.hits" if history else "conversation_store.misses")
+        return history
+
+    def record_turn(self, conversation_id: str, query: str, answer: str,
+                    history: Optional[List[Dict]] = None) -> None:
+        messages = [{"role": "user", "content": query}, {"role": "assistant", "content": answer}]
+        try:
+            if history:
+                self.backend.append(conversation_id, history + messages, replace=True)
+            else:
+                self.backend.append(conversation_id, messages)
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to store conversation turn for {conversation_id}: {e}")
+            get_metrics().increment("conversation_store.errors")
+
+    def delete(self, conversation_id: str) -> None:
+        self.backend.delete(conversation_id)
+
+    def get_stats(self) -> Dict:
+        metrics = get_metrics()
+        try:
+            conversations = self.backend.count()
+        except sqlite3.Error:
+            conversations = None
+
+        return {
+            "enabled": settings.ENABLE_CONVERSATION_STORE,
+            "backend": self.backend.name,
+            "conversations": conversations,
+            "max_messages": self.backend.max_messages,
+            "ttl": self.backend.ttl,
+            "hits": metrics.get_counter("conversation_store.hits"),
+            "misses": metrics.get_counter("conversation_store.misses"),
+            "errors": metrics.get_counter("conversation_store.errors")
+        }
+
+
+def _build_backend():
+    if settings.CONVERSATION_STORE == "sqlite":
+        logger.info(f"Conversation store: sqlite ({settings.CONVERSATION_SQLITE_PATH})")
+        return SQLiteConversationStore(
+            settings.CONVERSATION_SQLITE_PATH,
+            settings.CONVERSATION_MAX_MESSAGES,
+            settings.CONVERSATION_TTL,
+            settings.CONVERSATION_MAX_COUNT
+        )
+
+    logger.info("Conversation store: memory")
+    return InMemoryConversationStore(
+        settings.CONVERSATION_MAX_MESSAGES,
+        settings.CONVERSATION_TTL,
+        settings.CONVERSATION_MAX_COUNT
+    )
+
+
+_store_instance: Optional[ConversationStore] = None
+_store_lock = threading.Lock()
+
+
+def get_conversation_store() -> ConversationStore:
+    global _store_instance
+
+    if _store_instance is None:
+        with _store_lock:
+            if _store_instance is None:
+                _store_instance = ConversationStore()
+
+    return _store_instance
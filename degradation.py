@@ -0,0 +1,134 @@
+import os
+import time
+import logging
+import threading
+from typing import Dict, List, Optional
+from config import settings
+from admission import get_stream_limiter
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+TIER_NAMES = ("normal", "no_rerank", "no_hybrid", "reduced_llm", "cache_only")
+
+
+class DegradationPolicy:
+    def __init__(self, tier: int):
+        self.tier = tier
+        self.name = TIER_NAMES[tier]
+        self.rerank = tier < 1
+        self.hybrid = tier < 2
+        self.reasoning_effort = settings.DEGRADE_REASONING_EFFORT if tier >= 3 else None
+        self.max_tokens = settings.DEGRADE_MAX_TOKENS if tier >= 3 else None
+        self.generate = tier < 4
+
+    def retrieval_overrides(self) -> Dict[str, bool]:
+        overrides = {}
+        if not self.rerank:
+            overrides["rerank"] = False
+        if not self.hybrid:
+            overrides["hybrid"] = False
+        return overrides
+
+
+class DegradationController:
+    def __init__(self):
+        self.thresholds: List[float] = settings.get_degrade_thresholds()
+        self._lock = threading.Lock()
+        self.tier = 0
+        self.pressure = 0.0
+        self.signals: Dict[str, float] = {}
+        self._evaluated_at = 0.0
+        self._changed_at = time.monotonic()
+
+    def read_signals(self) -> Dict[str, float]:
+        limiter = get_stream_limiter()
+        signals = {"queue": (limiter.active + limiter.waiting) / max(1, limiter.max_concurrent)}
+
+        if hasattr(os, "getloadavg"):
+            signals["cpu"] = os.getloadavg()[0] / (os.cpu_count() or 1) / settings.DEGRADE_CPU_HIGH
+
+        metrics = get_metrics()
+        ttfts = [
+            metrics.percentile(f"llm.{name}.ttft_s", 50) for name in settings.get_llm_backends()
+        ]
+        ttfts = [ttft for ttft in ttfts if ttft is not None]
+        if ttfts:
+            # cache_only stops LLM traffic, so slow upstream alone must not reach it or TTFT never recovers
+            signals["upstream"] = min(min(ttfts) / settings.DEGRADE_TTFT_HIGH_S, self.thresholds[2])
+
+        return signals
+
+    def _target_tier(self, pressure: float) -> int:
+        return sum(1 for threshold in self.thresholds if pressure >= threshold)
+
+    def evaluate(self) -> int:
+        now = time.monotonic()
+        if now - self._evaluated_at < settings.DEGRADE_EVAL_INTERVAL_S:
+            return self.tier
+
+        with self._lock:
+            if now - self._evaluated_at < settings.DEGRADE_EVAL_INTERVAL_S:
+                return self.tier
+            self._evaluated_at = now
+
+            signals = self.read_signals()
+            pressure = max(signals.values())
+            target = self._target_tier(pressure)
+            previous = self.tier
+
+            if target > self.tier:
+                self.tier = target
+            elif (
+                target < self.tier
+                and now - self._changed_at >= settings.DEGRADE_MIN_DWELL_S
+                and pressure < self.thresholds[self.tier - 1] * (1 - settings.DEGRADE_HYSTERESIS)
+            ):
+                self.tier -= 1
+
+            self.signals = signals
+            self.pressure = pressure
+
+            if self.tier != previous:
+                self._changed_at = now
+                level = logging.WARNING if self.tier > previous else logging.INFO
+                described = ", ".join(f"{name}={value:.2f}" for name, value in signals.items())
+                logger.log(level, f"Degradation tier {previous} -> {self.tier} ({TIER_NAMES[self.tier]}), "
+                                  f"pressure={pressure:.2f} ({described})")
+                get_metrics().increment("degradation.transitions")
+
+            get_metrics().set_gauge("degradation.tier", self.tier)
+            get_metrics().set_gauge("degradation.pressure", round(pressure, 3))
+
+        return self.tier
+
+    def current_policy(self) -> DegradationPolicy:
+        tier = self.evaluate() if settings.ENABLE_DEGRADATION else 0
+        get_metrics().increment(f"degradation.{TIER_NAMES[tier]}.requests")
+        return DegradationPolicy(tier)
+
+    def get_info(self) -> Dict:
+        return {
+            "enabled": settings.ENABLE_DEGRADATION,
+            "tier": self.tier,
+            "tier_name": TIER_NAMES[self.tier],
+            "pressure": round(self.pressure, 3),
+            "signals": {name: round(value, 3) for name, value in self.signals.items()},
+            "thresholds": self.thresholds
+        }
+
+
+_controller: Optional[DegradationController] = None
+
+
+def get_degradation_controller() -> DegradationController:
+    global _controller
+
+    if _controller is None:
+        _controller = DegradationController()
+
+    return _controller
+
+
+def get_degradation_info() -> Dict:
+    return get_degradation_controller().get_info()
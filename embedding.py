@@ -2,7 +2,13 @@
 from sentence_transformers import SentenceTransformer
 from sklearn.preprocessing import normalize
 import logging
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, Optional
+import numpy as np
 from config import settings
+from metrics import get_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -36,12 +42,12 @@ def embedding(texts, batch_size=None):
             logger.warning("Empty texts list provided to embedding function")
             return None
 
-        logger.debug(f"Creating embeddings for {len(texts)} texts with batch_size={batch_size}")
+        logger.debug("Creating embeddings for %d texts with batch_size=%s", len(texts), batch_size)
 
         embeddings = model.encode(
             texts,
             batch_size=batch_size,
-            show_progress_bar=True,
+            show_progress_bar=len(texts) > batch_size,
             convert_to_tensor=True,
             device=device
         )
@@ -50,7 +56,7 @@ def embedding(texts, batch_size=None):
             embeddings = embeddings.cpu().numpy()
 
         normalized = normalize(embeddings)
-        logger.debug(f"Embeddings created successfully, shape: {normalized.shape}")
+        logger.debug("Embeddings created successfully, shape: %s", normalized.shape)
 
         return normalized
 
@@ -69,6 +75,90 @@ def embedding(texts, batch_size=None):
             raise
 
 
+def normalize_query(query: str) -> str:
+    return " ".join(unicodedata.normalize("NFC", query).split())
+
+
+class QueryEmbeddingCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return vector
+
+    def set(self, key: str, vector: np.ndarray) -> None:
+        size = vector.nbytes + len(key.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous.nbytes + len(key.encode("utf-8"))
+
+            self._entries[key] = vector
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                evicted_key, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted.nbytes + len(evicted_key.encode("utf-8"))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+        }
+
+
+query_embedding_cache = QueryEmbeddingCache(int(settings.QUERY_EMBEDDING_CACHE_MB * 1024 * 1024))
+
+
+def embed_query(query: str) -> Optional[np.ndarray]:
+    text = normalize_query(query)
+    if not text:
+        return None
+
+    if query_embedding_cache.max_bytes <= 0:
+        return embedding([text])
+
+    vector = query_embedding_cache.get(text)
+    if vector is not None:
+        get_metrics().increment("embedding.query_cache.hits")
+        return vector
+
+    get_metrics().increment("embedding.query_cache.misses")
+    vector = embedding([text])
+    if vector is None:
+        return None
+
+    vector = np.ascontiguousarray(vector, dtype=np.float32)
+    vector.setflags(write=False)
+    query_embedding_cache.set(text, vector)
+    return vector
+
+
 def get_embedding_model():
     return model
 
@@ -80,11 +170,13 @@ def get_device_info():
             "gpu_name": torch.cuda.get_device_name(0),
             "gpu_memory": f"{torch.cuda.get_device_properties(0).total_memory / 1024**3:.1f} GB",
             "current_device": device,
-            "model": settings.EMBEDDING_MODEL
+            "model": settings.EMBEDDING_MODEL,
+            "query_cache": query_embedding_cache.get_stats()
         }
     else:
         return {
             "device": "cpu",
             "current_device": device,
-            "model": settings.EMBEDDING_MODEL
+            "model": settings.EMBEDDING_MODEL,
+            "query_cache": query_embedding_cache.get_stats()
         }
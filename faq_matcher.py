@@ -0,0 +1,161 @@
+import os
+import pickle
+import logging
+import threading
+from typing import List, Dict, Optional
+import faiss
+from config import settings
+from embedding import embedding, embed_query
+from hybrid_search import load_bm25_index
+from tokenizer import tokenize
+from metrics import get_metrics
+import tracing
+
+logger = logging.getLogger(__name__)
+
+faq_index = None
+faq_entries = None
+_faq_lock = threading.Lock()
+
+
+def build_faq_index(faq: List[Dict], batch_size: Optional[int] = None) -> None:
+    questions = [item["question"] for item in faq]
+    if not questions:
+        logger.warning("No FAQ entries, skipping FAQ fast path index")
+        return
+
+    logger.info(f"Creating FAQ question embeddings for {len(questions)} entries...")
+    embeddings = embedding(questions, batch_size=batch_size)
+    if embeddings is None:
+        raise ValueError("Failed to create FAQ question embeddings")
+
+    index = faiss.IndexFlatL2(embeddings.shape[1])
+    index.add(embeddings)
+    faiss.write_index(index, settings.FAQ_INDEX_PATH)
+
+    entries = [
+        {
+            "chunk_id": i,
+            "question": item["question"],
+            "answer": item["answer"],
+            "href": item.get("href", "")
+        }
+        for i, item in enumerate(faq)
+    ]
+    with open(settings.FAQ_METADATA_PATH, "wb") as f:
+        pickle.dump(entries, f)
+
+    clear_faq_index()
+    logger.info(f"FAQ index saved to {settings.FAQ_INDEX_PATH}")
+
+
+def load_faq_index():
+    global faq_index, faq_entries
+
+    if faq_index is not None:
+        return faq_index, faq_entries
+
+    with _faq_lock:
+        if faq_index is None:
+            if not os.path.exists(settings.FAQ_INDEX_PATH):
+                return None, None
+            index = faiss.read_index(settings.FAQ_INDEX_PATH)
+            with open(settings.FAQ_METADATA_PATH, "rb") as f:
+                faq_entries = pickle.load(f)
+            faq_index = index
+            logger.info(f"FAQ index loaded from {settings.FAQ_INDEX_PATH} with {faq_index.ntotal} questions")
+
+    return faq_index, faq_entries
+
+
+def clear_faq_index() -> None:
+    global faq_index, faq_entries
+
+    with _faq_lock:
+        faq_index = None
+        faq_entries = None
+
+
+def _bm25_ratio(query: str, entry: Dict) -> Optional[float]:
+    bm25, _, metadata = load_bm25_index(settings.BM25_INDEX_PATH)
+
+    chunk_id = entry["chunk_id"]
+    if chunk_id >= len(metadata) or entry["question"] not in metadata[chunk_id]["text"]:
+        logger.warning("FAQ index is out of sync with the BM25 index, rebuild required")
+        return None
+
+    query_score, question_score = (
+        float(bm25.get_batch_scores(tokenize(text), [chunk_id])[0])
+        for text in (query, entry["question"])
+    )
+    if question_score <= 0:
+        return None
+
+    return query_score / question_score
+
+
+def match_faq(query: str) -> Optional[Dict]:
+    if not settings.ENABLE_FAQ_FAST_PATH:
+        return None
+
+    metrics = get_metrics()
+
+    with tracing.span("faq_match") as match_span:
+        try:
+            index, entries = load_faq_index()
+            if index is None:
+                return None
+
+            q_emb = embed_query(query)
+            if q_emb is None:
+                return None
+
+            D, I = index.search(q_emb, 1)
+            if I[0][0] < 0:
+                return None
+
+            entry = entries[I[0][0]]
+            similarity = 1.0 - float(D[0][0]) / 2
+            match_span.set_attribute("similarity", round(similarity, 4))
+
+            if similarity < settings.FAQ_FAST_PATH_MIN_SIMILARITY:
+                metrics.increment("faq_fast_path.misses")
+                return None
+
+            bm25_ratio = None
+            if settings.FAQ_FAST_PATH_MIN_BM25_RATIO > 0:
+                bm25_ratio = _bm25_ratio(query, entry)
+                match_span.set_attribute("bm25_ratio", bm25_ratio)
+
+            if settings.FAQ_FAST_PATH_MIN_BM25_RATIO > 0 and (
+                bm25_ratio is None or bm25_ratio < settings.FAQ_FAST_PATH_MIN_BM25_RATIO
+            ):
+                metrics.increment("faq_fast_path.misses")
+                return None
+
+        except Exception as e:
+            logger.warning(f"FAQ fast path check failed: {e}")
+            metrics.increment("faq_fast_path.errors")
+            return None
+
+        metrics.increment("faq_fast_path.hits")
+        match_span.set_attribute("hit", True)
+        logger.info(f"FAQ fast path hit: similarity={similarity:.4f}, bm25_ratio={bm25_ratio}")
+
+        return {**entry, "similarity": similarity, "bm25_ratio": bm25_ratio}
+
+
+def get_faq_fast_path_info() -> Dict:
+    metrics = get_metrics()
+    hits = metrics.get_counter("faq_fast_path.hits")
+    misses = metrics.get_counter("faq_fast_path.misses")
+
+    return {
+        "enabled": settings.ENABLE_FAQ_FAST_PATH,
+        "index_loaded": faq_index is not None,
+        "min_similarity": settings.FAQ_FAST_PATH_MIN_SIMILARITY,
+        "min_bm25_ratio": settings.FAQ_FAST_PATH_MIN_BM25_RATIO,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0
+    }
@@ -6,13 +6,23 @@ const CONFIG = {
     ENDPOINTS: {
         CHAT_STREAM: "/api/chat/stream",
         STATUS: "/api/status",
-        HEALTH: "/health"
+        HEALTH: "/health",
+        SUGGESTIONS: "/api/suggestions",
+        PREPARE: "/api/chat/prepare"
     },
 
     MAX_HISTORY_LENGTH: 10,
 
     TYPING_DELAY: 800,
 
+    SUGGESTION_DEBOUNCE: 120,
+
+    SUGGESTION_LIMIT: 6,
+
+    PREPARE_DEBOUNCE: 400,
+
+    PREPARE_MIN_LENGTH: 10,
+
     REQUEST_TIMEOUT: 30000,
 
     MAX_INPUT_HEIGHT: 120,
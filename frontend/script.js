@@ -9,6 +9,7 @@ document.addEventListener("DOMContentLoaded", function () {
     const sendButton = document.getElementById("send-button");
     const quickActions = document.getElementById("quick-actions");
     const announcer = document.getElementById("announcer");
+    const suggestionList = document.getElementById("suggestion-list");
 
     const sidebar = document.getElementById("sidebar");
     const sidebarToggle = document.getElementById("sidebar-toggle");
@@ -41,6 +42,9 @@ document.addEventListener("DOMContentLoaded", function () {
     let conversations = {};
     let currentConversationId = null;
 
+    // Conversations whose history the server already holds: only the new message is sent
+    const serverStoredConversations = new Set();
+
     function announce(message, priority = "polite") {
         if (!announcer) return;
         announcer.setAttribute("aria-live", priority);
@@ -564,7 +568,7 @@ document.addEventListener("DOMContentLoaded", function () {
         }
     }
 
-    async function sendMessageStreaming(message, targetConversationId, contextHistory) {
+    async function sendMessageStreaming(message, targetConversationId, contextHistory, localHistoryLength) {
         let fullAnswer = "";
         let botMessageDiv = null;
         let botBubbleDiv = null;
@@ -611,14 +615,16 @@ document.addEventListener("DOMContentLoaded", function () {
 
             const reader = response.body.getReader();
             const decoder = new TextDecoder();
+            let buffered = "";
 
             while (true) {
                 const { done, value } = await reader.read();
 
                 if (done) break;
 
-                const chunk = decoder.decode(value, { stream: true });
-                const lines = chunk.split("\n");
+                buffered += decoder.decode(value, { stream: true });
+                const lines = buffered.split("\n");
+                buffered = lines.pop();
 
                 for (const line of lines) {
                     if (line.startsWith("data: ")) {
@@ -629,6 +635,16 @@ document.addEventListener("DOMContentLoaded", function () {
                                 const data = JSON.parse(jsonStr);
 
                                 if (data.type === "metadata") {
+                                    if (data.conversation_store) {
+                                        const expected = Math.min(localHistoryLength, MAX_HISTORY_LENGTH);
+                                        if (contextHistory.length === 0 && data.stored_messages < expected) {
+                                            serverStoredConversations.delete(targetConversationId);
+                                        } else {
+                                            serverStoredConversations.add(targetConversationId);
+                                        }
+                                    } else {
+                                        serverStoredConversations.delete(targetConversationId);
+                                    }
                                     shouldAutoScroll = isAtBottom();
                                     if (shouldAutoScroll) {
                                         chatBox.scrollTop = chatBox.scrollHeight;
@@ -719,22 +735,28 @@ document.addEventListener("DOMContentLoaded", function () {
             return;
         }
 
-        const contextHistory = getChatHistoryForAPI(targetConversationId);
+        const localHistoryLength = (conversations[targetConversationId].messages || []).length;
+        const contextHistory = serverStoredConversations.has(targetConversationId)
+            ? []
+            : getChatHistoryForAPI(targetConversationId);
 
         console.log(`[SendMessage] Sending to conversation ${targetConversationId} with ${contextHistory.length} history messages`);
 
+        prepareRetrieval(message);
+        lastPrepared = "";
         appendMessageToConversation(targetConversationId, "user", message);
         userInput.value = "";
 
         setLoadingState(true);
 
         setTimeout(() => {
-            sendMessageStreaming(message, targetConversationId, contextHistory);
+            sendMessageStreaming(message, targetConversationId, contextHistory, localHistoryLength);
         }, CONFIG.TYPING_DELAY || 800);
     }
 
     chatForm.addEventListener("submit", function (e) {
         e.preventDefault();
+        hideSuggestions();
         if (chatForm.classList.contains("loading")) {
             return;
         }
@@ -802,10 +824,18 @@ document.addEventListener("DOMContentLoaded", function () {
         }
     }
 
+    function newConversationToken() {
+        if (window.crypto && crypto.randomUUID) {
+            return crypto.randomUUID();
+        }
+        const bytes = crypto.getRandomValues(new Uint8Array(16));
+        return Array.from(bytes, (b) => b.toString(16).padStart(2, "0")).join("");
+    }
+
     function createNewConversation() {
         saveCurrentConversation();
 
-        const id = "conv_" + Date.now();
+        const id = "conv_" + newConversationToken();
         const now = new Date();
         conversations[id] = {
             id: id,
@@ -1141,8 +1171,151 @@ document.addEventListener("DOMContentLoaded", function () {
     userInput.addEventListener("input", function () {
         this.style.height = "auto";
         this.style.height = Math.min(this.scrollHeight, 120) + "px";
+        scheduleSuggestions(this.value);
+        schedulePrepare(this.value);
     });
 
+    let prepareTimer = null;
+    let lastPrepared = "";
+
+    function schedulePrepare(value) {
+        clearTimeout(prepareTimer);
+        prepareTimer = setTimeout(() => prepareRetrieval(value), CONFIG.PREPARE_DEBOUNCE || 400);
+    }
+
+    function prepareRetrieval(value) {
+        clearTimeout(prepareTimer);
+        const query = value.trim();
+        if (query.length < (CONFIG.PREPARE_MIN_LENGTH || 10) || query === lastPrepared || !currentConversationId) {
+            return;
+        }
+        lastPrepared = query;
+
+        fetch(CONFIG.getApiUrl("PREPARE"), {
+            method: "POST",
+            headers: { "Content-Type": "application/json" },
+            body: JSON.stringify({ query: query, conversation_id: currentConversationId }),
+            keepalive: true
+        }).catch((e) => {
+            if (CONFIG.DEBUG_MODE) {
+                console.warn("[ChatBot] Prepare request failed:", e);
+            }
+        });
+    }
+
+    let suggestionTimer = null;
+    let suggestionController = null;
+    let activeSuggestion = -1;
+
+    function scheduleSuggestions(value) {
+        clearTimeout(suggestionTimer);
+        if (!value.trim()) {
+            hideSuggestions();
+            return;
+        }
+        suggestionTimer = setTimeout(() => fetchSuggestions(value), CONFIG.SUGGESTION_DEBOUNCE || 120);
+    }
+
+    async function fetchSuggestions(value) {
+        if (suggestionController) {
+            suggestionController.abort();
+        }
+        suggestionController = new AbortController();
+
+        try {
+            const params = new URLSearchParams({ q: value, limit: CONFIG.SUGGESTION_LIMIT || 6 });
+            const response = await fetch(`${CONFIG.getApiUrl("SUGGESTIONS")}?${params}`, {
+                signal: suggestionController.signal
+            });
+            if (!response.ok) {
+                return;
+            }
+            const data = await response.json();
+            if (userInput.value === value) {
+                renderSuggestions(data.suggestions || []);
+            }
+        } catch (e) {
+            if (e.name !== "AbortError") {
+                console.warn("[ChatBot] Suggestions unavailable:", e);
+            }
+        }
+    }
+
+    function renderSuggestions(items) {
+        suggestionList.innerHTML = "";
+        activeSuggestion = -1;
+
+        if (!items.length || chatForm.classList.contains("loading")) {
+            hideSuggestions();
+            return;
+        }
+
+        items.forEach((text, index) => {
+            const item = document.createElement("li");
+            item.id = `suggestion-${index}`;
+            item.className = "suggestion-item";
+            item.setAttribute("role", "option");
+            item.textContent = text;
+            item.addEventListener("mousedown", (e) => {
+                e.preventDefault();
+                selectSuggestion(index);
+            });
+            suggestionList.appendChild(item);
+        });
+
+        suggestionList.hidden = false;
+        userInput.setAttribute("aria-expanded", "true");
+    }
+
+    function hideSuggestions() {
+        clearTimeout(suggestionTimer);
+        if (suggestionController) {
+            suggestionController.abort();
+            suggestionController = null;
+        }
+        suggestionList.hidden = true;
+        suggestionList.innerHTML = "";
+        activeSuggestion = -1;
+        userInput.setAttribute("aria-expanded", "false");
+        userInput.removeAttribute("aria-activedescendant");
+    }
+
+    function highlightSuggestion(index) {
+        const items = suggestionList.querySelectorAll(".suggestion-item");
+        if (!items.length) {
+            return;
+        }
+        activeSuggestion = (index + items.length) % items.length;
+        items.forEach((item, i) => item.classList.toggle("active", i === activeSuggestion));
+        userInput.setAttribute("aria-activedescendant", items[activeSuggestion].id);
+    }
+
+    function selectSuggestion(index) {
+        const item = suggestionList.querySelectorAll(".suggestion-item")[index];
+        if (item) {
+            userInput.value = item.textContent;
+            hideSuggestions();
+            userInput.focus();
+        }
+    }
+
+    userInput.addEventListener("keydown", function (e) {
+        if (suggestionList.hidden) {
+            return;
+        }
+        if (e.key === "ArrowDown" || e.key === "ArrowUp") {
+            e.preventDefault();
+            highlightSuggestion(activeSuggestion + (e.key === "ArrowDown" ? 1 : -1));
+        } else if (e.key === "Enter" && activeSuggestion >= 0) {
+            e.preventDefault();
+            selectSuggestion(activeSuggestion);
+        } else if (e.key === "Escape") {
+            hideSuggestions();
+        }
+    });
+
+    userInput.addEventListener("blur", hideSuggestions);
+
     document.querySelector(".attachment-btn").addEventListener("click", function () {
         appendMessage("bot", "Tính năng đính kèm file sẽ được hỗ trợ trong phiên bản tiếp theo.");
     });
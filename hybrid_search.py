@@ -1,23 +1,23 @@
 import pickle
 import logging
+from collections import Counter
 from typing import List, Dict, Tuple, Optional
 from rank_bm25 import BM25Okapi
 import numpy as np
 from config import settings
+from tokenizer import tokenize, get_tokenizer
+import tracing
 
 logger = logging.getLogger(__name__)
 
 bm25_index = None
 bm25_corpus_tokens = None
 bm25_metadata = None
+bm25_postings = None
 
 
 def tokenize_vietnamese(text: str) -> List[str]:
-    import re
-    text = text.lower()
-    text = re.sub(r'[^\w\s]', ' ', text)
-    tokens = text.split()
-    return [t for t in tokens if len(t) > 1]
+    return tokenize(text)
 
 
 def build_bm25_index(documents: List[Dict]) -> Tuple[BM25Okapi, List[List[str]], List[Dict]]:
@@ -42,7 +42,8 @@ def save_bm25_index(bm25: BM25Okapi, corpus_tokens: List[List[str]], metadata: L
         data = {
             'bm25': bm25,
             'corpus_tokens': corpus_tokens,
-            'metadata': metadata
+            'metadata': metadata,
+            'tokenizer': get_tokenizer().signature()
         }
         with open(path, 'wb') as f:
             pickle.dump(data, f)
@@ -67,6 +68,12 @@ def load_bm25_index(path: str) -> Tuple[BM25Okapi, List[List[str]], List[Dict]]:
         bm25_corpus_tokens = data['corpus_tokens']
         bm25_metadata = data['metadata']
 
+        if data.get('tokenizer') != get_tokenizer().signature():
+            logger.warning(
+                f"BM25 index was built with tokenizer {data.get('tokenizer')}, "
+                f"current is {get_tokenizer().signature()}; rebuild the index"
+            )
+
         logger.info(f"BM25 index loaded from {path} with {len(bm25_metadata)} documents")
         return bm25_index, bm25_corpus_tokens, bm25_metadata
     except Exception as e:
@@ -74,6 +81,40 @@ def load_bm25_index(path: str) -> Tuple[BM25Okapi, List[List[str]], List[Dict]]:
         raise
 
 
+def clear_bm25_index() -> None:
+    global bm25_index, bm25_corpus_tokens, bm25_metadata, bm25_postings
+
+    bm25_index = None
+    bm25_corpus_tokens = None
+    bm25_metadata = None
+    bm25_postings = None
+
+
+def _get_postings(bm25: BM25Okapi) -> Dict[str, Tuple[np.ndarray, np.ndarray]]:
+    global bm25_postings
+
+    if bm25_postings is None:
+        norm = bm25.k1 * (1 - bm25.b + bm25.b * np.asarray(bm25.doc_len, dtype=np.float64) / bm25.avgdl)
+
+        doc_ids: Dict[str, List[int]] = {}
+        freqs: Dict[str, List[int]] = {}
+        for doc_id, doc_freqs in enumerate(bm25.doc_freqs):
+            for token, tf in doc_freqs.items():
+                doc_ids.setdefault(token, []).append(doc_id)
+                freqs.setdefault(token, []).append(tf)
+
+        postings = {}
+        for token, ids in doc_ids.items():
+            ids = np.asarray(ids, dtype=np.int64)
+            tf = np.asarray(freqs[token], dtype=np.float64)
+            postings[token] = (ids, bm25.idf.get(token, 0.0) * tf * (bm25.k1 + 1) / (tf + norm[ids]))
+
+        bm25_postings = postings
+        logger.info(f"BM25 postings built for {len(postings)} terms")
+
+    return bm25_postings
+
+
 def search_bm25(query: str, k: int = 10, bm25_path: Optional[str] = None) -> List[Tuple[Dict, float]]:
     if bm25_path is None:
         bm25_path = settings.BM25_INDEX_PATH
@@ -81,23 +122,51 @@ def search_bm25(query: str, k: int = 10, bm25_path: Optional[str] = None) -> Lis
     bm25, corpus_tokens, metadata = load_bm25_index(bm25_path)
 
     query_tokens = tokenize_vietnamese(query)
-    logger.debug(f"BM25 search query tokens: {query_tokens}")
+    logger.debug("BM25 search query tokens: %s", query_tokens)
 
     scores = bm25.get_scores(query_tokens)
 
     top_indices = np.argsort(scores)[::-1][:k]
 
+    debug = logger.isEnabledFor(logging.DEBUG)
     results = []
     for idx in top_indices:
         doc = metadata[idx].copy()
         score = float(scores[idx])
         results.append((doc, score))
-        logger.debug(f"BM25 result: score={score:.4f}, text={doc['text'][:50]}...")
+        if debug:
+            logger.debug("BM25 result: score=%.4f, text=%s...", score, doc["text"][:50])
 
     logger.info(f"BM25 search returned {len(results)} results")
     return results
 
 
+def search_bm25_batch(
+    queries: List[str],
+    k: int = 10,
+    bm25_path: Optional[str] = None
+) -> List[List[Tuple[Dict, float]]]:
+    if bm25_path is None:
+        bm25_path = settings.BM25_INDEX_PATH
+
+    bm25, _, metadata = load_bm25_index(bm25_path)
+    postings = _get_postings(bm25)
+
+    scores = np.zeros((len(queries), bm25.corpus_size))
+    for row, query in enumerate(queries):
+        for token, count in Counter(tokenize_vietnamese(query)).items():
+            entry = postings.get(token)
+            if entry is not None:
+                scores[row, entry[0]] += count * entry[1]
+
+    top_indices = np.argsort(scores, axis=1)[:, ::-1][:, :k]
+
+    return [
+        [(metadata[idx].copy(), float(scores[row, idx])) for idx in top_indices[row]]
+        for row in range(len(queries))
+    ]
+
+
 def reciprocal_rank_fusion(rankings: List[List[Tuple[str, Dict, float]]], k: int = 60) -> List[Dict]:
     rrf_scores = {}
     doc_map = {}
@@ -184,22 +253,35 @@ def hybrid_search(
     logger.info(f"Performing hybrid search with fusion method: {fusion_method}")
 
     bm25_k = k * settings.BM25_RETRIEVAL_MULTIPLIER
-    bm25_results = search_bm25(query, k=bm25_k)
+    with tracing.span("bm25", k=bm25_k):
+        bm25_results = search_bm25(query, k=bm25_k)
+
+    return fuse_results(bm25_results, vector_results, k, fusion_method, bm25_weight, vector_weight)
 
+
+def fuse_results(
+    bm25_results: List[Tuple[Dict, float]],
+    vector_results: List[Tuple[Dict, float]],
+    k: int = 10,
+    fusion_method: str = "rrf",
+    bm25_weight: float = 0.5,
+    vector_weight: float = 0.5
+) -> List[Dict]:
     logger.info(f"BM25: {len(bm25_results)} results, Vector: {len(vector_results)} results")
 
-    if fusion_method == "rrf":
-        bm25_ranking = [(doc['text'], doc, score) for doc, score in bm25_results]
-        vector_ranking = [(doc['text'], doc, score) for doc, score in vector_results]
+    with tracing.span("fusion", method=fusion_method):
+        if fusion_method == "rrf":
+            bm25_ranking = [(doc['text'], doc, score) for doc, score in bm25_results]
+            vector_ranking = [(doc['text'], doc, score) for doc, score in vector_results]
 
-        results = reciprocal_rank_fusion([bm25_ranking, vector_ranking], k=60)
-    elif fusion_method == "weighted":
-        results = weighted_score_fusion(bm25_results, vector_results, bm25_weight, vector_weight)
-    else:
-        logger.warning(f"Unknown fusion method: {fusion_method}, using RRF")
-        bm25_ranking = [(doc['text'], doc, score) for doc, score in bm25_results]
-        vector_ranking = [(doc['text'], doc, score) for doc, score in vector_results]
-        results = reciprocal_rank_fusion([bm25_ranking, vector_ranking], k=60)
+            results = reciprocal_rank_fusion([bm25_ranking, vector_ranking], k=60)
+        elif fusion_method == "weighted":
+            results = weighted_score_fusion(bm25_results, vector_results, bm25_weight, vector_weight)
+        else:
+            logger.warning(f"Unknown fusion method: {fusion_method}, using RRF")
+            bm25_ranking = [(doc['text'], doc, score) for doc, score in bm25_results]
+            vector_ranking = [(doc['text'], doc, score) for doc, score in vector_results]
+            results = reciprocal_rank_fusion([bm25_ranking, vector_ranking], k=60)
 
     return results[:k]
 
@@ -210,5 +292,7 @@ def get_hybrid_search_info() -> Dict:
         "fusion_method": settings.HYBRID_FUSION_METHOD,
         "bm25_weight": settings.BM25_WEIGHT,
         "vector_weight": settings.VECTOR_WEIGHT,
-        "bm25_retrieval_multiplier": settings.BM25_RETRIEVAL_MULTIPLIER
+        "bm25_retrieval_multiplier": settings.BM25_RETRIEVAL_MULTIPLIER,
+        "parallel_retrieval": settings.ENABLE_PARALLEL_RETRIEVAL,
+        "retrieval_workers": settings.RETRIEVAL_WORKERS
     }
@@ -0,0 +1,227 @@
+import re
+import logging
+import threading
+from typing import Dict, List, Optional
+import numpy as np
+from config import settings
+from embedding import embedding, embed_query
+from faq_matcher import load_faq_index
+from query_classifier import PROCEDURAL_MARKERS
+from tokenizer import get_tokenizer, fold_diacritics
+from metrics import get_metrics
+import tracing
+
+logger = logging.getLogger(__name__)
+
+INTENTS = ("greeting", "thanks", "goodbye", "out_of_scope")
+
+# Administrative wording that makes an out-of-scope keyword part of a real request ("giấy phép kinh doanh xổ số")
+DOMAIN_MARKERS = re.compile(
+    r"\b(dang ky|giay phep|cap (phep|giay|lai|doi|moi)|thue|nop|le phi|kinh doanh|thanh lap|doanh nghiep|"
+    r"ho tich|chung thuc|cong chung|xu phat|khieu nai|to cao|dich vu cong)\b"
+)
+
+_FILLER = r"(?: (?:ban|ad|admin|anh|chi|em|shop|moi nguoi|tro ly|bot|a|nhe|nha|oi|nhieu|rat nhieu|lam|so much|you|very much))*"
+
+# Matched against the whole diacritic-folded query, so "xin chào, cho hỏi..." still goes to retrieval
+KEYWORD_RULES = {
+    "greeting": re.compile(r"^(?:xin chao|chao|hello|hi|hey|alo|good (?:morning|afternoon|evening))" + _FILLER + "$"),
+    "thanks": re.compile(r"^(?:xin cam on|cam on|thank you|thanks|thank|tks|ok cam on|oke cam on)" + _FILLER + "$"),
+    "goodbye": re.compile(r"^(?:tam biet|bye|bye bye|goodbye|hen gap lai)" + _FILLER + "$")
+}
+
+SEED_QUERIES = {
+    "greeting": [
+        "xin chào", "chào bạn", "chào bạn, bạn là ai?", "hello", "bạn có thể giúp gì cho tôi?",
+        "chào buổi sáng", "bạn ơi", "alo có ai không"
+    ],
+    "thanks": [
+        "cảm ơn", "cảm ơn bạn nhiều", "cảm ơn đã hỗ trợ", "thank you", "ok cảm ơn nhé", "rất hữu ích, cảm ơn"
+    ],
+    "goodbye": [
+        "tạm biệt", "hẹn gặp lại", "bye", "tôi không còn câu hỏi nào nữa", "vậy thôi nhé, chào bạn"
+    ],
+    "out_of_scope": [
+        "thời tiết hôm nay thế nào", "kết quả bóng đá tối qua", "giá vàng hôm nay", "giá bitcoin bao nhiêu",
+        "viết giúp tôi một đoạn code python", "kể cho tôi một câu chuyện cười", "công thức nấu phở bò",
+        "gợi ý phim hay để xem", "làm thơ về mùa thu", "dự đoán xổ số ngày mai"
+    ],
+    "in_scope": [
+        "thủ tục cấp hộ chiếu", "làm căn cước công dân cần giấy tờ gì", "đăng ký khai sinh cho con",
+        "nộp hồ sơ trực tuyến trên cổng dịch vụ công", "lệ phí đăng ký kết hôn", "cách tra cứu hồ sơ",
+        "đăng ký thường trú", "đổi giấy phép lái xe", "thanh toán trực tuyến lệ phí", "đăng ký tài khoản dịch vụ công"
+    ]
+}
+
+TEMPLATES = {
+    "greeting": (
+        "Xin chào! Tôi là trợ lý hỗ trợ về Dịch vụ công Quốc gia. Bạn có thể hỏi tôi về thủ tục hành chính, "
+        "giấy tờ cần chuẩn bị hoặc cách nộp hồ sơ trực tuyến. Bạn cần hỗ trợ thủ tục nào?"
+    ),
+    "thanks": "Rất vui được hỗ trợ bạn! Nếu còn câu hỏi nào về thủ tục hành chính hay dịch vụ công, bạn cứ hỏi nhé.",
+    "goodbye": "Tạm biệt bạn! Khi cần hỗ trợ về dịch vụ công, bạn có thể quay lại hỏi tôi bất cứ lúc nào.",
+    "out_of_scope": (
+        "Xin lỗi, tôi chỉ hỗ trợ các câu hỏi về thủ tục hành chính và Dịch vụ công Quốc gia. "
+        "Bạn có thể hỏi tôi về hồ sơ, giấy tờ, lệ phí hoặc cách nộp hồ sơ trực tuyến."
+    )
+}
+
+_centroids: Optional[Dict[str, np.ndarray]] = None
+_centroid_lock = threading.Lock()
+
+
+def _folded_text(query: str) -> str:
+    return " ".join(fold_diacritics(s) for s in get_tokenizer().syllables(query))
+
+
+def _enabled_intents() -> List[str]:
+    return [intent for intent in settings.get_intent_gate_intents() if intent in INTENTS]
+
+
+def _match_keywords(text: str) -> Optional[str]:
+    enabled = _enabled_intents()
+
+    for intent, pattern in KEYWORD_RULES.items():
+        if intent in enabled and pattern.match(text):
+            return intent
+
+    return None
+
+
+def _has_out_of_scope_keyword(text: str) -> bool:
+    if "out_of_scope" not in _enabled_intents():
+        return False
+    if PROCEDURAL_MARKERS.search(text) or DOMAIN_MARKERS.search(text):
+        return False
+
+    padded = f" {text} "
+    return any(f" {_folded_text(keyword)} " in padded for keyword in settings.get_intent_gate_out_of_scope_keywords())
+
+
+def load_centroids() -> Optional[Dict[str, np.ndarray]]:
+    global _centroids
+
+    if _centroids is not None:
+        return _centroids
+
+    with _centroid_lock:
+        if _centroids is None:
+            labels = [label for label, seeds in SEED_QUERIES.items() for _ in seeds]
+            vectors = embedding([seed for seeds in SEED_QUERIES.values() for seed in seeds])
+            if vectors is None:
+                return None
+
+            centroids = {}
+            for label in SEED_QUERIES:
+                mean = vectors[[i for i, name in enumerate(labels) if name == label]].mean(axis=0)
+                centroids[label] = (mean / np.linalg.norm(mean)).astype(np.float32)
+            _centroids = centroids
+            logger.info(f"Intent gate centroids built from {len(labels)} seed queries")
+
+    return _centroids
+
+
+def _in_scope_similarity(q_emb: np.ndarray, centroids: Dict[str, np.ndarray]) -> float:
+    similarity = float(q_emb[0] @ centroids["in_scope"])
+
+    index, _ = load_faq_index()
+    if index is not None and index.ntotal:
+        D, I = index.search(q_emb, 1)
+        if I[0][0] >= 0:
+            similarity = max(similarity, 1.0 - float(D[0][0]) / 2)
+
+    return similarity
+
+
+def _confirm_out_of_scope(query: str) -> Optional[Dict]:
+    # A keyword alone is not enough: the query must also be far from the indexed content
+    centroids = load_centroids()
+    q_emb = embed_query(query)
+    if centroids is None or q_emb is None:
+        return None
+
+    in_scope = _in_scope_similarity(q_emb, centroids)
+    if in_scope >= settings.INTENT_GATE_KEYWORD_MAX_IN_SCOPE:
+        return None
+
+    return {"intent": "out_of_scope", "method": "keyword", "in_scope_similarity": in_scope}
+
+
+def _match_centroids(query: str) -> Optional[Dict]:
+    centroids = load_centroids()
+    q_emb = embed_query(query)
+    if centroids is None or q_emb is None:
+        return None
+
+    scores = {intent: float(q_emb[0] @ centroids[intent]) for intent in _enabled_intents()}
+    if not scores:
+        return None
+
+    intent = max(scores, key=scores.get)
+    similarity = scores[intent]
+    in_scope = _in_scope_similarity(q_emb, centroids)
+
+    if similarity < settings.INTENT_GATE_MIN_SIMILARITY or similarity - in_scope < settings.INTENT_GATE_MARGIN:
+        return None
+
+    return {"intent": intent, "method": "centroid", "similarity": similarity, "in_scope_similarity": in_scope}
+
+
+def match_intent(query: str) -> Optional[Dict]:
+    if not settings.ENABLE_INTENT_GATE:
+        return None
+
+    metrics = get_metrics()
+
+    with tracing.span("intent_gate") as gate_span:
+        try:
+            text = _folded_text(query)
+            intent = _match_keywords(text)
+            match = {"intent": intent, "method": "keyword"} if intent else None
+
+            if match is None and _has_out_of_scope_keyword(text):
+                match = _confirm_out_of_scope(query)
+
+            if match is None and settings.INTENT_GATE_CENTROIDS:
+                match = _match_centroids(query)
+
+        except Exception as e:
+            logger.warning(f"Intent gate check failed: {e}")
+            metrics.increment("intent_gate.errors")
+            return None
+
+        if match is None:
+            metrics.increment("intent_gate.passes")
+            return None
+
+        metrics.increment(f"intent_gate.{match['intent']}")
+        metrics.increment(f"intent_gate.{match['method']}_hits")
+        gate_span.set_attribute("intent", match["intent"])
+        gate_span.set_attribute("method", match["method"])
+        scores = ", ".join(
+            f"{name}={match[key]:.4f}" for name, key in (("similarity", "similarity"), ("in_scope", "in_scope_similarity"))
+            if key in match
+        )
+        logger.info(f"Intent gate hit: {match['intent']} via {match['method']}" + (f" ({scores})" if scores else ""))
+
+        return {**match, "answer": TEMPLATES[match["intent"]]}
+
+
+def get_intent_gate_info() -> Dict:
+    metrics = get_metrics()
+    hits = {intent: metrics.get_counter(f"intent_gate.{intent}") for intent in INTENTS}
+    passes = metrics.get_counter("intent_gate.passes")
+    total = sum(hits.values()) + passes
+
+    return {
+        "enabled": settings.ENABLE_INTENT_GATE,
+        "intents": _enabled_intents(),
+        "centroids": settings.INTENT_GATE_CENTROIDS,
+        "centroids_loaded": _centroids is not None,
+        "min_similarity": settings.INTENT_GATE_MIN_SIMILARITY,
+        "margin": settings.INTENT_GATE_MARGIN,
+        "keyword_max_in_scope": settings.INTENT_GATE_KEYWORD_MAX_IN_SCOPE,
+        "hits": hits,
+        "passes": passes,
+        "hit_rate": round(sum(hits.values()) / total, 4) if total else 0.0
+    }
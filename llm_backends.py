@@ -0,0 +1,296 @@
+import json
+import logging
+import threading
+from abc import ABC, abstractmethod
+from typing import Dict, Iterable, List, Optional
+import httpx
+from config import settings
+from llm_transport import ResilientStreamer, CircuitOpenError, build_http_client
+from cancellation import RequestCancelled
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+class LLMBackendError(RuntimeError):
+    def __init__(self, message: str, status_code: Optional[int] = None, response: Optional[httpx.Response] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.response = response
+
+
+class LLMBackend(ABC):
+    name: str = "base"
+
+    def __init__(self, model: str, cost_per_1m_tokens: float = 0.0):
+        self.model = model
+        self.cost_per_1m_tokens = cost_per_1m_tokens
+        self.transport = ResilientStreamer(self.name)
+
+    @abstractmethod
+    def open_stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        timeout: float,
+        reasoning_effort: Optional[str]
+    ) -> Iterable[str]:
+        raise NotImplementedError
+
+    def get_info(self) -> Dict:
+        return {
+            "name": self.name,
+            "model": self.model,
+            "cost_per_1m_tokens": self.cost_per_1m_tokens,
+            "circuit": self.transport.breaker.state,
+            "ttft_p50_s": get_metrics().percentile(f"llm.{self.name}.ttft_s", 50)
+        }
+
+
+class _GroqTextStream:
+    def __init__(self, response):
+        self.response = response
+
+    def __iter__(self):
+        for chunk in self.response:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+    def close(self):
+        self.response.close()
+
+
+class GroqBackend(LLMBackend):
+    name = "groq"
+
+    def __init__(self, api_key: str, model: str, cost_per_1m_tokens: float = 0.0):
+        from groq import Groq
+
+        super().__init__(model, cost_per_1m_tokens)
+        self.http_client = build_http_client()
+        self.client = Groq(api_key=api_key, http_client=self.http_client, max_retries=0)
+
+    def open_stream(self, messages, temperature, max_tokens, timeout, reasoning_effort):
+        return _GroqTextStream(self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_completion_tokens=max_tokens,
+            timeout=timeout,
+            stream=True,
+            reasoning_effort=reasoning_effort,
+            top_p=1,
+            stop=None
+        ))
+
+
+class _SSETextStream:
+    def __init__(self, response: httpx.Response):
+        self.response = response
+
+    def __iter__(self):
+        try:
+            for line in self.response.iter_lines():
+                if not line.startswith("data:"):
+                    continue
+
+                data = line[5:].strip()
+                if data == "[DONE]":
+                    break
+
+                choices = json.loads(data).get("choices") or []
+                if choices:
+                    content = (choices[0].get("delta") or {}).get("content")
+                    if content:
+                        yield content
+        finally:
+            self.response.close()
+
+    def close(self):
+        self.response.close()
+
+
+class OpenAICompatibleBackend(LLMBackend):
+    name = "openai_compatible"
+
+    def __init__(self, base_url: str, model: str, api_key: Optional[str] = None,
+                 cost_per_1m_tokens: float = 0.0, send_reasoning_effort: bool = False):
+        super().__init__(model, cost_per_1m_tokens)
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.api_key = api_key
+        self.send_reasoning_effort = send_reasoning_effort
+        self.http_client = build_http_client()
+
+    def open_stream(self, messages, temperature, max_tokens, timeout, reasoning_effort):
+        payload = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+            "stream": True
+        }
+        if self.send_reasoning_effort and reasoning_effort:
+            payload["reasoning_effort"] = reasoning_effort
+
+        headers = {"Accept": "text/event-stream"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+
+        request = self.http_client.build_request(
+            "POST", self.url, json=payload, headers=headers,
+            timeout=httpx.Timeout(timeout, connect=settings.LLM_CONNECT_TIMEOUT)
+        )
+        response = self.http_client.send(request, stream=True)
+
+        if response.status_code >= 400:
+            body = response.read().decode("utf-8", errors="replace")[:200]
+            response.close()
+            raise LLMBackendError(
+                f"{self.name} returned HTTP {response.status_code}: {body}",
+                status_code=response.status_code,
+                response=response
+            )
+
+        return _SSETextStream(response)
+
+
+class _StubTextStream:
+    def __init__(self, tokens: List[str], first_token_delay: float, token_delay: float):
+        self.tokens = tokens
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.closed = threading.Event()
+
+    def __iter__(self):
+        if self.closed.wait(self.first_token_delay):
+            return
+        for i, token in enumerate(self.tokens):
+            if i and self.closed.wait(self.token_delay):
+                return
+            yield token
+
+    def close(self):
+        self.closed.set()
+
+
+def stub_tokens(response: str, max_tokens: Optional[int] = None) -> List[str]:
+    words = response.split(" ")
+    tokens = [word + " " for word in words[:-1]] + words[-1:]
+    return tokens[:max_tokens] if max_tokens else tokens
+
+
+class StubBackend(LLMBackend):
+    name = "stub"
+
+    def __init__(self, response: Optional[str] = None, first_token_delay_ms: Optional[float] = None,
+                 token_delay_ms: Optional[float] = None):
+        super().__init__("stub", 0.0)
+        self.response = response or settings.LLM_STUB_RESPONSE
+        self.first_token_delay = (first_token_delay_ms if first_token_delay_ms is not None
+                                  else settings.LLM_STUB_FIRST_TOKEN_DELAY_MS) / 1000
+        self.token_delay = (token_delay_ms if token_delay_ms is not None
+                            else settings.LLM_STUB_TOKEN_DELAY_MS) / 1000
+
+    def open_stream(self, messages, temperature, max_tokens, timeout, reasoning_effort):
+        return _StubTextStream(stub_tokens(self.response, max_tokens), self.first_token_delay, self.token_delay)
+
+
+class LLMRouter:
+    def __init__(self, backends: List[LLMBackend], strategy: Optional[str] = None):
+        if not backends:
+            raise ValueError("At least one LLM backend is required")
+
+        self.backends = backends
+        self.strategy = strategy or settings.LLM_ROUTING_STRATEGY
+
+    def _latency(self, backend: LLMBackend) -> float:
+        observed = get_metrics().percentile(f"llm.{backend.name}.ttft_s", 50)
+        return observed if observed is not None else 0.0
+
+    def ordered_backends(self) -> List[LLMBackend]:
+        if self.strategy == "latency":
+            ordered = sorted(self.backends, key=self._latency)
+        elif self.strategy == "cost":
+            ordered = sorted(self.backends, key=lambda b: b.cost_per_1m_tokens)
+        elif self.strategy == "balanced":
+            max_latency = max(self._latency(b) for b in self.backends) or 1.0
+            max_cost = max(b.cost_per_1m_tokens for b in self.backends) or 1.0
+            weight = settings.LLM_ROUTING_COST_WEIGHT
+            ordered = sorted(self.backends, key=lambda b: (
+                (1 - weight) * self._latency(b) / max_latency + weight * b.cost_per_1m_tokens / max_cost
+            ))
+        else:
+            ordered = list(self.backends)
+
+        return sorted(ordered, key=lambda b: b.transport.breaker.state == "open")
+
+    def stream(
+        self,
+        messages: List[Dict[str, str]],
+        temperature: float,
+        max_tokens: int,
+        timeout: float,
+        reasoning_effort: Optional[str],
+        span=None
+    ):
+        last_error: Optional[BaseException] = None
+
+        for backend in self.ordered_backends():
+            def open_stream(backend=backend):
+                return backend.open_stream(messages, temperature, max_tokens, timeout, reasoning_effort)
+
+            started = False
+            try:
+                for token in backend.transport.stream(open_stream, total_timeout=timeout):
+                    if not started:
+                        started = True
+                        if span is not None:
+                            span.set_attribute("llm.backend", backend.name)
+                        get_metrics().increment(f"llm.router.{backend.name}.selected")
+                    yield token
+                return
+
+            except RequestCancelled:
+                raise
+
+            except Exception as e:
+                if started:
+                    raise
+                last_error = e
+                if not isinstance(e, CircuitOpenError):
+                    logger.warning(f"LLM backend {backend.name} failed before first token: {e}")
+                get_metrics().increment(f"llm.router.{backend.name}.failovers")
+
+        raise last_error
+
+    def get_info(self) -> Dict:
+        return {
+            "strategy": self.strategy,
+            "backends": [backend.get_info() for backend in self.backends]
+        }
+
+
+def build_backends(api_key: Optional[str] = None, model: Optional[str] = None) -> List[LLMBackend]:
+    backends: List[LLMBackend] = []
+
+    for name in settings.get_llm_backends():
+        if name == "groq":
+            key = api_key or settings.GROQ_API_KEY
+            if not key:
+                raise ValueError("GROQ_API_KEY is required")
+            backends.append(GroqBackend(key, model or settings.LLM_MODEL, settings.GROQ_COST_PER_1M_TOKENS))
+        elif name == "openai_compatible":
+            backends.append(OpenAICompatibleBackend(
+                base_url=settings.OPENAI_COMPAT_BASE_URL,
+                model=settings.OPENAI_COMPAT_MODEL or model or settings.LLM_MODEL,
+                api_key=settings.OPENAI_COMPAT_API_KEY,
+                cost_per_1m_tokens=settings.OPENAI_COMPAT_COST_PER_1M_TOKENS,
+                send_reasoning_effort=settings.OPENAI_COMPAT_SEND_REASONING_EFFORT
+            ))
+        elif name == "stub":
+            backends.append(StubBackend())
+        else:
+            logger.warning(f"Unknown LLM backend: {name}, skipping")
+
+    return backends
@@ -1,7 +1,9 @@
 import logging
 from typing import List, Dict, Optional
-from groq import Groq
 from config import settings
+from llm_backends import LLMRouter, build_backends
+from cancellation import RequestCancelled
+import tracing
 
 logger = logging.getLogger(__name__)
 
@@ -11,11 +13,11 @@ def __init__(self, api_key: Optional[str] = None, model: Optional[str] = None):
         self.api_key = api_key or settings.GROQ_API_KEY
         self.model = model or settings.LLM_MODEL
 
-        if not self.api_key:
-            raise ValueError("GROQ_API_KEY is required")
-
-        self.client = Groq(api_key=self.api_key)
-        logger.info(f"LLM Client initialized with model: {self.model}")
+        self.router = LLMRouter(build_backends(api_key=self.api_key, model=self.model))
+        logger.info(
+            f"LLM Client initialized with model: {self.model}, "
+            f"backends: {[b.name for b in self.router.backends]}, routing: {self.router.strategy}"
+        )
 
     def generate_completion_stream(
         self,
@@ -31,31 +33,48 @@ def generate_completion_stream(
         timeout = timeout if timeout is not None else settings.LLM_TIMEOUT
         reasoning_effort = reasoning_effort if reasoning_effort is not None else settings.LLM_REASONING_EFFORT
 
+        complete_span = tracing.start_span("llm.complete", model=self.model, max_tokens=max_tokens)
+        first_byte_span = tracing.start_span("llm.first_byte", model=self.model)
+        chunk_count = 0
+
         try:
-            logger.debug(f"Calling LLM with {len(messages)} messages, temp={temperature}, stream=True")
+            logger.debug("Calling LLM with %d messages, temp=%s, stream=True", len(messages), temperature)
 
-            response = self.client.chat.completions.create(
-                model=self.model,
+            for content in self.router.stream(
                 messages=messages,
                 temperature=temperature,
-                max_completion_tokens=max_tokens,
+                max_tokens=max_tokens,
                 timeout=timeout,
-                stream=True,
                 reasoning_effort=reasoning_effort,
-                top_p=1,
-                stop=None
-            )
-
-            for chunk in response:
-                if chunk.choices[0].delta.content:
-                    yield chunk.choices[0].delta.content
-
-            logger.debug(f"LLM streaming completed")
+                span=complete_span
+            ):
+                if chunk_count == 0:
+                    first_byte_span.end()
+                chunk_count += 1
+                yield content
+
+            complete_span.set_attribute("chunks", chunk_count)
+            logger.debug("LLM streaming completed")
+
+        except RequestCancelled:
+            complete_span.set_attribute("cancelled", True)
+            if chunk_count == 0:
+                first_byte_span.set_attribute("cancelled", True)
+            raise
 
         except Exception as e:
+            complete_span.record_error(e)
+            if chunk_count == 0:
+                first_byte_span.record_error(e)
             logger.error(f"LLM streaming API call failed: {str(e)}")
             raise
 
+        finally:
+            if chunk_count == 0:
+                first_byte_span.set_attribute("received", False)
+            first_byte_span.end()
+            complete_span.end()
+
     def generate_answer_stream(
         self,
         query: str,
@@ -63,9 +82,11 @@ def generate_answer_stream(
         chat_history: Optional[List[Dict]] = None,
         use_history: bool = True,
         temperature: Optional[float] = None,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        reasoning_effort: Optional[str] = None
     ):
 
+        prompt_span = tracing.start_span("prompt_build", contexts=len(contexts))
         system_content = self._get_system_prompt()
 
         if use_history and chat_history:
@@ -97,11 +118,13 @@ def generate_answer_stream(
             "role": "user",
             "content": query
         })
+        prompt_span.end()
 
         return self.generate_completion_stream(
             messages=messages,
             temperature=temperature,
-            max_tokens=max_tokens
+            max_tokens=max_tokens,
+            reasoning_effort=reasoning_effort
         )
 
     def _build_history_context(self, user_questions: List[Dict]) -> str:
@@ -142,7 +165,7 @@ def _build_context_info(self, contexts: List[Dict]) -> str:
                     context_parts.append(f"Nguồn {i}:\n{text}\n")
 
             href = context.get("href", "")
-            if href:
+            if href and href not in text:
                 context_parts.append(f"Đường dẫn: {href}\n")
 
             context_parts.append("---\n")
@@ -213,3 +236,11 @@ def get_llm_client() -> LLMClient:
         _llm_client_instance = LLMClient()
 
     return _llm_client_instance
+
+
+def get_llm_info() -> Dict:
+    if _llm_client_instance is None:
+        return {"initialized": False, "backends": settings.get_llm_backends(),
+                "strategy": settings.LLM_ROUTING_STRATEGY}
+
+    return {"initialized": True, **_llm_client_instance.router.get_info()}
@@ -0,0 +1,319 @@
+import logging
+import queue
+import random
+import threading
+import time
+from typing import Callable, Iterable, List, Optional
+import httpx
+from config import settings
+from cancellation import RequestCancelled, get_cancel_scope
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class FirstTokenTimeout(TimeoutError):
+    pass
+
+
+class StreamTimeout(TimeoutError):
+    pass
+
+
+def build_http_client() -> httpx.Client:
+    return httpx.Client(
+        limits=httpx.Limits(
+            max_connections=settings.LLM_POOL_MAX_CONNECTIONS,
+            max_keepalive_connections=settings.LLM_POOL_MAX_KEEPALIVE,
+            keepalive_expiry=settings.LLM_POOL_KEEPALIVE_EXPIRY
+        ),
+        timeout=httpx.Timeout(settings.LLM_TIMEOUT, connect=settings.LLM_CONNECT_TIMEOUT)
+    )
+
+
+def is_retryable(error: BaseException) -> bool:
+    status_code = getattr(error, "status_code", None)
+    if status_code is not None:
+        return status_code in RETRYABLE_STATUS_CODES
+
+    return isinstance(error, (FirstTokenTimeout, TimeoutError, ConnectionError, httpx.TransportError)) or \
+        type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+
+    value = headers.get("retry-after")
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def backoff_delay(attempt: int) -> float:
+    cap = min(settings.LLM_RETRY_BACKOFF_MAX, settings.LLM_RETRY_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+class CircuitBreaker:
+    def __init__(self, name: str, failure_threshold: Optional[int] = None, reset_timeout: Optional[float] = None):
+        self.name = name
+        self.failure_threshold = failure_threshold or settings.LLM_CIRCUIT_FAILURE_THRESHOLD
+        self.reset_timeout = reset_timeout or settings.LLM_CIRCUIT_RESET_TIMEOUT
+        self._lock = threading.Lock()
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probe_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return "closed"
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def before_request(self) -> None:
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return
+            if state == "half_open" and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+
+        get_metrics().increment(f"llm.{self.name}.circuit_rejected")
+        raise CircuitOpenError(f"Circuit breaker for {self.name} is open")
+
+    def release_probe(self) -> None:
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info(f"Circuit breaker for {self.name} closed")
+            self._failures = 0
+            self._opened_at = None
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._probe_in_flight = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                if self._opened_at is None:
+                    logger.warning(f"Circuit breaker for {self.name} opened after {self._failures} failures")
+                    get_metrics().increment(f"llm.{self.name}.circuit_opened")
+                self._opened_at = time.monotonic()
+
+
+class _StreamWorker:
+    def __init__(self, open_stream: Callable[[], Iterable[str]], out_queue: queue.Queue, name: str):
+        self.open_stream = open_stream
+        self.out_queue = out_queue
+        self.stream = None
+        self.cancelled = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        try:
+            self.stream = self.open_stream()
+            if self.cancelled.is_set():
+                self._close()
+                return
+            for token in self.stream:
+                if self.cancelled.is_set():
+                    break
+                self.out_queue.put((self, "token", token))
+            self.out_queue.put((self, "done", None))
+        except Exception as e:
+            self.out_queue.put((self, "error", e))
+        finally:
+            if self.cancelled.is_set():
+                self._close()
+
+    def _close(self) -> None:
+        close = getattr(self.stream, "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+
+    def cancel(self) -> None:
+        self.cancelled.set()
+        self._close()
+
+
+class ResilientStreamer:
+    def __init__(self, name: str):
+        self.name = name
+        self.breaker = CircuitBreaker(name)
+
+    def hedge_delay(self) -> Optional[float]:
+        if not settings.LLM_ENABLE_HEDGING:
+            return None
+
+        metrics = get_metrics()
+        observed = metrics.percentile(f"llm.{self.name}.ttft_s", settings.LLM_HEDGE_PERCENTILE)
+        if observed is None or metrics.get_counter(f"llm.{self.name}.first_tokens") < settings.LLM_HEDGE_MIN_SAMPLES:
+            return settings.LLM_HEDGE_INITIAL_DELAY
+        return max(settings.LLM_HEDGE_MIN_DELAY, observed)
+
+    def stream(
+        self,
+        open_stream: Callable[[], Iterable[str]],
+        first_token_timeout: Optional[float] = None,
+        total_timeout: Optional[float] = None
+    ):
+        first_token_timeout = first_token_timeout or settings.LLM_FIRST_TOKEN_TIMEOUT
+        total_timeout = total_timeout or settings.LLM_TIMEOUT
+        metrics = get_metrics()
+
+        self.breaker.before_request()
+
+        request_start = time.monotonic()
+        attempt = 0
+        workers: List[_StreamWorker] = []
+        out_queue: queue.Queue = queue.Queue()
+        winner = None
+        cancel_scope = get_cancel_scope()
+
+        def on_cancel():
+            metrics.increment(f"llm.{self.name}.cancelled")
+            for worker in list(workers):
+                worker.cancel()
+            out_queue.put((None, "cancelled", None))
+
+        if cancel_scope is not None:
+            cancel_scope.add_callback(on_cancel)
+
+        try:
+            while True:
+                out_queue = queue.Queue()
+                if cancel_scope is not None:
+                    cancel_scope.raise_if_cancelled()
+                attempt_start = time.monotonic()
+                workers = [_StreamWorker(open_stream, out_queue, f"llm-{self.name}-{attempt}")]
+                hedge_delay = self.hedge_delay()
+                hedge_at = attempt_start + hedge_delay if hedge_delay is not None else None
+                first_token_deadline = attempt_start + first_token_timeout
+                winner = None
+                first_item = None
+                error: Optional[BaseException] = None
+
+                while winner is None and error is None:
+                    now = time.monotonic()
+                    wait_until = min(first_token_deadline, hedge_at) if hedge_at else first_token_deadline
+                    try:
+                        worker, kind, payload = out_queue.get(timeout=max(0.0, wait_until - now))
+                    except queue.Empty:
+                        if hedge_at is not None and time.monotonic() >= hedge_at:
+                            logger.info(f"LLM first token not received after {hedge_delay:.2f}s, sending hedged request")
+                            metrics.increment(f"llm.{self.name}.hedges_fired")
+                            workers.append(_StreamWorker(open_stream, out_queue, f"llm-{self.name}-{attempt}-hedge"))
+                            hedge_at = None
+                        elif time.monotonic() >= first_token_deadline:
+                            error = FirstTokenTimeout(f"No first token from {self.name} within {first_token_timeout}s")
+                        continue
+
+                    if kind == "cancelled":
+                        raise RequestCancelled(f"LLM request to {self.name} cancelled before first token")
+
+                    if worker.cancelled.is_set():
+                        continue
+
+                    if kind == "error":
+                        workers.remove(worker)
+                        if not workers:
+                            error = payload
+                        continue
+
+                    winner = worker
+                    first_item = (kind, payload)
+
+                if winner is not None:
+                    break
+
+                for worker in workers:
+                    worker.cancel()
+                # Client errors (400, 401, ...) say nothing about the provider's health, so they don't trip the breaker
+                if is_retryable(error):
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.release_probe()
+                metrics.increment(f"llm.{self.name}.failures")
+
+                if attempt >= settings.LLM_MAX_RETRIES or not is_retryable(error):
+                    raise error
+
+                delay = retry_after_seconds(error)
+                delay = min(delay, settings.LLM_RETRY_BACKOFF_MAX) if delay is not None else backoff_delay(attempt)
+                if time.monotonic() + delay - request_start >= total_timeout:
+                    raise error
+
+                logger.warning(f"LLM request to {self.name} failed before first token ({error}), "
+                               f"retrying in {delay:.2f}s (attempt {attempt + 1}/{settings.LLM_MAX_RETRIES})")
+                metrics.increment(f"llm.{self.name}.retries")
+                if cancel_scope is None:
+                    time.sleep(delay)
+                elif cancel_scope.wait(delay):
+                    raise RequestCancelled(f"LLM request to {self.name} cancelled during retry backoff")
+                self.breaker.before_request()
+                attempt += 1
+
+            for worker in workers:
+                if worker is not winner:
+                    worker.cancel()
+            if len(workers) > 1 and winner is workers[-1]:
+                metrics.increment(f"llm.{self.name}.hedges_won")
+
+            ttft = time.monotonic() - request_start
+            metrics.observe(f"llm.{self.name}.ttft_s", ttft)
+            metrics.increment(f"llm.{self.name}.first_tokens")
+            self.breaker.record_success()
+
+            kind, payload = first_item
+            while kind != "done":
+                if kind == "error":
+                    metrics.increment(f"llm.{self.name}.stream_errors")
+                    raise payload
+
+                yield payload
+
+                while True:
+                    remaining = total_timeout - (time.monotonic() - request_start)
+                    try:
+                        worker, kind, payload = out_queue.get(timeout=max(0.0, remaining))
+                    except queue.Empty:
+                        metrics.increment(f"llm.{self.name}.stream_timeouts")
+                        raise StreamTimeout(f"LLM stream from {self.name} exceeded {total_timeout}s")
+                    if kind == "cancelled":
+                        raise RequestCancelled(f"LLM stream from {self.name} cancelled")
+                    if worker is winner:
+                        break
+
+            metrics.observe(f"llm.{self.name}.stream_s", time.monotonic() - request_start)
+
+        except RequestCancelled:
+            if winner is None:
+                self.breaker.release_probe()
+            raise
+
+        finally:
+            if cancel_scope is not None:
+                cancel_scope.remove_callback(on_cancel)
+            for worker in workers:
+                if worker.thread.is_alive():
+                    worker.cancel()
@@ -1,25 +1,41 @@
 import logging
+import logging.handlers
+import os
 import sys
 import json
 import time
 import uuid
-from datetime import datetime
-from typing import Callable
-from fastapi import Request, Response
-from starlette.middleware.base import BaseHTTPMiddleware
+import zlib
+import queue
+import atexit
+import threading
+from datetime import datetime, timezone
+from typing import List, Optional
+from fastapi import Request
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from config import settings
+from metrics import get_metrics
+import tracing
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+_STOP = object()
 
 
 class JSONFormatter(logging.Formatter):
     def format(self, record: logging.LogRecord) -> str:
         log_data = {
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).replace(tzinfo=None).isoformat(),
             "level": record.levelname,
             "logger": record.name,
             "message": record.getMessage(),
         }
 
-        if hasattr(record, "trace_id"):
+        if getattr(record, "trace_id", None):
             log_data["trace_id"] = record.trace_id
 
         if record.exc_info:
@@ -28,17 +44,154 @@ def format(self, record: logging.LogRecord) -> str:
         if hasattr(record, "extra_data"):
             log_data.update(record.extra_data)
 
-        return json.dumps(log_data, ensure_ascii=False)
+        if orjson is not None:
+            return orjson.dumps(log_data, default=str).decode("utf-8")
+        return json.dumps(log_data, ensure_ascii=False, default=str)
+
+
+class TraceContextFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        if getattr(record, "trace_id", None) is None:
+            record.trace_id = tracing.get_trace_id()
+        return True
+
+
+class RequestSamplingFilter(logging.Filter):
+    def __init__(self, rate: float):
+        super().__init__()
+        self.threshold = int(rate * 10000)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or getattr(record, "always_log", False):
+            return True
+
+        trace_id = getattr(record, "trace_id", None)
+        if not trace_id:
+            return True
+        return zlib.crc32(trace_id.encode("utf-8")) % 10000 < self.threshold
+
+
+class BatchStreamHandler(logging.StreamHandler):
+    def emit_batch(self, records: List[logging.LogRecord]) -> None:
+        lines = []
+        for record in records:
+            if record.levelno < self.level:
+                continue
+            try:
+                lines.append(self.format(record))
+            except Exception:
+                self.handleError(record)
+
+        if not lines:
+            return
+
+        self.acquire()
+        try:
+            self.stream.write(self.terminator.join(lines) + self.terminator)
+            self.flush()
+        except Exception:
+            self.handleError(records[-1])
+        finally:
+            self.release()
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            get_metrics().increment("logging.dropped")
+
+
+class BatchingQueueListener:
+    def __init__(self, log_queue: queue.Queue, handler: BatchStreamHandler, batch_size: int):
+        self.queue = log_queue
+        self.handler = handler
+        self.batch_size = batch_size
+        self.thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self.thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            record = self.queue.get()
+            if record is _STOP:
+                break
+
+            batch = [record]
+            while len(batch) < self.batch_size:
+                try:
+                    record = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+                if record is _STOP:
+                    stopping = True
+                    break
+                batch.append(record)
+
+            self.handler.emit_batch(batch)
+
+    def stop(self, timeout: float = 5.0) -> None:
+        if self.thread is None or not self.thread.is_alive():
+            return
+        try:
+            self.queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            return
+        self.thread.join(timeout)
+
+
+_listener: Optional[BatchingQueueListener] = None
+
+
+def _stop_listener() -> None:
+    if _listener is not None:
+        _listener.stop()
+
+
+def _restart_listener_after_fork() -> None:
+    if _listener is not None:
+        _listener.start()
+
+
+atexit.register(_stop_listener)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listener_after_fork)
 
 
 def setup_logging():
+    global _listener
+
     if settings.ENABLE_JSON_LOGGING:
         formatter = JSONFormatter()
     else:
         formatter = logging.Formatter(settings.LOG_FORMAT)
 
-    handler = logging.StreamHandler(sys.stdout)
-    handler.setFormatter(formatter)
+    stream_handler = BatchStreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+
+    _stop_listener()
+    _listener = None
+
+    if settings.ENABLE_ASYNC_LOGGING:
+        log_queue: queue.Queue = queue.Queue(settings.LOG_QUEUE_SIZE)
+        handler = NonBlockingQueueHandler(log_queue)
+        _listener = BatchingQueueListener(log_queue, stream_handler, settings.LOG_BATCH_SIZE)
+        _listener.start()
+    else:
+        handler = stream_handler
+
+    handler.addFilter(TraceContextFilter())
+    if settings.LOG_SAMPLE_RATE < 1.0:
+        handler.addFilter(RequestSamplingFilter(settings.LOG_SAMPLE_RATE))
 
     root_logger = logging.getLogger()
     root_logger.setLevel(settings.LOG_LEVEL)
@@ -52,74 +205,124 @@ def setup_logging():
     return root_logger
 
 
-class LoggingMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        trace_id = str(uuid.uuid4())
-        request.state.trace_id = trace_id
+class LoggingMiddleware:
+    def __init__(self, app: ASGIApp):
+        self.app = app
 
-        logger = logging.getLogger(__name__)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
 
-        start_time = time.time()
+        trace_id = str(uuid.uuid4())
+        scope.setdefault("state", {})["trace_id"] = trace_id
+        method = scope["method"]
+        path = scope["path"]
+        trace_token = tracing.bind_trace_id(trace_id)
+        trace = tracing.start_trace(trace_id, attributes={
+            "http.method": method,
+            "http.target": path
+        })
 
-        logger.info(
-            f"Request started: {request.method} {request.url.path}",
-            extra={"trace_id": trace_id}
-        )
+        logger = logging.getLogger(__name__)
+        logger.info("Request started: %s %s", method, path, extra={"trace_id": trace_id})
+
+        start_time = time.monotonic()
+        status_code = 500
+        ttfb = None
+        bytes_sent = 0
+        completed = False
+        disconnected = False
+
+        async def receive_wrapper() -> Message:
+            nonlocal disconnected
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                disconnected = True
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code, ttfb, bytes_sent, completed
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = MutableHeaders(scope=message)
+                headers.append("X-Trace-ID", trace_id)
+                headers.append("X-Process-Time", f"{time.monotonic() - start_time:.3f}")
+            elif message["type"] == "http.response.body":
+                body = message.get("body", b"")
+                if body and ttfb is None:
+                    ttfb = time.monotonic() - start_time
+                bytes_sent += len(body)
+                if not message.get("more_body", False):
+                    completed = True
+            await send(message)
 
         try:
-            response = await call_next(request)
-
-            process_time = time.time() - start_time
-
-            response.headers["X-Trace-ID"] = trace_id
-            response.headers["X-Process-Time"] = f"{process_time:.3f}"
-
-            logger.info(
-                f"Request completed: {request.method} {request.url.path} "
-                f"status={response.status_code} time={process_time:.3f}s",
-                extra={"trace_id": trace_id, "extra_data": {
-                    "method": request.method,
-                    "path": request.url.path,
-                    "status_code": response.status_code,
-                    "process_time": process_time
-                }}
-            )
-
-            return response
+            await self.app(scope, receive_wrapper, send_wrapper)
 
         except Exception as e:
-            process_time = time.time() - start_time
-
             logger.error(
-                f"Request failed: {request.method} {request.url.path} "
-                f"error={str(e)} time={process_time:.3f}s",
+                f"Request failed: {method} {path} "
+                f"error={str(e)} time={time.monotonic() - start_time:.3f}s",
                 exc_info=True,
                 extra={"trace_id": trace_id}
             )
-
+            if trace is not None:
+                trace.root.record_error(e)
             raise
 
+        finally:
+            duration = time.monotonic() - start_time
+            disconnected = disconnected and not completed
+
+            metrics = get_metrics()
+            metrics.observe("http.duration_s", duration)
+            metrics.increment("http.bytes_sent", bytes_sent)
+            if ttfb is not None:
+                metrics.observe("http.ttfb_s", ttfb)
+            if disconnected:
+                metrics.increment("http.disconnects")
+
+            if trace is not None:
+                trace.root.set_attribute("http.status_code", status_code)
+                trace.root.set_attribute("http.response_bytes", bytes_sent)
+                trace.root.set_attribute("http.disconnected", disconnected)
+                tracing.finish_trace(trace)
+
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    f"Request completed: {method} {path} status={status_code} "
+                    f"ttfb={ttfb or 0:.3f}s time={duration:.3f}s bytes={bytes_sent}"
+                    f"{' (client disconnected)' if disconnected else ''}",
+                    extra={"trace_id": trace_id, "always_log": (
+                        status_code >= 400 or disconnected or duration * 1000 >= settings.TRACING_SLOW_REQUEST_MS
+                    ), "extra_data": {
+                        "method": method,
+                        "path": path,
+                        "status_code": status_code,
+                        "ttfb": ttfb,
+                        "process_time": duration,
+                        "bytes_sent": bytes_sent,
+                        "disconnected": disconnected
+                    }}
+                )
+
+            tracing.unbind_trace_id(trace_token)
+
 
 class LogContext:
     def __init__(self, trace_id: str):
         self.trace_id = trace_id
-        self.old_factory = None
+        self._token = None
 
     def __enter__(self):
-        old_factory = logging.getLogRecordFactory()
-
-        def record_factory(*args, **kwargs):
-            record = old_factory(*args, **kwargs)
-            record.trace_id = self.trace_id
-            return record
-
-        self.old_factory = old_factory
-        logging.setLogRecordFactory(record_factory)
+        self._token = tracing.bind_trace_id(self.trace_id)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if self.old_factory:
-            logging.setLogRecordFactory(self.old_factory)
+        if self._token is not None:
+            tracing.unbind_trace_id(self._token)
+            self._token = None
 
 
 def get_trace_id(request: Request) -> str:
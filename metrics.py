@@ -0,0 +1,86 @@
+import threading
+from collections import deque
+from typing import Any, Deque, Dict, Optional
+
+
+class MetricsRegistry:
+    def __init__(self, window: int = 1000):
+        self.window = window
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = {}
+        self._gauges: Dict[str, float] = {}
+        self._summaries: Dict[str, Deque[float]] = {}
+        self._summary_counts: Dict[str, int] = {}
+
+    def increment(self, name: str, value: float = 1) -> None:
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def set_gauge(self, name: str, value: float) -> None:
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name: str, value: float) -> None:
+        with self._lock:
+            samples = self._summaries.get(name)
+            if samples is None:
+                samples = self._summaries[name] = deque(maxlen=self.window)
+            samples.append(value)
+            self._summary_counts[name] = self._summary_counts.get(name, 0) + 1
+
+    def get_counter(self, name: str) -> float:
+        return self._counters.get(name, 0)
+
+    def percentile(self, name: str, percentile: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._summaries.get(name, ()))
+        return _percentile(samples, percentile)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._summaries.clear()
+            self._summary_counts.clear()
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            summaries = {name: sorted(samples) for name, samples in self._summaries.items()}
+            counts = dict(self._summary_counts)
+
+        return {
+            "counters": counters,
+            "gauges": gauges,
+            "summaries": {
+                name: {
+                    "count": counts.get(name, 0),
+                    "window": len(samples),
+                    "p50": _percentile(samples, 50),
+                    "p95": _percentile(samples, 95),
+                    "p99": _percentile(samples, 99),
+                    "max": samples[-1] if samples else None
+                }
+                for name, samples in summaries.items()
+            }
+        }
+
+
+def _percentile(sorted_samples, percentile: float) -> Optional[float]:
+    if not sorted_samples:
+        return None
+    index = min(len(sorted_samples) - 1, max(0, int(round(percentile / 100 * len(sorted_samples))) - 1))
+    return round(sorted_samples[index], 6)
+
+
+_metrics_instance: Optional[MetricsRegistry] = None
+
+
+def get_metrics() -> MetricsRegistry:
+    global _metrics_instance
+
+    if _metrics_instance is None:
+        _metrics_instance = MetricsRegistry()
+
+    return _metrics_instance
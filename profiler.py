@@ -0,0 +1,232 @@
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from typing import Any, Dict, List, Optional
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilerBusyError(RuntimeError):
+    pass
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    module = os.path.splitext(os.path.basename(code.co_filename))[0]
+    return f"{module}:{code.co_name}:{frame.f_lineno}"
+
+
+class SamplingProfiler:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stop_event = threading.Event()
+        self._stacks: Counter = Counter()
+        self._samples = 0
+        self._started_at: Optional[float] = None
+        self._finished_at: Optional[float] = None
+        self._interval = settings.PROFILING_SAMPLE_INTERVAL_MS / 1000
+        self._mode: Optional[str] = None
+        self._target_requests = 0
+        self._started_requests = 0
+        self._finished_requests = 0
+        self.requests_armed = False
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, seconds: Optional[float] = None, requests: Optional[int] = None,
+              interval_ms: Optional[float] = None) -> None:
+        with self._lock:
+            if self.running or self.requests_armed:
+                raise ProfilerBusyError("A CPU profiling session is already active")
+
+            self._stacks = Counter()
+            self._samples = 0
+            self._finished_at = None
+            self._stop_event.clear()
+            if interval_ms:
+                self._interval = interval_ms / 1000
+
+            if requests:
+                self._mode = "requests"
+                self._target_requests = requests
+                self._started_requests = 0
+                self._finished_requests = 0
+                self._started_at = None
+                self.requests_armed = True
+                logger.info(f"CPU profiler armed for the next {requests} chat requests")
+                return
+
+            seconds = seconds or settings.PROFILING_MAX_SECONDS
+            self._mode = "duration"
+            self._start_sampling(seconds)
+            logger.info(f"CPU profiler started for {seconds}s")
+
+    def _start_sampling(self, max_seconds: float) -> None:
+        self._started_at = time.time()
+        self._thread = threading.Thread(
+            target=self._run, args=(min(max_seconds, settings.PROFILING_MAX_SECONDS),),
+            name="cpu-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            self.requests_armed = False
+            self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def request_started(self) -> bool:
+        with self._lock:
+            if not self.requests_armed or self._started_requests >= self._target_requests:
+                return False
+            self._started_requests += 1
+            if not self.running:
+                self._start_sampling(settings.PROFILING_MAX_SECONDS)
+            return True
+
+    def request_finished(self) -> None:
+        with self._lock:
+            self._finished_requests += 1
+            if self._finished_requests < self._target_requests:
+                return
+            self.requests_armed = False
+            self._stop_event.set()
+        logger.info(f"CPU profiler finished after {self._finished_requests} chat requests")
+
+    def _run(self, max_seconds: float) -> None:
+        own_id = threading.get_ident()
+        deadline = time.monotonic() + max_seconds
+
+        while not self._stop_event.is_set() and time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame))
+                    frame = frame.f_back
+                labels.reverse()
+
+                self._stacks[";".join(labels)] += 1
+
+            self._samples += 1
+            self._stop_event.wait(self._interval)
+
+        self._finished_at = time.time()
+        self.requests_armed = False
+
+    def folded(self) -> str:
+        return "\n".join(f"{stack} {count}" for stack, count in self._stacks.most_common())
+
+    def get_status(self) -> Dict[str, Any]:
+        end = self._finished_at or time.time()
+        return {
+            "running": self.running,
+            "mode": self._mode,
+            "requests_armed": self.requests_armed,
+            "target_requests": self._target_requests,
+            "finished_requests": self._finished_requests,
+            "samples": self._samples,
+            "unique_stacks": len(self._stacks),
+            "interval_ms": self._interval * 1000,
+            "duration_s": round(end - self._started_at, 3) if self._started_at else 0.0
+        }
+
+
+def start_memory_tracing(frames: Optional[int] = None) -> None:
+    if tracemalloc.is_tracing():
+        raise ProfilerBusyError("tracemalloc is already tracing")
+
+    frames = frames or settings.PROFILING_TRACEMALLOC_FRAMES
+    tracemalloc.start(frames)
+    logger.info(f"tracemalloc started with {frames} frames")
+
+
+def stop_memory_tracing() -> None:
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+        logger.info("tracemalloc stopped")
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    if not tracemalloc.is_tracing():
+        raise RuntimeError("tracemalloc is not running, start memory tracing first")
+
+    return tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        tracemalloc.Filter(False, "<unknown>"),
+    ))
+
+
+def memory_top_stats(limit: int = 25, group_by: str = "lineno") -> Dict[str, Any]:
+    snapshot = _snapshot()
+    stats = snapshot.statistics(group_by)
+    current, peak = tracemalloc.get_traced_memory()
+
+    top: List[Dict[str, Any]] = []
+    for stat in stats[:limit]:
+        # Frames are ordered oldest first, so the allocation site is the last one
+        frame = stat.traceback[-1]
+        entry = {
+            "location": f"{frame.filename}:{frame.lineno}",
+            "size_kb": round(stat.size / 1024, 1),
+            "count": stat.count
+        }
+        if group_by == "traceback":
+            entry["traceback"] = [f"{f.filename}:{f.lineno}" for f in stat.traceback]
+        top.append(entry)
+
+    return {
+        "traced_current_mb": round(current / 1024 ** 2, 2),
+        "traced_peak_mb": round(peak / 1024 ** 2, 2),
+        "group_by": group_by,
+        "top": top
+    }
+
+
+def memory_folded() -> str:
+    snapshot = _snapshot()
+    stacks: Counter = Counter()
+
+    for stat in snapshot.statistics("traceback"):
+        labels = []
+        for frame in stat.traceback:
+            module = os.path.splitext(os.path.basename(frame.filename))[0]
+            labels.append(f"{module}:{frame.lineno}")
+        stacks[";".join(labels)] += stat.size
+
+    return "\n".join(f"{stack} {size}" for stack, size in stacks.most_common())
+
+
+def get_memory_status() -> Dict[str, Any]:
+    tracing = tracemalloc.is_tracing()
+    current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+    return {
+        "tracing": tracing,
+        "frames": tracemalloc.get_traceback_limit() if tracing else 0,
+        "traced_current_mb": round(current / 1024 ** 2, 2),
+        "traced_peak_mb": round(peak / 1024 ** 2, 2)
+    }
+
+
+_profiler_instance: Optional[SamplingProfiler] = None
+
+
+def get_profiler() -> SamplingProfiler:
+    global _profiler_instance
+
+    if _profiler_instance is None:
+        _profiler_instance = SamplingProfiler()
+
+    return _profiler_instance
@@ -0,0 +1,104 @@
+import re
+import logging
+from typing import Dict, List, Optional
+from config import settings
+from tokenizer import get_tokenizer, fold_diacritics
+from metrics import get_metrics
+import tracing
+
+logger = logging.getLogger(__name__)
+
+QUERY_CLASSES = ("small_talk", "faq", "procedural", "general", "out_of_scope")
+
+REASONING_EFFORTS = ("minimal", "low", "medium", "high")
+
+# Matched against the lowercased, diacritic-folded query so toneless input is covered
+SMALL_TALK_MARKERS = re.compile(
+    r"^(xin chao|chao|hello|hi|hey|alo|cam on|thank|thanks|ok|oke|okay|tam biet|bye|good (morning|night))\b"
+)
+PROCEDURAL_MARKERS = re.compile(
+    r"\b(thu tuc|cac buoc|quy trinh|trinh tu|ho so|giay to|lam the nao|lam sao|cach (lam|dang ky|nop|xin|lam lai)|"
+    r"can nhung gi|can gi|o dau|bao lau|mat bao lau)\b"
+)
+
+
+def _folded(query: str) -> List[str]:
+    return [fold_diacritics(s) for s in get_tokenizer().syllables(query)]
+
+
+def _top_similarity(contexts: List[Dict]) -> Optional[float]:
+    distances = [ctx["faiss_distance"] for ctx in contexts if "faiss_distance" in ctx]
+    return 1.0 - min(distances) / 2 if distances else None
+
+
+def _label(query: str, contexts: List[Dict], signals: Dict) -> str:
+    syllables = _folded(query)
+    text = " ".join(syllables)
+
+    if len(syllables) <= settings.QUERY_CLASS_SMALL_TALK_MAX_WORDS and SMALL_TALK_MARKERS.search(text):
+        return "small_talk"
+
+    top_rerank = signals.get("top_rerank")
+    top_similarity = signals.get("top_similarity")
+
+    if top_rerank is not None:
+        if top_rerank < settings.QUERY_CLASS_OUT_OF_SCOPE_RERANK:
+            return "out_of_scope"
+    elif top_similarity is None or top_similarity < settings.QUERY_CLASS_OUT_OF_SCOPE_SIMILARITY:
+        return "out_of_scope"
+
+    if contexts and contexts[0].get("type") == "faq":
+        if top_rerank is not None and top_rerank >= settings.QUERY_CLASS_FAQ_RERANK:
+            return "faq"
+        if top_rerank is None and top_similarity is not None and top_similarity >= settings.QUERY_CLASS_FAQ_SIMILARITY:
+            return "faq"
+
+    if PROCEDURAL_MARKERS.search(text) or len(syllables) >= settings.QUERY_CLASS_PROCEDURAL_MIN_WORDS:
+        return "procedural"
+
+    return "general"
+
+
+def classify_query(query: str, contexts: List[Dict]) -> Dict:
+    signals = {
+        "top_rerank": contexts[0].get("rerank_score") if contexts else None,
+        "top_similarity": _top_similarity(contexts)
+    }
+
+    label = _label(query, contexts, signals)
+    effort, max_tokens, context_count = settings.get_query_class_profiles().get(label, (None, None, None))
+
+    plan = {
+        "label": label,
+        "reasoning_effort": effort,
+        "max_tokens": max_tokens,
+        "contexts": context_count,
+        "signals": {name: round(value, 4) for name, value in signals.items() if value is not None}
+    }
+
+    get_metrics().increment(f"query_class.{label}")
+    span = tracing.get_current_span()
+    span.set_attribute("query_class", label)
+
+    logger.info(
+        f"Query class: {label} (reasoning_effort={effort or 'default'}, max_tokens={max_tokens or 'default'}, "
+        f"contexts={'all' if context_count is None else context_count}) signals={plan['signals']}"
+    )
+    return plan
+
+
+def lowest_effort(*efforts: Optional[str]) -> Optional[str]:
+    known = [effort for effort in efforts if effort in REASONING_EFFORTS]
+    return min(known, key=REASONING_EFFORTS.index) if known else None
+
+
+def get_query_classifier_info() -> Dict:
+    metrics = get_metrics()
+    return {
+        "enabled": settings.ENABLE_QUERY_CLASSIFIER,
+        "profiles": {
+            label: {"reasoning_effort": effort, "max_tokens": max_tokens, "contexts": contexts}
+            for label, (effort, max_tokens, contexts) in settings.get_query_class_profiles().items()
+        },
+        "counts": {label: metrics.get_counter(f"query_class.{label}") for label in QUERY_CLASSES}
+    }
@@ -0,0 +1,165 @@
+import re
+import time
+import logging
+from typing import Dict, List, Optional
+from config import settings
+from cache import get_cache
+from hybrid_search import load_bm25_index
+from tokenizer import get_tokenizer, VIETNAMESE_STOPWORDS
+from llm_client import LLMClient, get_llm_client
+from metrics import get_metrics
+import tracing
+
+logger = logging.getLogger(__name__)
+
+# Only anaphora that points back at the previous turn; "như thế nào" / "ra sao" end most standalone questions
+FOLLOW_UP_MARKERS = re.compile(
+    r"^(còn|vậy|thế còn|vậy còn|nếu vậy|vậy thì|thế thì)\b|"
+    r"\b(thì sao|nó|cái đó|việc đó|thủ tục đó|hồ sơ đó|giấy tờ đó|trường hợp đó|như trên)\b",
+    re.IGNORECASE | re.UNICODE
+)
+
+REWRITE_PROMPT = """Bạn viết lại câu hỏi tiếp theo của người dùng thành một câu hỏi độc lập, đầy đủ ngữ cảnh để tìm kiếm tài liệu về Dịch vụ công.
+- Giữ nguyên ý định và ngôn ngữ (tiếng Việt) của câu hỏi.
+- Bổ sung chủ đề/thủ tục được nhắc đến trong các câu hỏi trước nếu câu hỏi hiện tại phụ thuộc vào chúng.
+- Nếu câu hỏi đã độc lập, trả lại nguyên văn.
+- CHỈ trả về câu hỏi đã viết lại, không giải thích."""
+
+
+def _user_turns(chat_history: Optional[List[Dict]]) -> List[str]:
+    if not chat_history:
+        return []
+    return [
+        msg.get("content", "") for msg in chat_history
+        if msg.get("role") == "user" and msg.get("content")
+    ][-settings.QUERY_REWRITE_HISTORY_TURNS:]
+
+
+def is_follow_up(query: str) -> bool:
+    return FOLLOW_UP_MARKERS.search(query.strip()) is not None
+
+
+def _idf_lookup():
+    try:
+        bm25, _, _ = load_bm25_index(settings.BM25_INDEX_PATH)
+        return bm25.idf
+    except Exception:
+        return {}
+
+
+def heuristic_rewrite(query: str, turns: List[str]) -> str:
+    tokenizer = get_tokenizer()
+    idf = _idf_lookup()
+
+    seen = set(tokenizer.syllables(query))
+    candidates = []
+    for position, syllable in enumerate(s for turn in reversed(turns) for s in tokenizer.syllables(turn)):
+        if syllable in seen or syllable in VIETNAMESE_STOPWORDS or len(syllable) < 2 or syllable.isdigit():
+            continue
+        seen.add(syllable)
+        candidates.append((position, syllable))
+
+    salient = sorted(candidates, key=lambda c: (-idf.get(c[1], 0.0), c[0]))[:settings.QUERY_REWRITE_MAX_TERMS]
+    if not salient:
+        return query
+
+    terms = [syllable for _, syllable in sorted(salient)]
+    return f"{query} {' '.join(terms)}"
+
+
+_rewrite_client = None
+
+
+def _get_rewrite_client():
+    global _rewrite_client
+
+    if _rewrite_client is None:
+        if settings.QUERY_REWRITE_MODEL and settings.QUERY_REWRITE_MODEL != settings.LLM_MODEL:
+            _rewrite_client = LLMClient(model=settings.QUERY_REWRITE_MODEL)
+        else:
+            _rewrite_client = get_llm_client()
+
+    return _rewrite_client
+
+
+def llm_rewrite(query: str, turns: List[str]) -> str:
+    cache = get_cache()
+    cache_key = {"kind": "rewrite", "history": "\n".join(turns)}
+
+    cached = cache.get(query, **cache_key)
+    if cached is not None:
+        return cached["query"]
+
+    history = "\n".join(f"{i}. {turn}" for i, turn in enumerate(turns, 1))
+    messages = [
+        {"role": "system", "content": REWRITE_PROMPT},
+        {"role": "user", "content": f"Các câu hỏi trước:\n{history}\n\nCâu hỏi tiếp theo: {query}"}
+    ]
+
+    rewritten = "".join(_get_rewrite_client().generate_completion_stream(
+        messages=messages,
+        temperature=0,
+        max_tokens=settings.QUERY_REWRITE_MAX_TOKENS,
+        timeout=settings.QUERY_REWRITE_TIMEOUT,
+        reasoning_effort="low"
+    ))
+    rewritten = " ".join(rewritten.strip().strip('"').split())
+    if not rewritten or len(rewritten) > settings.MAX_QUERY_LENGTH:
+        rewritten = query
+
+    cache.set(query, {"query": rewritten}, **cache_key)
+    return rewritten
+
+
+def rewrite_query(query: str, chat_history: Optional[List[Dict]] = None) -> str:
+    mode = settings.QUERY_REWRITE_MODE
+    if mode == "off":
+        return query
+
+    turns = _user_turns(chat_history)
+    if not turns or not is_follow_up(query):
+        return query
+
+    metrics = get_metrics()
+    start = time.perf_counter()
+
+    with tracing.span("query_rewrite", mode=mode, turns=len(turns)) as rewrite_span:
+        rewritten = None
+        if mode == "llm":
+            try:
+                rewritten = llm_rewrite(query, turns)
+            except Exception as e:
+                logger.warning(f"LLM query rewrite failed, falling back to heuristic: {e}")
+                metrics.increment("query_rewrite.errors")
+                rewrite_span.record_error(e)
+
+        if rewritten is None:
+            rewritten = heuristic_rewrite(query, turns)
+
+        elapsed = time.perf_counter() - start
+        metrics.observe("query_rewrite.latency_s", elapsed)
+        metrics.increment(f"query_rewrite.{mode}.applied")
+        rewrite_span.set_attribute("changed", rewritten != query)
+
+    logger.info(f"Query rewritten ({mode}, {elapsed * 1000:.1f}ms): '{query[:100]}' -> '{rewritten[:200]}'")
+    return rewritten
+
+
+def get_query_rewrite_info() -> Dict:
+    metrics = get_metrics()
+    hits = metrics.get_counter("cache.rewrite.hits")
+    misses = metrics.get_counter("cache.rewrite.misses")
+    p50 = metrics.percentile("query_rewrite.latency_s", 50)
+    p95 = metrics.percentile("query_rewrite.latency_s", 95)
+
+    return {
+        "mode": settings.QUERY_REWRITE_MODE,
+        "model": settings.QUERY_REWRITE_MODEL or settings.LLM_MODEL,
+        "applied": metrics.get_counter(f"query_rewrite.{settings.QUERY_REWRITE_MODE}.applied"),
+        "errors": metrics.get_counter("query_rewrite.errors"),
+        "latency_p50_ms": round(p50 * 1000, 2) if p50 is not None else None,
+        "latency_p95_ms": round(p95 * 1000, 2) if p95 is not None else None,
+        "cache_hits": hits,
+        "cache_hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0
+    }
+
@@ -1,22 +1,87 @@
 import os
 import json
+import time
 import logging
-from typing import List, Dict, Optional
+import threading
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Optional, Tuple
 from dotenv import load_dotenv
 import faiss
 import pickle
+import numpy as np
 
 from chunking import chunk_faq, chunk_guide
-from embedding import embedding, get_device_info
+from embedding import embedding, embed_query, normalize_query, get_device_info
 from llm_client import get_llm_client
-from reranker import rerank_documents
-from hybrid_search import build_bm25_index, save_bm25_index, hybrid_search
+from reranker import rerank_documents, rerank_documents_batch
+from hybrid_search import (
+    build_bm25_index, save_bm25_index, clear_bm25_index, search_bm25, search_bm25_batch, fuse_results
+)
 from config import settings
+from cache import get_cache
+from faq_matcher import build_faq_index, match_faq
+from intent_gate import match_intent
+from suggestions import build_suggestion_index
+from query_rewriter import rewrite_query
+from metrics import get_metrics
+from cancellation import RequestCancelled
+from degradation import DegradationPolicy, get_degradation_controller
+from query_classifier import classify_query, lowest_effort
+from speculation import get_speculative_retriever
+import tracing
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+faiss_index = None
+faiss_metadata = None
+_index_lock = threading.Lock()
+_retrieval_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def load_vector_index():
+    global faiss_index, faiss_metadata
+
+    if faiss_index is not None:
+        return faiss_index, faiss_metadata
+
+    with _index_lock:
+        if faiss_index is None:
+            index = faiss.read_index(settings.INDEX_PATH)
+            with open(settings.METADATA_PATH, "rb") as f:
+                faiss_metadata = pickle.load(f)
+            faiss_index = index
+            logger.info(f"FAISS index loaded from {settings.INDEX_PATH} with {faiss_index.ntotal} vectors")
+            if faiss_metadata and "title" not in faiss_metadata[0]:
+                logger.warning("Index metadata has no title/href fields, rebuild the index to show source titles")
+
+    return faiss_index, faiss_metadata
+
+
+def clear_vector_index() -> None:
+    global faiss_index, faiss_metadata
+
+    with _index_lock:
+        faiss_index = None
+        faiss_metadata = None
+
+
+def _get_retrieval_executor() -> ThreadPoolExecutor:
+    global _retrieval_executor
+
+    if _retrieval_executor is None:
+        with _executor_lock:
+            if _retrieval_executor is None:
+                _retrieval_executor = ThreadPoolExecutor(
+                    max_workers=settings.RETRIEVAL_WORKERS,
+                    thread_name_prefix="retrieval"
+                )
+
+    return _retrieval_executor
+
 
 def build_index(batch_size: Optional[int] = None) -> None:
     if batch_size is None:
@@ -64,99 +129,415 @@ def build_index(batch_size: Optional[int] = None) -> None:
         save_bm25_index(bm25, corpus_tokens, bm25_metadata, settings.BM25_INDEX_PATH)
         logger.info(f"BM25 index saved to {settings.BM25_INDEX_PATH}")
 
+    if settings.ENABLE_FAQ_FAST_PATH:
+        build_faq_index(faq, batch_size=batch_size)
 
-def search_rag(query: str, k: Optional[int] = None) -> List[Dict]:
-    import time
+    build_suggestion_index(faq, guide)
 
+    clear_vector_index()
+    clear_bm25_index()
+
+
+def search_rag(
+    query: str,
+    k: Optional[int] = None,
+    rerank: Optional[bool] = None,
+    hybrid: Optional[bool] = None
+) -> List[Dict]:
+    cache = get_cache()
+    overrides = {name: False for name, value in (("rerank", rerank), ("hybrid", hybrid)) if value is False}
+
+    with tracing.span("retrieval") as retrieval_span:
+        cached = cache.get(query, k, kind="retrieval", **overrides)
+        if cached is not None:
+            retrieval_span.set_attribute("cache_hit", True)
+            retrieval_span.set_attribute("contexts", len(cached["contexts"]))
+            return cached["contexts"]
+
+        contexts = _search_rag(query, k, rerank=rerank, hybrid=hybrid)
+        retrieval_span.set_attribute("contexts", len(contexts))
+        cache.set(query, {"contexts": contexts}, k, kind="retrieval", **overrides)
+        return contexts
+
+
+def prepare_retrieval(client_id: str, conversation_id: str, query: str) -> str:
+    if not settings.ENABLE_SPECULATIVE_RETRIEVAL:
+        return "disabled"
+
+    if settings.ENABLE_DEGRADATION and get_degradation_controller().evaluate() > 0:
+        get_metrics().increment("speculation.skipped.degraded")
+        return "degraded"
+
+    return get_speculative_retriever().schedule(
+        client_id, conversation_id, query, settings.TOP_K_DEFAULT, search_rag
+    )
+
+
+def search_rag_batch(queries: List[str], k: Optional[int] = None) -> List[List[Dict]]:
     if k is None:
         k = settings.TOP_K_DEFAULT
 
-    start_time = time.time()
+    cache = get_cache()
+    results: List[Optional[List[Dict]]] = [None] * len(queries)
 
-    query = query.strip().lower()
+    pending = []
+    for i, query in enumerate(queries):
+        cached = cache.get(query, k, kind="retrieval")
+        if cached is not None:
+            results[i] = cached["contexts"]
+        else:
+            pending.append(i)
 
-    if settings.ENABLE_RERANKING:
-        initial_k = k * settings.INITIAL_RETRIEVAL_MULTIPLIER
-        logger.debug(f"Searching for: '{query[:100]}...' with initial_k={initial_k} (will rerank to top {k})")
-    else:
-        initial_k = k
-        logger.debug(f"Searching for: '{query[:100]}...' with k={k}")
+    if pending:
+        with tracing.span("retrieval_batch", queries=len(pending)):
+            batch = _search_rag_batch([queries[i] for i in pending], k)
+        for i, contexts in zip(pending, batch):
+            results[i] = contexts
+            cache.set(queries[i], {"contexts": contexts}, k, kind="retrieval")
+
+    return results
+
+
+def _timed(branch: str, fn, *args, **kwargs):
+    start = time.perf_counter()
+    try:
+        return fn(*args, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        get_metrics().observe(f"retrieval.{branch}_s", elapsed)
+        logger.debug("Retrieval branch %s completed in %.3fs", branch, elapsed)
+
+
+def _bm25_branch(query: str, k: int):
+    with tracing.span("bm25", k=k):
+        return _timed("bm25", search_bm25, query, k=k)
 
-    index = faiss.read_index(settings.INDEX_PATH)
-    with open(settings.METADATA_PATH, "rb") as f:
-        metadata = pickle.load(f)
 
-    q_emb = embedding([query])
+def _vector_branch(query: str, k: int):
+    index, metadata = load_vector_index()
+
+    with tracing.span("embed"):
+        q_emb = embed_query(query)
     if q_emb is None:
         logger.error("Failed to create query embedding")
-        return []
+        return None
 
-    D, I = index.search(q_emb, initial_k)
+    with tracing.span("vector_search", k=k):
+        D, I = index.search(q_emb, k)
 
-    search_time = time.time() - start_time
-    logger.debug(f"FAISS search completed in {search_time:.3f}s")
-
-    threshold = settings.SIMILARITY_THRESHOLD
-    contexts = []
     vector_results = []
-
     for dist, idx in zip(D[0], I[0]):
+        if idx < 0:
+            continue
         doc = metadata[idx].copy()
         doc["faiss_distance"] = float(dist)
         vector_results.append((doc, dist))
 
-        if dist < threshold:
-            contexts.append(doc)
-            logger.debug(f"Context found with distance: {dist:.4f}")
+    return vector_results
+
+
+def _vector_batch(queries: List[str], k: int) -> List[List]:
+    index, metadata = load_vector_index()
+
+    with tracing.span("embed_batch", queries=len(queries)):
+        embeddings = embedding([normalize_query(q) for q in queries])
+    if embeddings is None:
+        raise ValueError("Failed to create query embeddings")
+
+    with tracing.span("vector_search_batch", k=k):
+        D, I = index.search(np.ascontiguousarray(embeddings, dtype=np.float32), k)
+
+    return [
+        [(dict(metadata[idx], faiss_distance=float(dist)), dist) for dist, idx in zip(D[row], I[row]) if idx >= 0]
+        for row in range(len(queries))
+    ]
+
+
+def plan_candidate_budget(k: int, rerank: Optional[bool] = None, hybrid: Optional[bool] = None) -> Dict[str, int]:
+    rerank = settings.ENABLE_RERANKING and rerank is not False
+    hybrid = settings.ENABLE_HYBRID_SEARCH and hybrid is not False
+
+    vector_depth = settings.RETRIEVAL_VECTOR_DEPTH or k * (
+        settings.INITIAL_RETRIEVAL_MULTIPLIER if rerank else 1
+    )
+    bm25_depth = settings.RETRIEVAL_BM25_DEPTH or k * settings.BM25_RETRIEVAL_MULTIPLIER
+
+    if rerank:
+        fused = max(k, settings.RERANK_CANDIDATES)
+    else:
+        fused = k
+
+    return {
+        "k": k,
+        "vector": max(k, vector_depth),
+        "bm25": bm25_depth if hybrid else 0,
+        "fused": fused,
+        "rerank": fused if rerank else 0
+    }
+
+
+def _fused_score(doc: Dict) -> Optional[float]:
+    for key in ("rrf_score", "hybrid_score"):
+        if key in doc:
+            return doc[key]
+    return None
+
+
+def _adaptive_rerank_size(candidates: List[Dict], budget: Dict[str, int]) -> int:
+    size = min(budget["rerank"], len(candidates))
+    if not settings.ENABLE_ADAPTIVE_RERANK or size <= settings.ADAPTIVE_RERANK_MIN:
+        return size
+
+    top_score = _fused_score(candidates[0])
+    if not top_score:
+        return size
+
+    cutoff = top_score * settings.ADAPTIVE_RERANK_SCORE_RATIO
+    decisive = sum(1 for doc in candidates[:size] if (_fused_score(doc) or 0.0) >= cutoff)
+    return max(settings.ADAPTIVE_RERANK_MIN, min(size, decisive))
+
+
+def _merge_candidates(vector_results: List, bm25_results: Optional[List], budget: Dict[str, int]) -> List[Dict]:
+    if bm25_results is not None:
+        return fuse_results(
+            bm25_results,
+            vector_results,
+            k=budget["fused"],
+            fusion_method=settings.HYBRID_FUSION_METHOD,
+            bm25_weight=settings.BM25_WEIGHT,
+            vector_weight=settings.VECTOR_WEIGHT
+        )
+
+    threshold = settings.SIMILARITY_THRESHOLD
+    contexts = [doc for doc, dist in vector_results if dist < threshold]
 
     if not contexts:
         logger.warning(f"No contexts found below threshold {threshold}, using fallback")
-        fallback_k = min(settings.TOP_K_FALLBACK, initial_k)
+        fallback_k = min(settings.TOP_K_FALLBACK, budget["vector"])
         contexts = [doc for doc, _ in vector_results[:fallback_k]]
         logger.info(f"Fallback: returning top {len(contexts)} contexts")
     else:
         logger.info(f"Found {len(contexts)} contexts below threshold {threshold}")
 
-    if settings.ENABLE_HYBRID_SEARCH:
-        hybrid_start = time.time()
-        contexts_with_scores = [(ctx, ctx.get("faiss_distance", 0)) for ctx in contexts]
-        contexts = hybrid_search(
-            query=query,
-            vector_results=contexts_with_scores,
-            k=k,
-            fusion_method=settings.HYBRID_FUSION_METHOD,
-            bm25_weight=settings.BM25_WEIGHT,
-            vector_weight=settings.VECTOR_WEIGHT
+    return contexts
+
+
+def _with_fused_tail(reranked: List[Dict], contexts: List[Dict], rerank_size: int, k: int) -> List[Dict]:
+    return reranked + contexts[rerank_size:k - len(reranked) + rerank_size]
+
+
+def _search_rag(
+    query: str,
+    k: Optional[int] = None,
+    rerank: Optional[bool] = None,
+    hybrid: Optional[bool] = None
+) -> List[Dict]:
+    if k is None:
+        k = settings.TOP_K_DEFAULT
+
+    start_time = time.time()
+
+    query = " ".join(query.split())
+
+    rerank = settings.ENABLE_RERANKING and rerank is not False
+    hybrid = settings.ENABLE_HYBRID_SEARCH and hybrid is not False
+    budget = plan_candidate_budget(k, rerank=rerank, hybrid=hybrid)
+    logger.debug("Searching for: '%s...' with budget %s", query[:100], budget)
+
+    bm25_future = None
+    if hybrid and settings.ENABLE_PARALLEL_RETRIEVAL:
+        bm25_future = _get_retrieval_executor().submit(
+            contextvars.copy_context().run, _bm25_branch, query, budget["bm25"]
         )
-        hybrid_time = time.time() - hybrid_start
-        logger.info(f"Hybrid search completed in {hybrid_time:.3f}s")
 
-    if settings.ENABLE_RERANKING and contexts:
+    vector_results = _timed("vector", _vector_branch, query, budget["vector"])
+    if vector_results is None:
+        if bm25_future is not None:
+            bm25_future.cancel()
+        return []
+
+    search_time = time.time() - start_time
+    logger.debug("FAISS search completed in %.3fs", search_time)
+
+    bm25_results = None
+    if hybrid:
+        hybrid_start = time.time()
+        if bm25_future is not None:
+            bm25_results = bm25_future.result()
+            get_metrics().observe("retrieval.bm25_wait_s", time.time() - hybrid_start)
+        else:
+            bm25_results = _bm25_branch(query, budget["bm25"])
+
+    contexts = _merge_candidates(vector_results, bm25_results, budget)
+    if bm25_results is not None:
+        logger.info(f"Hybrid search completed in {time.time() - hybrid_start:.3f}s")
+
+    rerank_size = 0
+    if rerank and contexts:
+        rerank_size = _adaptive_rerank_size(contexts, budget)
         rerank_start = time.time()
-        contexts = rerank_documents(query, contexts, top_k=k)
+        reranked = _timed("rerank", rerank_documents, query, contexts[:rerank_size], top_k=k)
+        contexts = _with_fused_tail(reranked, contexts, rerank_size, k)
         rerank_time = time.time() - rerank_start
         logger.info(f"Re-ranking completed in {rerank_time:.3f}s")
     else:
         contexts = contexts[:k]
 
+    logger.info(
+        f"Retrieval budget: vector={budget['vector']} bm25={budget['bm25']} fused={budget['fused']} "
+        f"rerank={rerank_size}/{budget['rerank']} returned={len(contexts)}"
+    )
+    span = tracing.get_current_span()
+    span.set_attribute("budget.vector", budget["vector"])
+    span.set_attribute("budget.bm25", budget["bm25"])
+    span.set_attribute("budget.fused", budget["fused"])
+    span.set_attribute("budget.rerank", rerank_size)
+    get_metrics().observe("retrieval.rerank_candidates", rerank_size)
+
     return contexts
 
 
+def _search_rag_batch(queries: List[str], k: int) -> List[List[Dict]]:
+    start_time = time.time()
+
+    queries = [" ".join(q.split()) for q in queries]
+    budget = plan_candidate_budget(k)
+
+    vector_batch = _timed("vector_batch", _vector_batch, queries, budget["vector"])
+
+    bm25_batch = [None] * len(queries)
+    if settings.ENABLE_HYBRID_SEARCH:
+        with tracing.span("bm25_batch", k=budget["bm25"]):
+            bm25_batch = _timed("bm25_batch", search_bm25_batch, queries, k=budget["bm25"])
+
+    candidates = [
+        _merge_candidates(vector_results, bm25_results, budget)
+        for vector_results, bm25_results in zip(vector_batch, bm25_batch)
+    ]
+
+    if not settings.ENABLE_RERANKING:
+        results = [contexts[:k] for contexts in candidates]
+    else:
+        rerank_sizes = [_adaptive_rerank_size(contexts, budget) if contexts else 0 for contexts in candidates]
+        reranked = _timed(
+            "rerank_batch", rerank_documents_batch,
+            queries, [contexts[:size] for contexts, size in zip(candidates, rerank_sizes)], top_k=k
+        )
+        results = [
+            _with_fused_tail(head, contexts, size, k)
+            for head, contexts, size in zip(reranked, candidates, rerank_sizes)
+        ]
+
+    elapsed = time.time() - start_time
+    get_metrics().increment("retrieval.batch_queries", len(queries))
+    logger.info(f"Batch retrieval for {len(queries)} queries completed in {elapsed:.3f}s "
+                f"({elapsed * 1000 / len(queries):.1f}ms/query)")
+
+    return results
+
+
+def _stream_faq_answer(query: str, match: Dict, start_time: float):
+    context = {
+        "type": "faq",
+        "title": match["question"],
+        "text": f"Câu hỏi: {match['question']}\nTrả lời: {match['answer']}\nĐường dẫn: {match['href']}",
+        "faq_similarity": match["similarity"]
+    }
+    source = {"source": "Nguồn 1", "type": "faq", "title": match["question"]}
+    answer = match["answer"]
+
+    if match["href"]:
+        context["href"] = match["href"]
+        source["href"] = match["href"]
+        answer = f"{answer}\n\nXem chi tiết: [{match['href']}]({match['href']})"
+
+    yield {
+        "type": "metadata",
+        "query": query,
+        "contexts": [context],
+        "sources": [source],
+        "fast_path": "faq"
+    }
+    yield {"type": "content", "content": answer}
+
+    total_time = time.time() - start_time
+    logger.info(f"FAQ fast path answered in {total_time:.3f}s")
+    yield {"type": "done", "process_time": total_time, "fast_path": "faq"}
+
+
+def _stream_canned_answer(query: str, match: Dict, start_time: float):
+    yield {
+        "type": "metadata",
+        "query": query,
+        "contexts": [],
+        "sources": [],
+        "fast_path": "intent",
+        "intent": match["intent"]
+    }
+    yield {"type": "content", "content": match["answer"]}
+
+    total_time = time.time() - start_time
+    logger.info(f"Intent gate answered '{match['intent']}' in {total_time:.3f}s")
+    yield {"type": "done", "process_time": total_time, "fast_path": "intent"}
+
+
 def get_answer_stream(
     query: str,
     chat_history: Optional[List[Dict]] = None,
     k: Optional[int] = None,
     temperature: Optional[float] = None,
-    max_tokens: Optional[int] = None
+    max_tokens: Optional[int] = None,
+    policy: Optional[DegradationPolicy] = None,
+    speculation_key: Optional[Tuple[str, str]] = None
 ):
-
-    import time
-
     start_time = time.time()
 
     logger.info(f"Processing streaming query: '{query[:100]}...'")
 
-    contexts = search_rag(query, k)
+    if policy is None:
+        policy = get_degradation_controller().current_policy()
+    if policy.tier:
+        logger.info(f"Serving at degradation tier {policy.tier} ({policy.name})")
+
+    cache = get_cache()
+    cacheable = settings.CACHE_ANSWERS and not chat_history
+    answer_key = {"kind": "answer", "temperature": temperature, "max_tokens": max_tokens}
+
+    if cacheable:
+        cached = cache.get(query, k, **answer_key)
+        if cached is not None:
+            logger.info("Answer served from cache")
+            yield {**cached["metadata"], "degradation_tier": policy.tier} if policy.tier else cached["metadata"]
+            yield {"type": "content", "content": cached["answer"]}
+            yield {"type": "done", "process_time": time.time() - start_time, "cached": True}
+            return
+
+    intent_match = match_intent(query)
+    if intent_match is not None:
+        yield from _stream_canned_answer(query, intent_match, start_time)
+        return
+
+    faq_match = match_faq(query)
+    if faq_match is not None:
+        yield from _stream_faq_answer(query, faq_match, start_time)
+        return
+
+    if not policy.generate:
+        get_metrics().increment("degradation.shed")
+        yield {"type": "metadata", "query": query, "contexts": [], "sources": [], "degradation_tier": policy.tier}
+        yield {
+            "type": "error",
+            "error": "Hệ thống đang quá tải, chỉ trả lời được các câu hỏi thường gặp. Vui lòng thử lại sau ít phút.",
+            "degradation_tier": policy.tier
+        }
+        return
+
+    retrieval_query = rewrite_query(query, chat_history)
+    contexts = None
+    if speculation_key is not None and settings.ENABLE_SPECULATIVE_RETRIEVAL:
+        contexts = get_speculative_retriever().claim(*speculation_key, retrieval_query, k)
+    if contexts is None:
+        contexts = search_rag(retrieval_query, k, **policy.retrieval_overrides())
 
     sources = []
     for i, ctx in enumerate(contexts[:settings.MAX_CONTEXTS_RESPONSE]):
@@ -171,26 +552,45 @@ def get_answer_stream(
 
         sources.append(source_info)
 
-    yield {
+    metadata = {
         "type": "metadata",
         "query": query,
         "contexts": contexts[:settings.MAX_CONTEXTS_RESPONSE],
         "sources": sources
     }
+    if retrieval_query != query:
+        metadata["retrieval_query"] = retrieval_query
+
+    reasoning_effort = policy.reasoning_effort
+    answer_tokens = [limit for limit in (max_tokens, policy.max_tokens) if limit]
+    llm_contexts = contexts
+    if settings.ENABLE_QUERY_CLASSIFIER:
+        plan = classify_query(query, contexts)
+        metadata["query_class"] = plan["label"]
+        reasoning_effort = lowest_effort(reasoning_effort or settings.LLM_REASONING_EFFORT, plan["reasoning_effort"])
+        if plan["max_tokens"]:
+            answer_tokens.append(plan["max_tokens"])
+        if plan["contexts"] is not None:
+            llm_contexts = contexts[:plan["contexts"]]
+    yield {**metadata, "degradation_tier": policy.tier} if policy.tier else metadata
 
     use_history = True if chat_history else False
 
     llm_client = get_llm_client()
 
+    answer_parts = []
+
     try:
         for chunk in llm_client.generate_answer_stream(
             query=query,
-            contexts=contexts,
+            contexts=llm_contexts,
             chat_history=chat_history,
             use_history=use_history,
             temperature=temperature,
-            max_tokens=max_tokens
+            max_tokens=min(answer_tokens) if answer_tokens else None,
+            reasoning_effort=reasoning_effort
         ):
+            answer_parts.append(chunk)
             yield {
                 "type": "content",
                 "content": chunk
@@ -199,11 +599,18 @@ def get_answer_stream(
         total_time = time.time() - start_time
         logger.info(f"Streaming query processed in {total_time:.3f}s")
 
+        if cacheable and answer_parts and not policy.tier:
+            cache.set(query, {"metadata": metadata, "answer": "".join(answer_parts)}, k, **answer_key)
+
         yield {
             "type": "done",
             "process_time": total_time
         }
 
+    except RequestCancelled:
+        logger.info(f"Streaming query cancelled after {time.time() - start_time:.3f}s ({len(answer_parts)} chunks sent)")
+        raise
+
     except Exception as e:
         logger.error(f"LLM streaming generation failed: {str(e)}")
         yield {
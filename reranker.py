@@ -3,6 +3,7 @@
 import logging
 from typing import List, Dict, Tuple
 from config import settings
+import tracing
 
 logger = logging.getLogger(__name__)
 
@@ -49,9 +50,10 @@ def rerank_documents(
 
         query_doc_pairs = [(query, doc["text"]) for doc in documents]
 
-        logger.debug(f"Re-ranking {len(documents)} documents for query: '{query[:50]}...'")
+        logger.debug("Re-ranking %d documents for query: '%s...'", len(documents), query[:50])
 
-        scores = model.predict(query_doc_pairs)
+        with tracing.span("rerank", documents=len(documents)):
+            scores = model.predict(query_doc_pairs)
 
         doc_score_pairs = list(zip(documents, scores))
         doc_score_pairs.sort(key=lambda x: x[1], reverse=True)
@@ -63,8 +65,8 @@ def rerank_documents(
             reranked_docs.append(doc_with_score)
 
         logger.info(f"Re-ranked {len(documents)} documents, returning top {len(reranked_docs)}")
-        logger.debug(f"Top score: {reranked_docs[0]['rerank_score']:.4f}, " +
-                     f"Lowest score: {reranked_docs[-1]['rerank_score']:.4f}")
+        logger.debug("Top score: %.4f, Lowest score: %.4f",
+                     reranked_docs[0]["rerank_score"], reranked_docs[-1]["rerank_score"])
 
         return reranked_docs
 
@@ -73,6 +75,44 @@ def rerank_documents(
         return documents[:top_k]
 
 
+def rerank_documents_batch(
+    queries: List[str],
+    documents: List[List[Dict]],
+    top_k: int = None
+) -> List[List[Dict]]:
+    if top_k is None:
+        top_k = settings.RERANKING_TOP_K
+
+    if not settings.ENABLE_RERANKING:
+        return [docs[:top_k] for docs in documents]
+
+    pairs = [(query, doc["text"]) for query, docs in zip(queries, documents) for doc in docs]
+    if not pairs:
+        return [[] for _ in documents]
+
+    try:
+        model = get_reranker_model()
+
+        with tracing.span("rerank_batch", queries=len(queries), documents=len(pairs)):
+            scores = model.predict(pairs, batch_size=settings.RERANK_BATCH_SIZE)
+
+    except Exception as e:
+        logger.error(f"Batch re-ranking failed: {e}, returning original documents")
+        return [docs[:top_k] for docs in documents]
+
+    results = []
+    offset = 0
+    for docs in documents:
+        doc_scores = scores[offset:offset + len(docs)]
+        offset += len(docs)
+
+        ranked = sorted(zip(docs, doc_scores), key=lambda x: x[1], reverse=True)[:top_k]
+        results.append([{**doc, "rerank_score": float(score)} for doc, score in ranked])
+
+    logger.info(f"Batch re-ranked {len(pairs)} pairs for {len(queries)} queries")
+    return results
+
+
 def get_reranker_info() -> Dict:
     if not settings.ENABLE_RERANKING:
         return {
@@ -87,5 +127,7 @@ def get_reranker_info() -> Dict:
         "model": settings.RERANKING_MODEL,
         "device": device,
         "top_k": settings.RERANKING_TOP_K,
-        "initial_retrieval_multiplier": settings.INITIAL_RETRIEVAL_MULTIPLIER
+        "initial_retrieval_multiplier": settings.INITIAL_RETRIEVAL_MULTIPLIER,
+        "rerank_candidates": settings.RERANK_CANDIDATES,
+        "adaptive": settings.ENABLE_ADAPTIVE_RERANK
     }
@@ -0,0 +1,127 @@
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+import numpy as np
+from rank_bm25 import BM25Okapi
+
+from config import settings
+from chunking import chunk_faq, chunk_guide
+from tokenizer import VietnameseTokenizer, fold_diacritics
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def legacy_tokenize(text: str):
+    text = text.lower()
+    text = re.sub(r'[^\w\s]', ' ', text)
+    return [t for t in text.split() if len(t) > 1]
+
+
+def load_corpus(faq_file: str, guide_file: str):
+    with open(faq_file, encoding="utf-8") as f:
+        faq = json.load(f)
+    with open(guide_file, encoding="utf-8") as f:
+        guide = json.load(f)
+    return faq, [d["text"] for d in chunk_faq(faq) + chunk_guide(guide)]
+
+
+def recall_at_1(bm25: BM25Okapi, tokenize, queries):
+    if not queries:
+        return None
+    hits = sum(1 for chunk_id, query in queries if int(np.argmax(bm25.get_scores(tokenize(query)))) == chunk_id)
+    return hits / len(queries)
+
+
+def benchmark(name: str, tokenize, texts, faq, repeat: int):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        corpus_tokens = [tokenize(text) for text in texts]
+    tokenize_s = (time.perf_counter() - start) / repeat
+
+    start = time.perf_counter()
+    bm25 = BM25Okapi(corpus_tokens)
+    build_s = time.perf_counter() - start
+
+    queries = [(i, item["question"]) for i, item in enumerate(faq)]
+    folded_queries = [(i, fold_diacritics(q)) for i, q in queries]
+
+    start = time.perf_counter()
+    toned = recall_at_1(bm25, tokenize, queries)
+    query_ms = (time.perf_counter() - start) * 1000 / max(1, len(queries))
+    toneless = recall_at_1(bm25, tokenize, folded_queries)
+
+    return {
+        "tokenizer": name,
+        "docs_per_s": len(texts) / tokenize_s if tokenize_s else float("inf"),
+        "avg_tokens": sum(len(t) for t in corpus_tokens) / max(1, len(corpus_tokens)),
+        "vocab": len(bm25.idf),
+        "build_ms": build_s * 1000,
+        "query_ms": query_ms,
+        "recall@1": toned,
+        "recall@1_no_tones": toneless
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Benchmark BM25 tokenizers (throughput, index size, FAQ self-retrieval)',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python3 scripts/benchmark_tokenizer.py
+  python3 scripts/benchmark_tokenizer.py --repeat 10 --json
+        """
+    )
+    parser.add_argument('--faq-file', default=settings.FAQ_FILE, help='FAQ JSON file')
+    parser.add_argument('--guide-file', default=settings.GUIDE_FILE, help='Guide JSON file')
+    parser.add_argument('--repeat', type=int, default=3, help='Tokenization passes to average (default: 3)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON lines')
+    args = parser.parse_args()
+
+    faq, texts = load_corpus(args.faq_file, args.guide_file)
+    logger.info(f"Loaded {len(texts)} documents ({len(faq)} FAQ entries)")
+
+    variants = [
+        ("legacy", legacy_tokenize),
+        ("nfc", VietnameseTokenizer(fold=False, bigrams=False, stopwords=False)),
+        ("nfc+stopwords", VietnameseTokenizer(fold=False, bigrams=False, stopwords=True)),
+        ("nfc+stopwords+bigrams", VietnameseTokenizer(fold=False, bigrams=True, stopwords=True)),
+        ("nfc+stopwords+bigrams+fold", VietnameseTokenizer(fold=True, bigrams=True, stopwords=True)),
+    ]
+
+    results = [benchmark(name, tokenize, texts, faq, args.repeat) for name, tokenize in variants]
+
+    if args.json:
+        for result in results:
+            print(json.dumps(result, ensure_ascii=False))
+        return 0
+
+    header = f"{'tokenizer':<28} {'docs/s':>10} {'tokens':>8} {'vocab':>8} {'build ms':>9} " \
+             f"{'query ms':>9} {'R@1':>6} {'R@1 no tones':>13}"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(
+            f"{r['tokenizer']:<28} {r['docs_per_s']:>10.0f} {r['avg_tokens']:>8.1f} {r['vocab']:>8} "
+            f"{r['build_ms']:>9.1f} {r['query_ms']:>9.2f} {r['recall@1'] or 0:>6.3f} "
+            f"{r['recall@1_no_tones'] or 0:>13.3f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
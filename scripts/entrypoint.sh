@@ -6,13 +6,18 @@ echo "Environment: ${APP_ENV:-development}"
 echo "Python version: $(python --version)"
 echo "Working directory: $(pwd)"
 
-# Kiểm tra biến môi trường bắt buộc
-if [ -z "$GROQ_API_KEY" ]; then
-    echo "ERROR: GROQ_API_KEY is not set. Please provide it via environment variable."
-    exit 1
-fi
+# Kiểm tra biến môi trường bắt buộc (chỉ cần GROQ_API_KEY khi dùng backend groq)
+LLM_BACKENDS="${LLM_BACKENDS:-groq}"
+if echo "$LLM_BACKENDS" | grep -qi "groq"; then
+    if [ -z "$GROQ_API_KEY" ]; then
+        echo "ERROR: GROQ_API_KEY is not set. Please provide it via environment variable."
+        exit 1
+    fi
 
-echo "✓ GROQ_API_KEY is configured"
+    echo "✓ GROQ_API_KEY is configured"
+else
+    echo "✓ LLM backends: $LLM_BACKENDS (GROQ_API_KEY not required)"
+fi
 
 # Kiểm tra data directory
 if [ ! -d "data" ]; then
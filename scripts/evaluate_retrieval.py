@@ -0,0 +1,273 @@
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import itertools
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from config import settings
+from rag import search_rag, load_vector_index
+from embedding import query_embedding_cache
+from tokenizer import fold_diacritics
+from cache import get_cache
+from metrics import get_metrics
+
+logging.basicConfig(
+    level=logging.WARNING,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+logging.getLogger("rag").setLevel(logging.ERROR)
+
+STAGES = ("vector", "bm25", "bm25_wait", "rerank")
+
+
+def seed_from_faq(faq_file: str, output: str, variants) -> int:
+    with open(faq_file, encoding="utf-8") as f:
+        faq = json.load(f)
+
+    count = 0
+    with open(output, "w", encoding="utf-8") as f:
+        for chunk_id, item in enumerate(faq):
+            queries = {"original": item["question"]}
+            if "no_tones" in variants:
+                queries["no_tones"] = fold_diacritics(item["question"])
+            if "lower" in variants:
+                queries["lower"] = item["question"].lower()
+
+            for variant, query in queries.items():
+                f.write(json.dumps({"query": query, "relevant": [chunk_id], "variant": variant},
+                                   ensure_ascii=False) + "\n")
+                count += 1
+
+    logger.warning(f"Wrote {count} labeled queries to {output}")
+    return count
+
+
+def load_labeled(path: str, limit: int = 0):
+    labeled = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                labeled.append(json.loads(line))
+    return labeled[:limit] if limit else labeled
+
+
+def score_ranking(ranked_ids, relevant, k: int):
+    top = ranked_ids[:k]
+    hits = [1 if doc_id in relevant else 0 for doc_id in top]
+
+    recall = sum(hits) / len(relevant) if relevant else 0.0
+    rr = next((1.0 / rank for rank, hit in enumerate(hits, 1) if hit), 0.0)
+    dcg = sum(hit / math.log2(rank + 1) for rank, hit in enumerate(hits, 1))
+    idcg = sum(1 / math.log2(rank + 1) for rank in range(1, min(len(relevant), k) + 1))
+
+    return recall, rr, dcg / idcg if idcg else 0.0
+
+
+def build_grid(args):
+    grid = []
+    for hybrid, rerank in itertools.product(args.hybrid, args.rerank):
+        fusions = args.fusion if hybrid else [settings.HYBRID_FUSION_METHOD]
+        thresholds = [settings.SIMILARITY_THRESHOLD] if hybrid else args.thresholds
+        multipliers = args.multipliers if rerank else [settings.INITIAL_RETRIEVAL_MULTIPLIER]
+        candidates = args.rerank_candidates if rerank else [settings.RERANK_CANDIDATES]
+
+        for fusion, threshold, multiplier, rerank_candidates in itertools.product(
+            fusions, thresholds, multipliers, candidates
+        ):
+            grid.append({
+                "ENABLE_HYBRID_SEARCH": hybrid,
+                "ENABLE_RERANKING": rerank,
+                "HYBRID_FUSION_METHOD": fusion,
+                "SIMILARITY_THRESHOLD": threshold,
+                "INITIAL_RETRIEVAL_MULTIPLIER": multiplier,
+                "RERANK_CANDIDATES": rerank_candidates
+            })
+    return grid
+
+
+def evaluate(config, labeled, text_to_id, k: int, warmup: int):
+    originals = {name: getattr(settings, name) for name in config}
+    for name, value in config.items():
+        setattr(settings, name, value)
+
+    try:
+        query_embedding_cache.clear()
+        for item in labeled[:warmup]:
+            search_rag(item["query"], k)
+
+        query_embedding_cache.clear()
+        metrics = get_metrics()
+        metrics.reset()
+
+        recall = rr = ndcg = 0.0
+        latencies = []
+        cpu_start = time.process_time()
+
+        for item in labeled:
+            start = time.perf_counter()
+            contexts = search_rag(item["query"], k)
+            latencies.append(time.perf_counter() - start)
+
+            ranked_ids = [text_to_id.get(ctx["text"], -1) for ctx in contexts]
+            r, m, n = score_ranking(ranked_ids, set(item["relevant"]), k)
+            recall += r
+            rr += m
+            ndcg += n
+
+        cpu_s = time.process_time() - cpu_start
+    finally:
+        for name, value in originals.items():
+            setattr(settings, name, value)
+
+    n = len(labeled)
+    latencies.sort()
+    summaries = metrics.snapshot()["summaries"]
+
+    return {
+        "config": config,
+        f"recall@{k}": recall / n,
+        "mrr": rr / n,
+        f"ndcg@{k}": ndcg / n,
+        "p50_ms": latencies[n // 2] * 1000,
+        "p95_ms": latencies[min(n - 1, int(n * 0.95))] * 1000,
+        "cpu_ms": cpu_s * 1000 / n,
+        "stages_p50_ms": {
+            stage: round(summaries[f"retrieval.{stage}_s"]["p50"] * 1000, 3)
+            for stage in STAGES if f"retrieval.{stage}_s" in summaries
+        }
+    }
+
+
+def mark_pareto(results, quality: str, cost: str) -> None:
+    for result in results:
+        result["pareto"] = not any(
+            other[quality] >= result[quality] and other[cost] <= result[cost]
+            and (other[quality] > result[quality] or other[cost] < result[cost])
+            for other in results
+        )
+
+
+def describe(config) -> str:
+    parts = ["hybrid" if config["ENABLE_HYBRID_SEARCH"] else f"vector thr={config['SIMILARITY_THRESHOLD']}"]
+    if config["ENABLE_HYBRID_SEARCH"]:
+        parts.append(config["HYBRID_FUSION_METHOD"])
+    if config["ENABLE_RERANKING"]:
+        parts.append(f"rerank x{config['INITIAL_RETRIEVAL_MULTIPLIER']} c={config['RERANK_CANDIDATES']}")
+    return " ".join(parts)
+
+
+def parse_list(cast):
+    def parse(value: str):
+        return [cast(v.strip()) for v in value.split(",") if v.strip()]
+    return parse
+
+
+def parse_bool(value: str) -> bool:
+    return value.lower() in ("1", "true", "on", "yes")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Sweep retrieval configurations and report quality (recall@k, MRR, nDCG) vs. latency/CPU',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Labeled set: JSONL lines {"query": "...", "relevant": [chunk_id, ...]}, chunk ids being
+positions in the FAISS metadata (FAQ entries come first, in data/faq.json order).
+
+Examples:
+  # Seed a labeled set from FAQ questions (plus toneless variants), then sweep
+  python3 scripts/evaluate_retrieval.py --seed-faq eval/faq_queries.jsonl --variants no_tones
+  python3 scripts/evaluate_retrieval.py --labeled eval/faq_queries.jsonl --limit 300
+
+  # Narrow sweep, machine-readable output
+  python3 scripts/evaluate_retrieval.py --labeled eval/faq_queries.jsonl \\
+      --hybrid on --fusion rrf,weighted --multipliers 2,3 --rerank-candidates 10,20 --json
+        """
+    )
+    parser.add_argument('--labeled', help='Labeled query set (JSONL)')
+    parser.add_argument('--seed-faq', metavar='OUTPUT', help='Write a labeled set seeded from FAQ questions and exit')
+    parser.add_argument('--faq-file', default=settings.FAQ_FILE, help='FAQ JSON file used for seeding')
+    parser.add_argument('--variants', type=parse_list(str), default=[],
+                        help='Extra seeded query variants: no_tones,lower')
+    parser.add_argument('--k', type=int, default=settings.TOP_K_DEFAULT, help='Contexts retrieved per query')
+    parser.add_argument('--limit', type=int, default=0, help='Evaluate only the first N labeled queries')
+    parser.add_argument('--warmup', type=int, default=5, help='Unmeasured queries per configuration')
+    parser.add_argument('--hybrid', type=parse_list(parse_bool), default=[True, False], help='on,off')
+    parser.add_argument('--rerank', type=parse_list(parse_bool), default=[True, False], help='on,off')
+    parser.add_argument('--fusion', type=parse_list(str), default=["rrf", "weighted"], help='rrf,weighted')
+    parser.add_argument('--thresholds', type=parse_list(float), default=[0.8, 1.0, 1.2],
+                        help='SIMILARITY_THRESHOLD values (vector-only configurations)')
+    parser.add_argument('--multipliers', type=parse_list(int), default=[2, 3, 5],
+                        help='INITIAL_RETRIEVAL_MULTIPLIER values (reranking configurations)')
+    parser.add_argument('--rerank-candidates', type=parse_list(int), default=[10, 20],
+                        help='RERANK_CANDIDATES values (reranking configurations)')
+    parser.add_argument('--quality', default='ndcg', choices=['recall', 'mrr', 'ndcg'],
+                        help='Quality metric for the Pareto frontier (default: ndcg)')
+    parser.add_argument('--cost', default='p50_ms', choices=['p50_ms', 'p95_ms', 'cpu_ms'],
+                        help='Cost metric for the Pareto frontier (default: p50_ms)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON lines')
+    args = parser.parse_args()
+
+    if args.seed_faq:
+        os.makedirs(os.path.dirname(os.path.abspath(args.seed_faq)), exist_ok=True)
+        seed_from_faq(args.faq_file, args.seed_faq, args.variants)
+        return 0
+
+    if not args.labeled:
+        parser.error("--labeled or --seed-faq is required")
+
+    labeled = load_labeled(args.labeled, args.limit)
+    if not labeled:
+        parser.error(f"No labeled queries in {args.labeled}")
+
+    _, metadata = load_vector_index()
+    text_to_id = {doc["text"]: chunk_id for chunk_id, doc in enumerate(metadata)}
+
+    get_cache().enabled = False
+
+    grid = build_grid(args)
+    print(f"Evaluating {len(grid)} configurations on {len(labeled)} queries (k={args.k})", file=sys.stderr)
+
+    results = []
+    for config in grid:
+        result = evaluate(config, labeled, text_to_id, args.k, args.warmup)
+        results.append(result)
+        print(f"  {describe(config)}: ndcg={result[f'ndcg@{args.k}']:.3f} p50={result['p50_ms']:.1f}ms",
+              file=sys.stderr)
+
+    quality = {"recall": f"recall@{args.k}", "mrr": "mrr", "ndcg": f"ndcg@{args.k}"}[args.quality]
+    mark_pareto(results, quality, args.cost)
+    results.sort(key=lambda r: (r[args.cost], -r[quality]))
+
+    if args.json:
+        for result in results:
+            print(json.dumps(result, ensure_ascii=False))
+        return 0
+
+    header = f"{'':1} {'configuration':<36} {'R@' + str(args.k):>7} {'MRR':>7} {'nDCG':>7} " \
+             f"{'p50 ms':>8} {'p95 ms':>8} {'CPU ms':>8}  stages p50 ms"
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        stages = " ".join(f"{name}={value}" for name, value in r["stages_p50_ms"].items())
+        print(
+            f"{'*' if r['pareto'] else ' ':1} {describe(r['config']):<36} {r[f'recall@{args.k}']:>7.3f} "
+            f"{r['mrr']:>7.3f} {r[f'ndcg@{args.k}']:>7.3f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} "
+            f"{r['cpu_ms']:>8.1f}  {stages}"
+        )
+    print(f"\n* Pareto frontier ({args.quality} vs. {args.cost})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
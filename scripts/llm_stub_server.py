@@ -0,0 +1,140 @@
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import argparse
+import logging
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dotenv import load_dotenv
+load_dotenv()
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+import uvicorn
+
+from config import settings
+from llm_backends import stub_tokens
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def create_app(response_text: str, first_token_delay_ms: float, token_delay_ms: float,
+               error_rate: float = 0.0) -> FastAPI:
+    app = FastAPI(title="LLM Stub Server")
+    counter = {"requests": 0}
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "local"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        counter["requests"] += 1
+
+        if error_rate and (counter["requests"] % max(1, round(1 / error_rate))) == 0:
+            return StreamingResponse(
+                iter([json.dumps({"error": {"message": "stub overloaded"}})]),
+                status_code=503,
+                media_type="application/json",
+                headers={"Retry-After": "1"}
+            )
+
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+        model = body.get("model", "stub")
+        tokens = stub_tokens(response_text, body.get("max_tokens") or body.get("max_completion_tokens"))
+
+        def chunk(delta, finish_reason=None):
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+            }
+
+        if not body.get("stream"):
+            await asyncio.sleep(first_token_delay_ms / 1000 + token_delay_ms * len(tokens) / 1000)
+            return {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model,
+                "choices": [{
+                    "index": 0,
+                    "message": {"role": "assistant", "content": "".join(tokens)},
+                    "finish_reason": "stop"
+                }],
+                "usage": {"prompt_tokens": 0, "completion_tokens": len(tokens), "total_tokens": len(tokens)}
+            }
+
+        async def event_stream():
+            await asyncio.sleep(first_token_delay_ms / 1000)
+            yield f"data: {json.dumps(chunk({'role': 'assistant', 'content': ''}), ensure_ascii=False)}\n\n"
+            for i, token in enumerate(tokens):
+                if i:
+                    await asyncio.sleep(token_delay_ms / 1000)
+                yield f"data: {json.dumps(chunk({'content': token}), ensure_ascii=False)}\n\n"
+            yield f"data: {json.dumps(chunk({}, 'stop'))}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Deterministic OpenAI-compatible LLM stub server for offline benchmarks',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  # Start the stub on port 8001
+  python3 scripts/llm_stub_server.py
+
+  # Slow first token, fast tokens, every 10th request fails with 503
+  python3 scripts/llm_stub_server.py --first-token-delay-ms 800 --token-delay-ms 5 --error-rate 0.1
+
+  # Point the chatbot at it
+  LLM_BACKENDS=openai_compatible OPENAI_COMPAT_BASE_URL=http://localhost:8001/v1 uvicorn app:app
+        """
+    )
+
+    parser.add_argument('--host', default='127.0.0.1', help='Bind host (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8001, help='Bind port (default: 8001)')
+    parser.add_argument(
+        '--first-token-delay-ms',
+        type=float,
+        default=settings.LLM_STUB_FIRST_TOKEN_DELAY_MS,
+        help=f'Delay before the first token (default: {settings.LLM_STUB_FIRST_TOKEN_DELAY_MS})'
+    )
+    parser.add_argument(
+        '--token-delay-ms',
+        type=float,
+        default=settings.LLM_STUB_TOKEN_DELAY_MS,
+        help=f'Delay between tokens (default: {settings.LLM_STUB_TOKEN_DELAY_MS})'
+    )
+    parser.add_argument('--response', default=settings.LLM_STUB_RESPONSE, help='Canned response text')
+    parser.add_argument('--error-rate', type=float, default=0.0,
+                        help='Fraction of requests answered with HTTP 503 (default: 0)')
+
+    args = parser.parse_args()
+
+    logger.info(f"Starting LLM stub server on {args.host}:{args.port} "
+                f"(first token {args.first_token_delay_ms}ms, {args.token_delay_ms}ms/token)")
+
+    app = create_app(args.response, args.first_token_delay_ms, args.token_delay_ms, args.error_rate)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
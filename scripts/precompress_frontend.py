@@ -0,0 +1,106 @@
+import os
+import re
+import sys
+import gzip
+import hashlib
+import argparse
+import logging
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+COMPRESSIBLE = (".html", ".css", ".js", ".json", ".svg", ".txt")
+ASSET_REF = re.compile(r'((?:href|src)=")([\w\-./]+\.(?:css|js))(?:\?v=[0-9a-f]+)?(")')
+
+
+def content_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:12]
+
+
+def stamp_index(directory: str, index: str = "index.html") -> int:
+    index_path = os.path.join(directory, index)
+    with open(index_path, encoding="utf-8") as f:
+        html = f.read()
+
+    stamped = 0
+
+    def replace(match):
+        nonlocal stamped
+        asset = os.path.join(directory, match.group(2))
+        if match.group(2).startswith("/") or not os.path.isfile(asset):
+            return match.group(0)
+        stamped += 1
+        return f"{match.group(1)}{match.group(2)}?v={content_hash(asset)}{match.group(3)}"
+
+    html = ASSET_REF.sub(replace, html)
+    with open(index_path, "w", encoding="utf-8") as f:
+        f.write(html)
+
+    logger.info(f"Stamped {stamped} asset references in {index_path}")
+    return stamped
+
+
+def precompress(directory: str, min_size: int, level: int) -> int:
+    written = 0
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if not name.endswith(COMPRESSIBLE):
+                continue
+
+            path = os.path.join(root, name)
+            with open(path, "rb") as f:
+                data = f.read()
+            if len(data) < min_size:
+                continue
+
+            variants = {".gz": gzip.compress(data, compresslevel=level, mtime=0)}
+            if brotli is not None:
+                variants[".br"] = brotli.compress(data, quality=11)
+
+            for suffix, compressed in variants.items():
+                if len(compressed) >= len(data):
+                    continue
+                with open(path + suffix, "wb") as f:
+                    f.write(compressed)
+                written += 1
+                logger.info(f"{path}{suffix}: {len(data)} -> {len(compressed)} bytes")
+
+    if brotli is None:
+        logger.info("brotli not installed, only .gz variants written")
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Write precompressed (.gz/.br) frontend assets and version asset URLs in index.html'
+    )
+    parser.add_argument('--dir', default='frontend', help='Frontend directory (default: frontend)')
+    parser.add_argument('--stamp', action='store_true',
+                        help='Rewrite index.html asset references to name?v=<content hash>')
+    parser.add_argument('--min-size', type=int, default=256, help='Skip files smaller than this many bytes')
+    parser.add_argument('--level', type=int, default=9, help='gzip compression level')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.dir):
+        logger.error(f"Frontend directory not found: {args.dir}")
+        return 1
+
+    if args.stamp:
+        stamp_index(args.dir)
+
+    written = precompress(args.dir, args.min_size, args.level)
+    logger.info(f"Wrote {written} precompressed files")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -27,11 +27,13 @@ def should_rebuild(force: bool = False) -> bool:
     faiss_exists = os.path.exists(settings.INDEX_PATH)
     metadata_exists = os.path.exists(settings.METADATA_PATH)
     bm25_exists = os.path.exists(settings.BM25_INDEX_PATH)
+    faq_exists = os.path.exists(settings.FAQ_INDEX_PATH)
     
     logger.info(f"Index status:")
     logger.info(f"  - FAISS index: {'✓' if faiss_exists else '✗'} ({settings.INDEX_PATH})")
     logger.info(f"  - Metadata: {'✓' if metadata_exists else '✗'} ({settings.METADATA_PATH})")
     logger.info(f"  - BM25 index: {'✓' if bm25_exists else '✗'} ({settings.BM25_INDEX_PATH})")
+    logger.info(f"  - FAQ index: {'✓' if faq_exists else '✗'} ({settings.FAQ_INDEX_PATH})")
     
     if not faiss_exists or not metadata_exists:
         logger.warning("FAISS index or metadata missing - rebuild required")
@@ -41,6 +43,10 @@ def should_rebuild(force: bool = False) -> bool:
         logger.warning("Hybrid search enabled but BM25 index missing - rebuild required")
         return True
     
+    if settings.ENABLE_FAQ_FAST_PATH and not faq_exists:
+        logger.warning("FAQ fast path enabled but FAQ index missing - rebuild required")
+        return True
+    
     logger.info("All indices present, no rebuild needed")
     return False
 
@@ -0,0 +1,236 @@
+import sys
+import time
+import asyncio
+import argparse
+import fnmatch
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+class RespStore:
+    def __init__(self):
+        self.data = {}
+        self.expires = {}
+
+    def _alive(self, key: bytes) -> bool:
+        expires = self.expires.get(key)
+        if expires is not None and expires <= time.time():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def execute(self, args):
+        command = args[0].upper().decode()
+        handler = getattr(self, f"cmd_{command.lower()}", None)
+        if handler is None:
+            return RespError(f"ERR unknown command '{command}'")
+        try:
+            return handler(*args[1:])
+        except (TypeError, ValueError, IndexError):
+            return RespError(f"ERR wrong arguments for '{command}' command")
+
+    def cmd_ping(self, message=None):
+        return message if message is not None else RespSimple("PONG")
+
+    def cmd_echo(self, message):
+        return message
+
+    def cmd_get(self, key):
+        return self.data[key] if self._alive(key) else None
+
+    def cmd_set(self, key, value, *options):
+        options = [o.upper() for o in options]
+        expires = None
+        i = 0
+        while i < len(options):
+            if options[i] == b"EX":
+                expires = time.time() + float(options[i + 1])
+                i += 2
+            elif options[i] == b"PX":
+                expires = time.time() + float(options[i + 1]) / 1000
+                i += 2
+            elif options[i] == b"NX" and self._alive(key):
+                return None
+            elif options[i] == b"XX" and not self._alive(key):
+                return None
+            else:
+                i += 1
+
+        self.data[key] = value
+        if expires is not None:
+            self.expires[key] = expires
+        else:
+            self.expires.pop(key, None)
+        return RespSimple("OK")
+
+    def cmd_del(self, *keys):
+        removed = 0
+        for key in keys:
+            if self._alive(key):
+                removed += 1
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return removed
+
+    def cmd_exists(self, *keys):
+        return sum(1 for key in keys if self._alive(key))
+
+    def cmd_incr(self, key):
+        return self.cmd_incrby(key, b"1")
+
+    def cmd_incrby(self, key, amount):
+        value = int(self.data[key]) if self._alive(key) else 0
+        value += int(amount)
+        self.data[key] = str(value).encode()
+        return value
+
+    def cmd_expire(self, key, seconds):
+        if not self._alive(key):
+            return 0
+        self.expires[key] = time.time() + float(seconds)
+        return 1
+
+    def cmd_pexpire(self, key, milliseconds):
+        return self.cmd_expire(key, float(milliseconds) / 1000)
+
+    def cmd_pttl(self, key):
+        if not self._alive(key):
+            return -2
+        expires = self.expires.get(key)
+        return -1 if expires is None else int((expires - time.time()) * 1000)
+
+    def cmd_keys(self, pattern):
+        return [key for key in list(self.data) if self._alive(key) and fnmatch.fnmatchcase(key, pattern)]
+
+    def cmd_scan(self, cursor, *options):
+        pattern = b"*"
+        for name, value in zip(options[::2], options[1::2]):
+            if name.upper() == b"MATCH":
+                pattern = value
+        return [b"0", self.cmd_keys(pattern)]
+
+    def cmd_dbsize(self):
+        return sum(1 for key in list(self.data) if self._alive(key))
+
+    def cmd_flushdb(self, *args):
+        self.data.clear()
+        self.expires.clear()
+        return RespSimple("OK")
+
+    cmd_flushall = cmd_flushdb
+
+    def cmd_select(self, index):
+        return RespSimple("OK")
+
+    def cmd_client(self, *args):
+        return RespSimple("OK")
+
+    def cmd_hello(self, *args):
+        if args and args[0] not in (b"2",):
+            return RespError("NOPROTO unsupported protocol version")
+        return ["server", "redis", "version", "7.0.0", "proto", 2, "mode", "standalone", "role", "master"]
+
+
+class RespSimple(str):
+    pass
+
+
+class RespError(str):
+    pass
+
+
+def encode(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return f"-{value}\r\n".encode()
+    if isinstance(value, RespSimple):
+        return f"+{value}\r\n".encode()
+    if isinstance(value, int):
+        return f":{value}\r\n".encode()
+    if isinstance(value, str):
+        value = value.encode()
+    if isinstance(value, bytes):
+        return b"$" + str(len(value)).encode() + b"\r\n" + value + b"\r\n"
+    if isinstance(value, list):
+        return b"*" + str(len(value)).encode() + b"\r\n" + b"".join(encode(v) for v in value)
+    raise TypeError(f"Cannot encode {type(value).__name__}")
+
+
+async def read_command(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        return None
+
+    if not line.startswith(b"*"):
+        return line.strip().split()
+
+    args = []
+    for _ in range(int(line[1:].strip())):
+        header = await reader.readline()
+        length = int(header[1:].strip())
+        payload = await reader.readexactly(length + 2)
+        args.append(payload[:-2])
+    return args
+
+
+def create_handler(store: RespStore):
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                args = await read_command(reader)
+                if args is None:
+                    break
+                if not args:
+                    continue
+                if args[0].upper() == b"QUIT":
+                    writer.write(encode(RespSimple("OK")))
+                    break
+                writer.write(encode(store.execute(args)))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionResetError):
+            pass
+        finally:
+            writer.close()
+
+    return handle
+
+
+async def serve(host: str, port: int):
+    server = await asyncio.start_server(create_handler(RespStore()), host, port)
+    logger.info(f"RESP stub server listening on {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Minimal in-memory Redis-protocol (RESP2) server for local testing',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Supports HELLO (RESP2), PING, GET, SET (EX/PX/NX/XX), DEL, EXISTS, INCR, INCRBY, EXPIRE, PEXPIRE,
+PTTL, KEYS, DBSIZE, FLUSHDB - enough for CACHE_BACKEND=redis.
+
+Examples:
+  python3 scripts/resp_stub_server.py --port 6380
+  CACHE_BACKEND=redis CACHE_REDIS_URL=redis://localhost:6380/0 uvicorn app:app
+        """
+    )
+    parser.add_argument('--host', default='127.0.0.1', help='Bind host (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=6380, help='Bind port (default: 6380)')
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,176 @@
+import time
+import logging
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, FrozenSet, List, Optional
+from config import settings
+from tokenizer import get_tokenizer, fold_diacritics
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _terms(query: str) -> FrozenSet[str]:
+    tokenizer = get_tokenizer()
+    return frozenset(fold_diacritics(s) for s in tokenizer.syllables(query) if s not in tokenizer.stopwords)
+
+
+def _overlap(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+class SpeculativeRetriever:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._inflight = 0
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.SPECULATIVE_MAX_INFLIGHT),
+            thread_name_prefix="speculative"
+        )
+
+    def _session(self, client_id: str) -> Dict:
+        # Budget and entry live per client, so rotating conversation ids neither resets the budget nor adds entries
+        session = self._sessions.get(client_id)
+        if session is None:
+            session = {"budget": deque(), "entry": None}
+            self._sessions[client_id] = session
+            while len(self._sessions) > settings.SPECULATIVE_MAX_SESSIONS:
+                self._sessions.popitem(last=False)
+        else:
+            self._sessions.move_to_end(client_id)
+        return session
+
+    def _run(self, search: Callable[[str, int], List[Dict]], query: str, k: int) -> List[Dict]:
+        start = time.perf_counter()
+        try:
+            return search(query, k)
+        finally:
+            with self._lock:
+                self._inflight -= 1
+            get_metrics().observe("speculation.retrieval_s", time.perf_counter() - start)
+
+    def schedule(
+        self, client_id: str, conversation_id: str, query: str, k: int, search: Callable[[str, int], List[Dict]]
+    ) -> str:
+        metrics = get_metrics()
+        metrics.increment("speculation.requests")
+
+        terms = _terms(query)
+        if len(terms) < settings.SPECULATIVE_MIN_WORDS:
+            metrics.increment("speculation.skipped.short")
+            return "short"
+
+        now = time.monotonic()
+        with self._lock:
+            session = self._session(client_id)
+            entry = session["entry"]
+            if (
+                entry is not None and entry["conversation_id"] == conversation_id
+                and entry["terms"] == terms and entry["k"] == k
+                and now - entry["created"] <= settings.SPECULATIVE_TTL_S
+                and not (entry["future"].done() and entry["future"].exception() is not None)
+            ):
+                return "ready" if entry["future"].done() else "pending"
+
+            budget = session["budget"]
+            while budget and now - budget[0] >= settings.SPECULATIVE_BUDGET_WINDOW_S:
+                budget.popleft()
+            if len(budget) >= settings.SPECULATIVE_SESSION_BUDGET:
+                metrics.increment("speculation.skipped.budget")
+                return "budget"
+
+            if self._inflight >= settings.SPECULATIVE_MAX_INFLIGHT:
+                metrics.increment("speculation.skipped.busy")
+                return "busy"
+
+            budget.append(now)
+            self._inflight += 1
+            session["entry"] = {
+                "conversation_id": conversation_id,
+                "query": query,
+                "terms": terms,
+                "k": k,
+                "created": now,
+                "future": self._executor.submit(self._run, search, query, k)
+            }
+
+        metrics.increment("speculation.scheduled")
+        return "scheduled"
+
+    def claim(self, client_id: str, conversation_id: str, query: str, k: int) -> Optional[List[Dict]]:
+        metrics = get_metrics()
+        terms = _terms(query)
+
+        with self._lock:
+            session = self._sessions.get(client_id)
+            entry = session["entry"] if session is not None else None
+            if entry is None or entry["conversation_id"] != conversation_id or entry["k"] != k:
+                metrics.increment("speculation.misses")
+                return None
+
+            overlap = _overlap(entry["terms"], terms)
+            age = time.monotonic() - entry["created"]
+            if overlap < settings.SPECULATIVE_MIN_OVERLAP or age > settings.SPECULATIVE_TTL_S:
+                metrics.increment("speculation.misses")
+                return None
+            session["entry"] = None
+
+        future = entry["future"]
+        ready = future.done()
+        start = time.perf_counter()
+        try:
+            contexts = future.result(timeout=settings.SPECULATIVE_WAIT_S)
+        except Exception as e:
+            logger.warning(f"Speculative retrieval unusable, retrieving again: {e}")
+            metrics.increment("speculation.failed")
+            return None
+
+        kind = "exact" if overlap == 1.0 else "near"
+        metrics.increment("speculation.hits")
+        metrics.increment(f"speculation.hits.{kind}")
+        if ready:
+            metrics.increment("speculation.ready")
+        else:
+            metrics.observe("speculation.wait_s", time.perf_counter() - start)
+        logger.info(f"Speculative retrieval hit ({kind}, overlap={overlap:.2f}, ready={ready}, age={age:.1f}s) "
+                    f"for '{entry['query'][:60]}'")
+
+        return contexts
+
+    def get_stats(self) -> Dict:
+        metrics = get_metrics()
+        hits = metrics.get_counter("speculation.hits")
+        misses = metrics.get_counter("speculation.misses")
+
+        return {
+            "enabled": settings.ENABLE_SPECULATIVE_RETRIEVAL,
+            "sessions": len(self._sessions),
+            "inflight": self._inflight,
+            "session_budget": settings.SPECULATIVE_SESSION_BUDGET,
+            "budget_window_s": settings.SPECULATIVE_BUDGET_WINDOW_S,
+            "scheduled": metrics.get_counter("speculation.scheduled"),
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0
+        }
+
+
+_retriever: Optional[SpeculativeRetriever] = None
+_retriever_lock = threading.Lock()
+
+
+def get_speculative_retriever() -> SpeculativeRetriever:
+    global _retriever
+
+    if _retriever is None:
+        with _retriever_lock:
+            if _retriever is None:
+                _retriever = SpeculativeRetriever()
+
+    return _retriever
+
+
+def get_speculation_info() -> Dict:
+    return get_speculative_retriever().get_stats()
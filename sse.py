@@ -0,0 +1,164 @@
+import json
+import time
+import asyncio
+import logging
+import threading
+import contextvars
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional
+from config import settings
+from cancellation import CancelScope, bind_cancel_scope
+from metrics import get_metrics
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_FRAME = b": ping\n\n"
+
+_DONE = object()
+
+
+def _json_default(value):
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(data: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data, default=_json_default, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=_json_default).encode("utf-8")
+
+
+async def iterate_in_thread(iterable: Iterable) -> AsyncIterator:
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue()
+    stop = CancelScope()
+
+    def put(item, error=None):
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, (item, error))
+        except RuntimeError:
+            stop.cancel()
+
+    def produce():
+        iterator = iter(iterable)
+        try:
+            for item in iterator:
+                if stop.cancelled:
+                    break
+                put(item)
+        except BaseException as e:
+            put(_DONE, e)
+            return
+        finally:
+            if stop.cancelled and hasattr(iterator, "close"):
+                iterator.close()
+        put(_DONE)
+
+    context = contextvars.copy_context()
+    context.run(bind_cancel_scope, stop)
+    thread = threading.Thread(target=context.run, args=(produce,), name="sse-producer", daemon=True)
+    thread.start()
+
+    try:
+        while True:
+            item, error = await queue.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.cancel()
+
+
+class SSEEncoder:
+    def __init__(
+        self,
+        trace_id: str,
+        coalesce_ms: Optional[float] = None,
+        coalesce_bytes: Optional[int] = None,
+        heartbeat_s: Optional[float] = None,
+        slim_metadata: Optional[bool] = None
+    ):
+        self.trace_id = trace_id
+        self.coalesce_s = (settings.SSE_COALESCE_MS if coalesce_ms is None else coalesce_ms) / 1000
+        self.coalesce_bytes = settings.SSE_COALESCE_BYTES if coalesce_bytes is None else coalesce_bytes
+        self.heartbeat_s = settings.SSE_HEARTBEAT_S if heartbeat_s is None else heartbeat_s
+        self.slim_metadata = settings.SSE_SLIM_METADATA if slim_metadata is None else slim_metadata
+        self.frames = 0
+        self.tokens = 0
+
+    def encode(self, chunk: Dict) -> bytes:
+        if self.slim_metadata and chunk.get("type") == "metadata" and "contexts" in chunk:
+            chunk = {k: v for k, v in chunk.items() if k != "contexts"}
+
+        payload = {**chunk, "trace_id": self.trace_id, "success": chunk.get("success", chunk.get("type") != "error")}
+        self.frames += 1
+        return b"data: " + dumps(payload) + b"\n\n"
+
+    def _content_frame(self, parts: List[str]) -> bytes:
+        self.tokens += len(parts)
+        return self.encode({"type": "content", "content": "".join(parts)})
+
+    async def stream(self, chunks: AsyncIterator[Dict]) -> AsyncIterator[bytes]:
+        iterator = chunks.__aiter__()
+        pending: List[str] = []
+        pending_bytes = 0
+        flush_at = 0.0
+        next_chunk = None
+
+        try:
+            while True:
+                if next_chunk is None:
+                    next_chunk = asyncio.ensure_future(iterator.__anext__())
+
+                timeout = max(0.0, flush_at - time.monotonic()) if pending else self.heartbeat_s or None
+                done, _ = await asyncio.wait({next_chunk}, timeout=timeout)
+
+                if not done:
+                    if pending:
+                        yield self._content_frame(pending)
+                        pending, pending_bytes = [], 0
+                    else:
+                        yield HEARTBEAT_FRAME
+                    continue
+
+                try:
+                    chunk = next_chunk.result()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    next_chunk = None
+
+                if chunk.get("type") == "content" and set(chunk) == {"type", "content"}:
+                    if not pending:
+                        flush_at = time.monotonic() + self.coalesce_s
+                    pending.append(chunk["content"])
+                    pending_bytes += len(chunk["content"].encode("utf-8"))
+                    if self.coalesce_s <= 0 or pending_bytes >= self.coalesce_bytes:
+                        yield self._content_frame(pending)
+                        pending, pending_bytes = [], 0
+                    continue
+
+                if pending:
+                    yield self._content_frame(pending)
+                    pending, pending_bytes = [], 0
+                yield self.encode(chunk)
+
+            if pending:
+                yield self._content_frame(pending)
+
+        finally:
+            if next_chunk is not None and not next_chunk.done():
+                next_chunk.cancel()
+            elif hasattr(iterator, "aclose"):
+                await iterator.aclose()
+
+            metrics = get_metrics()
+            metrics.increment("sse.frames", self.frames)
+            metrics.increment("sse.tokens", self.tokens)
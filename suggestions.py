@@ -0,0 +1,176 @@
+import os
+import re
+import json
+import math
+import bisect
+import logging
+import threading
+import unicodedata
+from collections import Counter
+from typing import Dict, List, Optional
+from config import settings
+from tokenizer import fold_diacritics
+
+logger = logging.getLogger(__name__)
+
+_NON_WORD_RE = re.compile(r"[^\w]+", re.UNICODE)
+
+MAX_WORD_OFFSETS = 8
+HEAVY_RANGE = 256
+HEAVY_TOP = 32
+START_BONUS = 1.5
+
+
+def normalize_suggestion(text: str) -> str:
+    text = unicodedata.normalize("NFC", text).lower()
+    return " ".join(fold_diacritics(_NON_WORD_RE.sub(" ", text)).split())
+
+
+def load_query_counts(path: Optional[str]) -> Counter:
+    counts: Counter = Counter()
+    if not path or not os.path.exists(path):
+        return counts
+
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    line = json.loads(line).get("query") or ""
+                except ValueError:
+                    continue
+            counts[normalize_suggestion(line)] += 1
+
+    logger.info(f"Loaded {sum(counts.values())} logged queries ({len(counts)} distinct) from {path}")
+    return counts
+
+
+class SuggestionIndex:
+    def __init__(self, entries: List[Dict]):
+        self.entries = entries
+
+        keys = []
+        for entry_id, entry in enumerate(entries):
+            words = normalize_suggestion(entry["text"]).split()
+            for offset in range(min(len(words), MAX_WORD_OFFSETS)):
+                keys.append((" ".join(words[offset:]), entry_id, offset))
+        keys.sort()
+
+        self._keys = [key for key, _, _ in keys]
+        self._ids = [entry_id for _, entry_id, _ in keys]
+        self._offsets = [offset for _, _, offset in keys]
+
+        self._heavy: Dict[str, List[int]] = {}
+        self._precompute_heavy_prefixes()
+
+    def _precompute_heavy_prefixes(self) -> None:
+        groups = [(0, len(self._keys))]
+        length = 1
+
+        while groups:
+            next_groups = []
+            for lo, hi in groups:
+                pos = lo
+                while pos < hi:
+                    key = self._keys[pos]
+                    if len(key) < length:
+                        pos += 1
+                        continue
+
+                    prefix = key[:length]
+                    end = bisect.bisect_left(self._keys, prefix + "\uffff", pos, hi)
+                    if end - pos > HEAVY_RANGE:
+                        self._heavy[prefix] = self._top_in_range(pos, end)[:HEAVY_TOP]
+                        next_groups.append((pos, end))
+                    pos = end
+
+            groups = next_groups
+            length += 1
+
+    def _score(self, entry_id: int, offset: int) -> float:
+        return self.entries[entry_id]["weight"] * (START_BONUS if offset == 0 else 1.0)
+
+    def _rank(self, scores: Dict[int, float]) -> List[int]:
+        return sorted(scores, key=lambda i: (-scores[i], len(self.entries[i]["text"])))
+
+    def _top_in_range(self, lo: int, hi: int) -> List[int]:
+        scores: Dict[int, float] = {}
+        for pos in range(lo, hi):
+            entry_id = self._ids[pos]
+            score = self._score(entry_id, self._offsets[pos])
+            if score > scores.get(entry_id, 0.0):
+                scores[entry_id] = score
+        return self._rank(scores)
+
+    def lookup(self, prefix: str, limit: int = 8) -> List[Dict]:
+        normalized = normalize_suggestion(prefix)
+        if not normalized:
+            return []
+        if prefix[-1:].isspace():
+            normalized += " "
+
+        if normalized in self._heavy:
+            return [self.entries[i] for i in self._heavy[normalized][:limit]]
+
+        lo = bisect.bisect_left(self._keys, normalized)
+        hi = bisect.bisect_left(self._keys, normalized + "\uffff", lo, min(lo + HEAVY_RANGE + 1, len(self._keys)))
+        return [self.entries[i] for i in self._top_in_range(lo, hi)[:limit]]
+
+
+def build_suggestion_index(faq: List[Dict], guide: List[Dict]) -> None:
+    counts = load_query_counts(settings.SUGGESTIONS_QUERY_LOG)
+
+    entries: Dict[str, Dict] = {}
+    candidates = [(item["question"], "faq", item.get("href", ""), 1.0) for item in faq] + \
+                 [(item["title"], "guide", item.get("href", ""), 0.8) for item in guide]
+
+    for text, doc_type, href, base_weight in candidates:
+        text = " ".join(text.split())
+        key = normalize_suggestion(text)
+        if not key or key in entries:
+            continue
+        entries[key] = {
+            "text": text,
+            "type": doc_type,
+            "href": href,
+            "weight": round(base_weight * (1.0 + math.log1p(counts.get(key, 0))), 4)
+        }
+
+    with open(settings.SUGGESTIONS_INDEX_PATH, "w", encoding="utf-8") as f:
+        json.dump(list(entries.values()), f, ensure_ascii=False)
+
+    clear_suggestion_index()
+    logger.info(f"Suggestion index saved to {settings.SUGGESTIONS_INDEX_PATH} with {len(entries)} entries")
+
+
+_index_instance: Optional[SuggestionIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_suggestion_index() -> Optional[SuggestionIndex]:
+    global _index_instance
+
+    if _index_instance is None:
+        with _index_lock:
+            if _index_instance is None and os.path.exists(settings.SUGGESTIONS_INDEX_PATH):
+                with open(settings.SUGGESTIONS_INDEX_PATH, encoding="utf-8") as f:
+                    _index_instance = SuggestionIndex(json.load(f))
+                logger.info(f"Suggestion index loaded with {len(_index_instance.entries)} entries")
+
+    return _index_instance
+
+
+def clear_suggestion_index() -> None:
+    global _index_instance
+
+    with _index_lock:
+        _index_instance = None
+
+
+def suggest(prefix: str, limit: Optional[int] = None) -> List[Dict]:
+    index = get_suggestion_index()
+    if index is None:
+        return []
+    return index.lookup(prefix, limit or settings.SUGGESTIONS_LIMIT)
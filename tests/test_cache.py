@@ -0,0 +1,12 @@
+from cache import MemoryCacheBackend
+
+
+def test_memory_backend_does_not_share_mutable_state():
+    backend = MemoryCacheBackend(10)
+    data = {"contexts": [{"text": "a"}]}
+
+    backend.set("key", data, 60)
+    data["contexts"].append({"text": "set later"})
+    backend.get("key")["contexts"][0]["text"] = "changed by caller"
+
+    assert backend.get("key") == {"contexts": [{"text": "a"}]}
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import intent_gate
+from config import settings
+
+
+@pytest.fixture
+def gate(monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_INTENT_GATE", True)
+    monkeypatch.setattr(settings, "INTENT_GATE_CENTROIDS", False)
+    monkeypatch.setattr(intent_gate, "load_centroids", lambda: {})
+    monkeypatch.setattr(intent_gate, "embed_query", lambda query: np.zeros((1, 4), dtype=np.float32))
+
+    def set_in_scope(similarity):
+        monkeypatch.setattr(intent_gate, "_in_scope_similarity", lambda q_emb, centroids: similarity)
+
+    set_in_scope(0.0)
+    return set_in_scope
+
+
+@pytest.mark.parametrize("query", [
+    "Cấp giấy phép kinh doanh xổ số",
+    "Nộp thuế chứng khoán trực tuyến",
+    "Đăng ký kinh doanh dịch vụ nấu ăn",
+    "Đăng ký thành lập câu lạc bộ bóng đá",
+    "Thủ tục mở tài khoản chứng khoán",
+])
+def test_administrative_queries_with_out_of_scope_words_pass_through(gate, query):
+    assert intent_gate.match_intent(query) is None
+
+
+def test_clear_out_of_scope_query_is_refused(gate):
+    match = intent_gate.match_intent("Thời tiết hôm nay thế nào")
+
+    assert match is not None
+    assert match["intent"] == "out_of_scope"
+    assert match["method"] == "keyword"
+
+
+def test_out_of_scope_keyword_close_to_indexed_content_passes_through(gate):
+    gate(settings.INTENT_GATE_KEYWORD_MAX_IN_SCOPE + 0.1)
+
+    assert intent_gate.match_intent("Thời tiết hôm nay thế nào") is None
+
+
+@pytest.mark.parametrize("query, intent", [
+    ("Xin chào bạn!", "greeting"),
+    ("cam on nhieu nhe", "thanks"),
+    ("Tạm biệt", "goodbye"),
+])
+def test_small_talk_keywords(gate, query, intent):
+    assert intent_gate.match_intent(query)["intent"] == intent
+
+
+def test_greeting_followed_by_a_question_passes_through(gate):
+    assert intent_gate.match_intent("Xin chào, cho hỏi thủ tục cấp hộ chiếu") is None
@@ -0,0 +1,53 @@
+import pytest
+
+from config import settings
+from llm_transport import ResilientStreamer
+
+
+class StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def streamer(monkeypatch):
+    monkeypatch.setattr(settings, "LLM_ENABLE_HEDGING", False)
+    monkeypatch.setattr(settings, "LLM_MAX_RETRIES", 0)
+    streamer = ResilientStreamer("test")
+    streamer.breaker.failure_threshold = 2
+    return streamer
+
+
+def failing(status_code):
+    def open_stream():
+        raise StatusError(status_code)
+    return open_stream
+
+
+def test_client_errors_do_not_open_the_breaker(streamer):
+    for _ in range(3):
+        with pytest.raises(StatusError):
+            list(streamer.stream(failing(400)))
+
+    assert streamer.breaker.state == "closed"
+
+
+def test_retryable_errors_open_the_breaker(streamer):
+    for _ in range(2):
+        with pytest.raises(StatusError):
+            list(streamer.stream(failing(503)))
+
+    assert streamer.breaker.state == "open"
+
+
+def test_client_error_releases_the_half_open_probe(streamer):
+    streamer.breaker.record_failure()
+    streamer.breaker.record_failure()
+    streamer.breaker._opened_at -= streamer.breaker.reset_timeout
+
+    with pytest.raises(StatusError):
+        list(streamer.stream(failing(400)))
+
+    assert streamer.breaker.state == "half_open"
+    assert streamer.breaker._probe_in_flight is False
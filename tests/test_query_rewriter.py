@@ -0,0 +1,25 @@
+import pytest
+
+from query_rewriter import is_follow_up
+
+
+@pytest.mark.parametrize("query", [
+    "Còn lệ phí thì sao?",
+    "Vậy cần mang theo giấy tờ gì?",
+    "Nó mất bao lâu?",
+    "Thủ tục đó nộp ở đâu?",
+    "Nếu vậy tôi phải làm lại từ đầu à?",
+])
+def test_anaphoric_questions_are_follow_ups(query):
+    assert is_follow_up(query)
+
+
+@pytest.mark.parametrize("query", [
+    "Đăng ký khai sinh như thế nào?",
+    "Thủ tục cấp hộ chiếu ra sao?",
+    "Lệ phí căn cước",
+    "Đăng ký thường trú",
+    "Thế nào là hộ khẩu thường trú?",
+])
+def test_standalone_questions_are_not_follow_ups(query):
+    assert not is_follow_up(query)
@@ -0,0 +1,42 @@
+import pytest
+
+from config import settings
+from speculation import SpeculativeRetriever
+
+QUERY = "thủ tục cấp hộ chiếu phổ thông"
+
+
+def search(query, k):
+    return [{"content": query, "k": k}]
+
+
+@pytest.fixture
+def retriever(monkeypatch):
+    monkeypatch.setattr(settings, "SPECULATIVE_MIN_WORDS", 1)
+    monkeypatch.setattr(settings, "SPECULATIVE_SESSION_BUDGET", 2)
+    monkeypatch.setattr(settings, "SPECULATIVE_MAX_INFLIGHT", 2)
+    return SpeculativeRetriever()
+
+
+def wait(retriever):
+    for session in retriever._sessions.values():
+        if session["entry"] is not None:
+            session["entry"]["future"].result(timeout=5)
+
+
+def test_budget_is_per_client_across_conversation_ids(retriever):
+    assert retriever.schedule("client-a", "conv_1", QUERY, 5, search) == "scheduled"
+    wait(retriever)
+    assert retriever.schedule("client-a", "conv_2", QUERY, 5, search) == "scheduled"
+    wait(retriever)
+    assert retriever.schedule("client-a", "conv_3", QUERY, 5, search) == "budget"
+    assert retriever.schedule("client-b", "conv_3", QUERY, 5, search) == "scheduled"
+
+
+def test_claim_requires_matching_conversation(retriever):
+    retriever.schedule("client-a", "conv_1", QUERY, 5, search)
+    wait(retriever)
+
+    assert retriever.claim("client-a", "conv_2", QUERY, 5) is None
+    assert retriever.claim("client-b", "conv_1", QUERY, 5) is None
+    assert retriever.claim("client-a", "conv_1", QUERY, 5) == search(QUERY, 5)
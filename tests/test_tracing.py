@@ -0,0 +1,45 @@
+import contextvars
+
+import pytest
+
+import tracing
+from config import settings
+
+
+@pytest.fixture
+def trace(monkeypatch):
+    monkeypatch.setattr(settings, "ENABLE_TRACING", True)
+    monkeypatch.setattr(settings, "TRACING_SAMPLE_RATE", 0.0)
+    monkeypatch.setattr(settings, "TRACING_SLOW_REQUEST_MS", float("inf"))
+    return tracing.start_trace("trace-1")
+
+
+def test_nested_spans_restore_the_parent(trace):
+    with tracing.span("outer") as outer:
+        with pytest.raises(RuntimeError):
+            with tracing.span("inner") as inner:
+                assert tracing.get_current_span() is inner
+                raise RuntimeError("boom")
+        assert tracing.get_current_span() is outer
+
+    assert tracing.get_current_span() is trace.root
+    tracing.finish_trace(trace)
+
+
+def test_finish_trace_unbinds_the_trace(trace):
+    tracing.finish_trace(trace)
+
+    assert tracing.get_current_trace() is None
+    assert tracing.get_current_span() is tracing.NOOP_SPAN
+
+
+def test_generator_closed_from_another_context(trace):
+    def spans():
+        with tracing.span("stream"):
+            yield
+
+    generator = spans()
+    next(generator)
+    contextvars.copy_context().run(generator.close)
+
+    tracing.finish_trace(trace)
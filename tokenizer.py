@@ -0,0 +1,82 @@
+import re
+import unicodedata
+import logging
+from functools import lru_cache
+from typing import Dict, FrozenSet, List, Optional
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+VIETNAMESE_STOPWORDS: FrozenSet[str] = frozenset({
+    "à", "ạ", "ai", "bị", "bởi", "các", "cái", "cả", "cho", "có", "còn", "của", "cùng", "đã",
+    "đang", "đây", "để", "đến", "đó", "được", "gì", "hay", "hoặc", "khi", "là", "lại", "mà",
+    "mình", "này", "nào", "nên", "nếu", "nhé", "như", "những", "nữa", "ơi", "ra", "rằng",
+    "rồi", "sẽ", "tại", "thì", "trên", "từ", "và", "vào", "vậy", "về", "với", "vì", "vẫn"
+})
+
+
+@lru_cache(maxsize=65536)
+def fold_diacritics(token: str) -> str:
+    decomposed = unicodedata.normalize("NFD", token)
+    stripped = "".join(ch for ch in decomposed if unicodedata.category(ch) != "Mn")
+    return stripped.replace("đ", "d").replace("Đ", "D")
+
+
+class VietnameseTokenizer:
+    def __init__(
+        self,
+        fold: Optional[bool] = None,
+        bigrams: Optional[bool] = None,
+        stopwords: Optional[bool] = None
+    ):
+        self.fold = settings.BM25_FOLD_DIACRITICS if fold is None else fold
+        self.bigrams = settings.BM25_BIGRAMS if bigrams is None else bigrams
+        self.stopwords = VIETNAMESE_STOPWORDS if (
+            settings.BM25_STOPWORDS if stopwords is None else stopwords
+        ) else frozenset()
+
+    def syllables(self, text: str) -> List[str]:
+        return _WORD_RE.findall(unicodedata.normalize("NFC", text).lower())
+
+    def __call__(self, text: str) -> List[str]:
+        syllables = self.syllables(text)
+        stopwords = self.stopwords
+
+        tokens = [s for s in syllables if s not in stopwords]
+
+        if self.bigrams:
+            tokens.extend(
+                f"{a}_{b}" for a, b in zip(syllables, syllables[1:])
+                if a not in stopwords and b not in stopwords
+            )
+
+        if self.fold:
+            seen = set(tokens)
+            for folded in map(fold_diacritics, tokens[:]):
+                if folded not in seen:
+                    seen.add(folded)
+                    tokens.append(folded)
+
+        return tokens
+
+    def signature(self) -> Dict[str, bool]:
+        return {"fold": self.fold, "bigrams": self.bigrams, "stopwords": bool(self.stopwords)}
+
+
+_tokenizer_instance: Optional[VietnameseTokenizer] = None
+
+
+def get_tokenizer() -> VietnameseTokenizer:
+    global _tokenizer_instance
+
+    if _tokenizer_instance is None:
+        _tokenizer_instance = VietnameseTokenizer()
+        logger.info(f"Tokenizer initialized: {_tokenizer_instance.signature()}")
+
+    return _tokenizer_instance
+
+
+def tokenize(text: str) -> List[str]:
+    return get_tokenizer()(text)
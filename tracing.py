@@ -0,0 +1,312 @@
+import json
+import logging
+import os
+import queue
+import random
+import threading
+import time
+import uuid
+import urllib.request
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+from config import settings
+
+logger = logging.getLogger(__name__)
+
+_trace_id_var: ContextVar[Optional[str]] = ContextVar("trace_id", default=None)
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span: ContextVar[Optional["Span"]] = ContextVar("current_span", default=None)
+
+
+class Span:
+    __slots__ = ("trace", "name", "span_id", "parent_id", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, trace: "Trace", name: str, parent_id: Optional[str], attributes: Optional[Dict[str, Any]] = None):
+        self.trace = trace
+        self.name = name
+        self.span_id = uuid.uuid4().hex[:16]
+        self.parent_id = parent_id
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = dict(attributes) if attributes else {}
+        self.error: Optional[str] = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.trace.add_span(self)
+
+    @property
+    def duration_ms(self) -> float:
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+
+class _NoopSpan:
+    name = ""
+    duration_ms = 0.0
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def record_error(self, error: BaseException) -> None:
+        pass
+
+    def end(self) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class Trace:
+    def __init__(self, trace_id: str, sampled: bool):
+        self.trace_id = trace_id
+        self.sampled = sampled
+        self.spans: List[Span] = []
+        self.root: Optional[Span] = None
+        self.tokens = []
+        self._lock = threading.Lock()
+
+    def add_span(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def breakdown(self) -> Dict[str, float]:
+        totals: Dict[str, float] = {}
+        with self._lock:
+            for span in self.spans:
+                totals[span.name] = round(totals.get(span.name, 0.0) + span.duration_ms, 3)
+        return totals
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def _otlp_attributes(attributes: Dict[str, Any]) -> List[Dict[str, Any]]:
+    return [{"key": key, "value": _otlp_value(value)} for key, value in attributes.items()]
+
+
+def to_otlp_json(trace: Trace) -> Dict[str, Any]:
+    trace_id = trace.trace_id.replace("-", "")[:32].rjust(32, "0")
+
+    spans = []
+    for span in trace.spans:
+        otlp_span = {
+            "traceId": trace_id,
+            "spanId": span.span_id,
+            "name": span.name,
+            "kind": 2 if span.parent_id is None else 1,
+            "startTimeUnixNano": str(span.start_ns),
+            "endTimeUnixNano": str(span.end_ns),
+            "attributes": _otlp_attributes(span.attributes),
+            "status": {"code": 2, "message": span.error} if span.error else {"code": 1}
+        }
+        if span.parent_id:
+            otlp_span["parentSpanId"] = span.parent_id
+        spans.append(otlp_span)
+
+    return {
+        "resourceSpans": [{
+            "resource": {
+                "attributes": _otlp_attributes({
+                    "service.name": settings.TRACING_SERVICE_NAME,
+                    "deployment.environment": settings.APP_ENV
+                })
+            },
+            "scopeSpans": [{
+                "scope": {"name": "chatbot.tracing", "version": settings.API_VERSION},
+                "spans": spans
+            }]
+        }]
+    }
+
+
+class FileSpanExporter:
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    def export(self, payload: Dict[str, Any]) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(payload, ensure_ascii=False) + "\n")
+
+
+class OTLPHttpSpanExporter:
+    def __init__(self, endpoint: str, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.timeout = timeout
+
+    def export(self, payload: Dict[str, Any]) -> None:
+        request = urllib.request.Request(
+            self.endpoint,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            response.read()
+
+
+class _ExportWorker:
+    def __init__(self, exporter, max_queue_size: int = 1000):
+        self.exporter = exporter
+        self.queue: "queue.Queue[Trace]" = queue.Queue(maxsize=max_queue_size)
+        self.dropped = 0
+        self.thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+        self.thread.start()
+
+    def submit(self, trace: Trace) -> None:
+        try:
+            self.queue.put_nowait(trace)
+        except queue.Full:
+            self.dropped += 1
+
+    def _run(self) -> None:
+        while True:
+            trace = self.queue.get()
+            try:
+                self.exporter.export(to_otlp_json(trace))
+            except Exception as e:
+                logger.warning(f"Trace export failed: {e}")
+
+
+_export_worker: Optional[_ExportWorker] = None
+_export_worker_lock = threading.Lock()
+
+
+def _get_export_worker() -> Optional[_ExportWorker]:
+    global _export_worker
+
+    if settings.TRACING_EXPORTER == "none":
+        return None
+
+    if _export_worker is None:
+        with _export_worker_lock:
+            if _export_worker is None:
+                if settings.TRACING_EXPORTER == "file":
+                    exporter = FileSpanExporter(settings.TRACING_EXPORT_PATH)
+                elif settings.TRACING_EXPORTER == "otlp_http":
+                    exporter = OTLPHttpSpanExporter(settings.TRACING_OTLP_ENDPOINT)
+                else:
+                    logger.warning(f"Unknown tracing exporter: {settings.TRACING_EXPORTER}, export disabled")
+                    return None
+                _export_worker = _ExportWorker(exporter)
+                logger.info(f"Trace exporter started: {settings.TRACING_EXPORTER}")
+
+    return _export_worker
+
+
+def get_trace_id() -> Optional[str]:
+    return _trace_id_var.get()
+
+
+def bind_trace_id(trace_id: Optional[str]):
+    return _trace_id_var.set(trace_id)
+
+
+def unbind_trace_id(token) -> None:
+    _trace_id_var.reset(token)
+
+
+def get_current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def get_current_span():
+    if _current_trace.get() is None:
+        return NOOP_SPAN
+    return _current_span.get() or NOOP_SPAN
+
+
+def start_trace(trace_id: str, name: str = "request", attributes: Optional[Dict[str, Any]] = None) -> Optional[Trace]:
+    if not settings.ENABLE_TRACING:
+        return None
+
+    trace = Trace(trace_id, sampled=random.random() < settings.TRACING_SAMPLE_RATE)
+    trace.root = Span(trace, name, None, attributes)
+    trace.tokens = [_current_trace.set(trace), _current_span.set(trace.root)]
+    return trace
+
+
+def finish_trace(trace: Optional[Trace]) -> None:
+    if trace is None or trace.root is None or trace.root.end_ns is not None:
+        return
+
+    trace.root.end()
+    for token in reversed(trace.tokens):
+        token.var.reset(token)
+    trace.tokens = []
+    duration_ms = trace.root.duration_ms
+    slow = duration_ms >= settings.TRACING_SLOW_REQUEST_MS
+
+    if slow:
+        logger.warning(
+            f"Slow request {trace.root.name} took {duration_ms:.1f}ms",
+            extra={"trace_id": trace.trace_id, "extra_data": {"span_breakdown_ms": trace.breakdown()}}
+        )
+
+    if trace.sampled or slow:
+        worker = _get_export_worker()
+        if worker is not None:
+            worker.submit(trace)
+
+
+def start_span(name: str, **attributes):
+    trace = _current_trace.get()
+    if trace is None:
+        return NOOP_SPAN
+
+    parent = _current_span.get()
+    return Span(trace, name, parent.span_id if parent else None, attributes)
+
+
+@contextmanager
+def span(name: str, **attributes):
+    trace = _current_trace.get()
+    if trace is None:
+        yield NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    current = Span(trace, name, parent.span_id if parent else None, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        if not isinstance(e, GeneratorExit):
+            current.record_error(e)
+        raise
+    finally:
+        current.end()
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # A generator closed from another context (e.g. during garbage collection) cannot reset its token
+            _current_span.set(parent)
+
+
+def get_tracing_info() -> Dict[str, Any]:
+    worker = _export_worker
+    return {
+        "enabled": settings.ENABLE_TRACING,
+        "sample_rate": settings.TRACING_SAMPLE_RATE,
+        "exporter": settings.TRACING_EXPORTER,
+        "slow_request_ms": settings.TRACING_SLOW_REQUEST_MS,
+        "export_queue_size": worker.queue.qsize() if worker else 0,
+        "dropped_traces": worker.dropped if worker else 0
+    }
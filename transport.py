@@ -0,0 +1,118 @@
+import os
+import stat
+import zlib
+import logging
+import mimetypes
+from typing import AsyncIterator, Callable, Optional, Set
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response, StreamingResponse
+from starlette.types import Receive, Scope, Send
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+from config import settings
+from metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+PRECOMPRESSED_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepted_encodings(accept_encoding: str) -> Set[str]:
+    encodings = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            encodings.add(name.strip())
+    return encodings
+
+
+class CompressedStaticFiles(StaticFiles):
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+
+        response = None
+        encoding = "identity"
+        for candidate, suffix in PRECOMPRESSED_SUFFIXES:
+            if candidate not in accepted:
+                continue
+            try:
+                compressed_stat = os.stat(f"{full_path}{suffix}")
+            except OSError:
+                continue
+            if stat.S_ISREG(compressed_stat.st_mode) and compressed_stat.st_mtime >= stat_result.st_mtime:
+                response = FileResponse(
+                    f"{full_path}{suffix}",
+                    status_code=status_code,
+                    stat_result=compressed_stat,
+                    method=scope["method"],
+                    media_type=mimetypes.guess_type(str(full_path))[0] or "text/plain",
+                    headers={"Content-Encoding": candidate}
+                )
+                encoding = candidate
+                break
+
+        if response is None:
+            response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, method=scope["method"])
+
+        response.headers["Vary"] = "Accept-Encoding"
+        if b"v=" in scope.get("query_string", b""):
+            response.headers["Cache-Control"] = f"public, max-age={settings.STATIC_IMMUTABLE_MAX_AGE}, immutable"
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+
+        metrics = get_metrics()
+        if self.is_not_modified(response.headers, request_headers):
+            metrics.increment("transport.static.not_modified")
+            return NotModifiedResponse(response.headers)
+
+        metrics.increment(f"transport.static.{encoding}_bytes", int(response.headers["content-length"]))
+        return response
+
+
+async def encode_stream(frames: AsyncIterator[bytes], compress: bool) -> AsyncIterator[bytes]:
+    metrics = get_metrics()
+    raw_bytes = wire_bytes = 0
+    compressor = zlib.compressobj(settings.SSE_COMPRESSION_LEVEL, zlib.DEFLATED, 31) if compress else None
+
+    try:
+        async for frame in frames:
+            raw_bytes += len(frame)
+            if compressor is not None:
+                frame = compressor.compress(frame) + compressor.flush(zlib.Z_SYNC_FLUSH)
+            wire_bytes += len(frame)
+            yield frame
+
+        if compressor is not None:
+            tail = compressor.flush(zlib.Z_FINISH)
+            wire_bytes += len(tail)
+            yield tail
+
+    finally:
+        metrics.increment("transport.sse.raw_bytes", raw_bytes)
+        metrics.increment("transport.sse.wire_bytes", wire_bytes)
+        metrics.increment("transport.sse.gzip_streams" if compress else "transport.sse.identity_streams")
+
+
+def wants_gzip(request) -> bool:
+    return settings.SSE_COMPRESSION and "gzip" in accepted_encodings(request.headers.get("accept-encoding", ""))
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    # on_close runs once the response is done, even if the client left before the body iterator was started
+    def __init__(self, content, *args, on_close: Optional[Callable[[], None]] = None, **kwargs):
+        super().__init__(content, *args, **kwargs)
+        self.on_close = on_close
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.on_close is not None:
+                self.on_close()